@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ActivitySummary, UserClick
+from .models import ActivitySummary, Referrer, UserAgent, UserClick
 
 
 @admin.register(UserClick)
@@ -8,7 +8,7 @@ class UserClickAdmin(admin.ModelAdmin):
     list_display = ["product", "action", "user", "session_key", "ip_address", "created_at"]
     list_filter = ["action", "created_at", "product__category"]
     search_fields = ["product__name", "user__username", "user__email", "session_key", "ip_address"]
-    readonly_fields = ["created_at"]
+    readonly_fields = ["created_at", "user_agent", "referer"]
     date_hierarchy = "created_at"
 
     fieldsets = (
@@ -18,7 +18,14 @@ class UserClickAdmin(admin.ModelAdmin):
     )
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related("product", "user")
+        return super().get_queryset(request).select_related("product", "user", "user_agent", "referer")
+
+
+@admin.register(UserAgent, Referrer)
+class RequestMetadataValueAdmin(admin.ModelAdmin):
+    list_display = ["value", "created_at"]
+    search_fields = ["value"]
+    readonly_fields = ["value", "value_hash", "created_at"]
 
 
 @admin.register(ActivitySummary)
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-16 20:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "activity",
+            "0002_rename_activity_ac_product_dc04b5_idx_activity_ac_product_bbb39e_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userclick",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
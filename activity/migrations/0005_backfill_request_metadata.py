@@ -0,0 +1,79 @@
+"""
+Move UserClick user agents and referers into the UserAgent/Referrer tables.
+
+Rows are walked in primary key order, BATCH_SIZE at a time; each batch
+resolves its distinct values with one read and one bulk insert per table
+and is written back with one UPDATE per (user agent, referer) pair.
+"""
+
+import hashlib
+from collections import defaultdict
+
+from django.db import migrations
+
+
+BATCH_SIZE = 5000
+
+
+def _hash(value):
+    return hashlib.sha256(value.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _encode(model, values):
+    hashes = {_hash(value): value for value in values if value}
+    found = dict(model.objects.filter(value_hash__in=hashes).values_list("value_hash", "id"))
+    model.objects.bulk_create(
+        [model(value=value, value_hash=h) for h, value in hashes.items() if h not in found],
+        ignore_conflicts=True,
+    )
+    found.update(model.objects.filter(value_hash__in=hashes).values_list("value_hash", "id"))
+    return {hashes[h]: pk for h, pk in found.items()}
+
+
+def encode_request_metadata(apps, schema_editor):
+    UserClick = apps.get_model("activity", "UserClick")
+    UserAgent = apps.get_model("activity", "UserAgent")
+    Referrer = apps.get_model("activity", "Referrer")
+
+    last_pk = 0
+    while True:
+        rows = list(
+            UserClick.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "user_agent", "referer")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        user_agent_ids = _encode(UserAgent, {user_agent for _, user_agent, _ in rows})
+        referer_ids = _encode(Referrer, {referer for _, _, referer in rows})
+        groups = defaultdict(list)
+        for pk, user_agent, referer in rows:
+            key = (user_agent_ids.get(user_agent), referer_ids.get(referer))
+            if key != (None, None):
+                groups[key].append(pk)
+        for (user_agent_id, referer_id), pks in groups.items():
+            UserClick.objects.filter(pk__in=pks).update(user_agent_ref_id=user_agent_id, referer_ref_id=referer_id)
+
+
+def decode_request_metadata(apps, schema_editor):
+    UserClick = apps.get_model("activity", "UserClick")
+    UserAgent = apps.get_model("activity", "UserAgent")
+    Referrer = apps.get_model("activity", "Referrer")
+
+    for user_agent in UserAgent.objects.iterator():
+        UserClick.objects.filter(user_agent_ref=user_agent).update(user_agent=user_agent.value)
+    for referrer in Referrer.objects.iterator():
+        UserClick.objects.filter(referer_ref=referrer).update(referer=referrer.value[:200])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("activity", "0004_useragent_referrer"),
+    ]
+
+    operations = [
+        migrations.RunPython(encode_request_metadata, decode_request_metadata),
+    ]
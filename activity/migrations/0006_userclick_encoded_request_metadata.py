@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("activity", "0005_backfill_request_metadata"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="userclick",
+            name="referer",
+        ),
+        migrations.RemoveField(
+            model_name="userclick",
+            name="user_agent",
+        ),
+        migrations.RenameField(
+            model_name="userclick",
+            old_name="referer_ref",
+            new_name="referer",
+        ),
+        migrations.RenameField(
+            model_name="userclick",
+            old_name="user_agent_ref",
+            new_name="user_agent",
+        ),
+        migrations.AlterField(
+            model_name="userclick",
+            name="referer",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="clicks",
+                to="activity.referrer",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userclick",
+            name="user_agent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="clicks",
+                to="activity.useragent",
+            ),
+        ),
+    ]
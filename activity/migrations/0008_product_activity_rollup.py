@@ -0,0 +1,85 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("activity", "0007_visitor_sketches"),
+        ("marketplace", "0027_product_tag_color_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductActivityRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("view", "Product View"),
+                            ("listing_view", "Product Listing View"),
+                            ("detail_view", "Product Detail View"),
+                            ("click", "Product Click"),
+                            ("favorite", "Add to Favorites"),
+                            ("unfavorite", "Remove from Favorites"),
+                            ("cart_add", "Add to Cart"),
+                            ("cart_remove", "Remove from Cart"),
+                            ("purchase", "Product Purchase"),
+                            ("search_view", "Search Result View"),
+                            ("category_view", "Category Listing View"),
+                            ("share", "Product Share"),
+                            ("review", "Product Review"),
+                            ("contact_seller", "Contact Seller"),
+                            ("image_view", "Product Image View"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("period_start", models.DateTimeField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_rollups",
+                        to="marketplace.product",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-period_start"],
+                "indexes": [
+                    models.Index(
+                        fields=["product", "granularity", "period_start"],
+                        name="activity_pr_product_02ab3c_idx",
+                    ),
+                    models.Index(
+                        fields=["granularity", "period_start"],
+                        name="activity_pr_granula_775bfb_idx",
+                    ),
+                ],
+                "unique_together": {
+                    ("product", "granularity", "action", "period_start")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+"""
+Build ProductActivityRollup from the UserClick history already stored.
+
+Windowed analytics read only the rollups, which the periodic task builds
+from recent events. Without this backfill every window that reaches back
+before the deploy would count zero until the rollups caught up.
+
+History is walked one local day at a time, oldest first: each day's hour
+rows come from one grouped UserClick query, and its day rows are summed from
+them in Python. A day's existing rollup rows are replaced, so the migration
+can run after the periodic task has already written some.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_rollups(apps, schema_editor):
+    UserClick = apps.get_model("activity", "UserClick")
+    ProductActivityRollup = apps.get_model("activity", "ProductActivityRollup")
+
+    first = UserClick.objects.aggregate(first=Min("created_at"))["first"]
+    if first is None:
+        return
+
+    day = timezone.localtime(first).date()
+    last_day = timezone.localdate()
+    while day <= last_day:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = start + timedelta(days=1)
+        hours = (
+            UserClick.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by()
+            .annotate(hour=TruncHour("created_at", tzinfo=dt_timezone.utc))
+            .values_list("product_id", "action", "hour")
+            .annotate(n=Count("id"))
+        )
+        rollups = []
+        per_day = defaultdict(int)
+        for product_id, action, hour, n in hours:
+            rollups.append(
+                ProductActivityRollup(
+                    product_id=product_id, action=action, granularity="hour", period_start=hour, count=n
+                )
+            )
+            per_day[(product_id, action)] += n
+        rollups.extend(
+            ProductActivityRollup(product_id=product_id, action=action, granularity="day", period_start=start, count=n)
+            for (product_id, action), n in per_day.items()
+        )
+
+        ProductActivityRollup.objects.filter(period_start__gte=start, period_start__lt=end).delete()
+        ProductActivityRollup.objects.bulk_create(rollups, batch_size=BATCH_SIZE)
+        day += timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("activity", "0008_product_activity_rollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
+import hashlib
 import logging
+from datetime import timedelta
 
 from django.contrib.auth import get_user_model
 from django.db import models
@@ -11,6 +13,41 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+class RequestMetadataValue(models.Model):
+    """
+    Dictionary entry for a repeated request header value.
+
+    UserClick rows reference these by id instead of repeating the full text;
+    the write path resolves ids through activity.services.encoding.
+    """
+
+    value = models.TextField()
+    value_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.value[:100]
+
+    @staticmethod
+    def hash_value(value: str) -> str:
+        return hashlib.sha256(value.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.value_hash = self.hash_value(self.value)
+        super().save(*args, **kwargs)
+
+
+class UserAgent(RequestMetadataValue):
+    """Distinct User-Agent header seen by activity tracking."""
+
+
+class Referrer(RequestMetadataValue):
+    """Distinct Referer header seen by activity tracking."""
+
+
 class UserClick(models.Model):
     """
     Track user interactions with products including views, favorites, and cart additions.
@@ -35,6 +72,25 @@ class UserClick(models.Model):
         ("image_view", "Product Image View"),
     ]
 
+    # ProductMetrics counter deltas per action; purchases are recorded by the order tracking utils
+    METRIC_DELTAS = {
+        "view": {"total_views": 1},
+        "detail_view": {"total_views": 1},
+        "listing_view": {"total_views": 1},
+        "search_view": {"total_views": 1},
+        "category_view": {"total_views": 1},
+        "image_view": {"total_views": 1},
+        "click": {"total_clicks": 1},
+        "favorite": {"total_favorites": 1},
+        # Never goes below 0
+        "unfavorite": {"total_favorites": -1},
+        # Cart additions count as both cart additions AND clicks (since adding to cart is a user interaction/click)
+        "cart_add": {"total_cart_additions": 1, "total_clicks": 1},
+    }
+
+    # Actions deduplicated per user/session within ACTIVITY_DEDUP_WINDOW_SECONDS
+    DEDUP_ACTIONS = frozenset({"view", "detail_view", "listing_view", "category_view", "search_view"})
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="activity_clicks", null=True, blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="activity_clicks")
     action = models.CharField(max_length=30, choices=ACTION_CHOICES)
@@ -42,13 +98,13 @@ class UserClick(models.Model):
     # Session tracking for anonymous users
     session_key = models.CharField(max_length=40, null=True, blank=True)
 
-    # Request metadata
+    # Request metadata (user agent and referer are dictionary-encoded)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True)
-    referer = models.URLField(blank=True, null=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, related_name="clicks", null=True, blank=True)
+    referer = models.ForeignKey(Referrer, on_delete=models.PROTECT, related_name="clicks", null=True, blank=True)
 
-    # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Timestamps (set explicitly by batched ingestion to the time the event happened)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
@@ -75,36 +131,17 @@ class UserClick(models.Model):
             session_key: Session key for anonymous users
             request: HttpRequest object for metadata
         """
-        from datetime import timedelta
-
-        # Prevent duplicate view tracking within a very short time window (e.g., 1 second)
-        # to avoid double-counting from React StrictMode, double-clicks, or immediate page refreshes
-        # but still allow legitimate repeat visits
-        if action in ["view", "detail_view", "listing_view", "category_view", "search_view"]:
-            time_threshold = timezone.now() - timedelta(seconds=1)  # Short window
-
-            # Check for very recent similar activity by the same user/session
-            existing_activity = cls.objects.filter(
-                product=product,
-                action=action,  # Only check for the exact same action type
-                created_at__gte=time_threshold,
-            )
-
-            if user:
-                existing_activity = existing_activity.filter(user=user)
-            elif session_key:
-                existing_activity = existing_activity.filter(session_key=session_key)
-            else:
-                # For requests without user or session, still allow tracking
-                # Don't prevent anonymous users from being tracked
-                pass
-
-            if existing_activity.exists():
-                # Return the most recent existing activity instead of creating a duplicate
-                logger.debug(
-                    f"Duplicate view prevented (within 1s): {product.name} by {user or session_key or 'anonymous'}"
-                )
-                return existing_activity.first()
+        # Drop views fired twice within a moment (React StrictMode, double-clicks,
+        # immediate refreshes) while still allowing legitimate repeat visits.
+        # Answered by an in-memory/Redis TTL set, never by a database read.
+        actor = user.pk if user else session_key
+        if action in cls.DEDUP_ACTIONS and actor:
+            from activity.services.dedup import get_activity_deduplicator
+
+            if get_activity_deduplicator().is_duplicate(actor, action, product.pk):
+                logger.debug(f"Duplicate {action} dropped: {product.name} by {user or session_key}")
+                # Unsaved: the original row is not looked up
+                return cls(product=product, action=action, user=user, session_key=session_key)
 
         # Extract request metadata
         ip_address = None
@@ -122,6 +159,8 @@ class UserClick(models.Model):
             user_agent = request.META.get("HTTP_USER_AGENT", "")
             referer = request.META.get("HTTP_REFERER")
 
+        from activity.services.encoding import get_referrer_encoder, get_user_agent_encoder
+
         # Create activity record
         activity = cls.objects.create(
             user=user,
@@ -129,57 +168,32 @@ class UserClick(models.Model):
             action=action,
             session_key=session_key,
             ip_address=ip_address,
-            user_agent=user_agent,
-            referer=referer,
+            user_agent_id=get_user_agent_encoder().encode(user_agent),
+            referer_id=get_referrer_encoder().encode(referer),
         )
 
-        # Update product metrics
+        # Update product metrics and unique-visitor sketches
         activity.update_product_metrics()
+        from activity.services.sketches import get_visitor_sketches
+
+        get_visitor_sketches().observe(
+            product.pk, product.seller_id, user.pk if user else None, session_key, activity.created_at
+        )
 
         return activity
 
     def update_product_metrics(self):
-        """Update ProductMetrics based on this activity"""
-        # Get or create product metrics
-        from decimal import Decimal
-
-        from marketplace.models import ProductMetrics
-
-        metrics, created = ProductMetrics.objects.get_or_create(
-            product=self.product,
-            defaults={
-                "total_views": 0,
-                "total_clicks": 0,
-                "total_favorites": 0,
-                "total_cart_additions": 0,
-                "total_sales": 0,
-                "total_revenue": Decimal("0.00"),
-            },
-        )
+        """
+        Update ProductMetrics based on this activity.
+
+        Increments are buffered and flushed as atomic grouped updates by the
+        product counter service, so concurrent events never lose counts.
+        """
+        from marketplace.catalog.domain.services.counters import get_product_counters
 
-        # Update counters based on action
-        if self.action in ["view", "detail_view", "listing_view", "search_view", "category_view", "image_view"]:
-            metrics.total_views += 1
-        elif self.action == "click":
-            metrics.total_clicks += 1
-        elif self.action == "favorite":
-            metrics.total_favorites += 1
-        elif self.action == "unfavorite":
-            # Decrease favorites count but don't go below 0
-            metrics.total_favorites = max(0, metrics.total_favorites - 1)
-        elif self.action == "cart_add":
-            # Cart additions count as both cart additions AND clicks (since adding to cart is a user interaction/click)
-            metrics.total_cart_additions += 1
-            metrics.total_clicks += 1
-        elif self.action == "cart_remove":
-            # We don't decrease cart additions as they represent total attempts
-            pass
-        elif self.action == "purchase":
-            # Purchase metrics are handled separately in the tracking utils
-            pass
-
-        # Save the updated metrics
-        metrics.save()
+        counters = get_product_counters()
+        for field, amount in self.METRIC_DELTAS.get(self.action, {}).items():
+            counters.increment_metrics(self.product_id, field, amount)
 
 
 class ActivitySummary(models.Model):
@@ -227,35 +241,96 @@ class ActivitySummary(models.Model):
 
     @classmethod
     def generate_daily_summary(cls, product, date):
-        """Generate daily activity summary for a product"""
-        from datetime import datetime, time
-
-        # Define the day period
-        start_time = datetime.combine(date, time.min)
-        end_time = datetime.combine(date, time.max)
-
-        # Get activities for this day
-        activities = UserClick.objects.filter(product=product, created_at__range=[start_time, end_time])
-
-        # Calculate aggregates
-        summary_data = {
-            "total_views": activities.filter(action="view").count(),
-            # Total clicks includes both 'click' actions and 'cart_add' actions (since cart addition is a click interaction)
-            "total_clicks": activities.filter(action__in=["click", "cart_add"]).count(),
-            "total_favorites": activities.filter(action="favorite").count(),
-            "total_unfavorites": activities.filter(action="unfavorite").count(),
-            "total_cart_additions": activities.filter(action="cart_add").count(),
-            "total_cart_removals": activities.filter(action="cart_remove").count(),
-            "unique_users": activities.filter(user__isnull=False).values("user").distinct().count(),
-            "unique_sessions": activities.filter(session_key__isnull=False).values("session_key").distinct().count(),
-        }
-
-        # Create or update summary
-        summary, created = cls.objects.update_or_create(
+        """
+        Generate daily activity summary for a product.
+
+        Nightly and hourly rollups of the whole catalog go through
+        activity.services.rollup.ActivitySummaryRollup, which summarizes every
+        product in one grouped query per day.
+        """
+        from activity.services.rollup import ActivitySummaryRollup
+
+        rollup = ActivitySummaryRollup()
+        rollup.rollup_day(date, product_ids=[product.pk])
+
+        # Products without activity that day still get an (empty) summary
+        start_time, end_time = rollup.day_bounds(date)
+        summary, created = cls.objects.get_or_create(
             product=product,
             period_type="daily",
             period_start=start_time,
-            defaults={"period_end": end_time, **summary_data},
+            defaults={"period_end": end_time - timedelta(microseconds=1)},
         )
 
         return summary
+
+
+class VisitorSketch(models.Model):
+    """
+    HyperLogLog sketches of the distinct users and sessions seen in one day.
+
+    Written by activity.services.sketches; unions of daily sketches give
+    weekly/monthly unique visitors without scanning UserClick.
+    """
+
+    day = models.DateField()
+    users = models.BinaryField(default=bytes)
+    sessions = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class ProductVisitorSketch(VisitorSketch):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="visitor_sketches")
+
+    class Meta:
+        unique_together = ["product", "day"]
+        indexes = [models.Index(fields=["day"])]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.day}"
+
+
+class SellerVisitorSketch(VisitorSketch):
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="visitor_sketches")
+
+    class Meta:
+        unique_together = ["seller", "day"]
+        indexes = [models.Index(fields=["day"])]
+
+    def __str__(self):
+        return f"{self.seller_id} - {self.day}"
+
+
+class ProductActivityRollup(models.Model):
+    """
+    Per-product, per-action event counts for one hour or one day.
+
+    Maintained by activity.services.analytics from UserClick; analytics
+    endpoints sum these rows instead of counting raw events.
+    """
+
+    GRANULARITY_CHOICES = [
+        ("hour", "Hour"),
+        ("day", "Day"),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="activity_rollups")
+    action = models.CharField(max_length=30, choices=UserClick.ACTION_CHOICES)
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["product", "granularity", "action", "period_start"]
+        indexes = [
+            models.Index(fields=["product", "granularity", "period_start"]),
+            models.Index(fields=["granularity", "period_start"]),
+        ]
+        ordering = ["-period_start"]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.action} - {self.granularity} {self.period_start}"
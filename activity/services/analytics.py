@@ -0,0 +1,255 @@
+"""
+ActivityAnalytics - windowed product activity counts from pre-aggregated rollups
+
+Product and seller analytics used to count raw UserClick rows at request
+time for every window ("last 7 days", "last 30 days"), so dashboards got
+slower as traffic grew. Counts now come from ProductActivityRollup:
+
+- ``hour`` rows: events per product, action and UTC hour, recomputed from
+  UserClick by one grouped query over the last ACTIVITY_HOURLY_LOOKBACK_HOURS
+  hours. Events drained after that (they keep their original time) have
+  their hours and day rows recomputed by the drainer that wrote them, up to
+  ACTIVITY_ROLLUP_LATE_HOURS back; no marker has to reach the periodic task
+- ``day`` rows: the hour rows of one local day summed per product and
+  action; today's row is refreshed on every run, and yesterday's during the
+  first ACTIVITY_ROLLUP_GRACE_HOURS after midnight
+
+Existing history is backfilled by migration activity 0009. Both are
+idempotent upserts, run every few minutes by
+``rollup_product_activity_task``. A window is answered by one grouped SUM
+over day rows for the whole days it covers plus hour rows for the partial
+days at either end, so a 30-day window reads roughly 30 + 48 rows per
+product and action whatever the traffic.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from activity.models import ProductActivityRollup, UserClick
+from activity.services.rollup import ActivitySummaryRollup
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityAnalytics:
+    """
+    Maintains ProductActivityRollup and answers windowed activity counts from it.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+
+    UPDATE_FIELDS = ["count", "updated_at"]
+
+    # Analytics totals -> actions counted; views and clicks follow UserClick.METRIC_DELTAS
+    TOTALS = {
+        "views": [a for a, deltas in UserClick.METRIC_DELTAS.items() if "total_views" in deltas],
+        "clicks": [a for a, deltas in UserClick.METRIC_DELTAS.items() if "total_clicks" in deltas],
+        "favorites": ["favorite"],
+        "cart_additions": ["cart_add"],
+        "purchases": ["purchase"],
+    }
+
+    @staticmethod
+    def floor_hour(moment: datetime) -> datetime:
+        return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    @property
+    def lookback(self) -> timedelta:
+        return timedelta(hours=getattr(settings, "ACTIVITY_HOURLY_LOOKBACK_HOURS", 2))
+
+    @property
+    def late_horizon(self) -> timedelta:
+        return timedelta(hours=getattr(settings, "ACTIVITY_ROLLUP_LATE_HOURS", 168))
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def rollup_hours(self, start: datetime, end: datetime) -> int:
+        """
+        Recompute the hour rows of every hour touching [start, end) from UserClick.
+
+        Returns:
+            Number of rows written
+        """
+        start, end = self.floor_hour(start), self.floor_hour(end) + timedelta(hours=1)
+        rows = (
+            UserClick.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by()
+            .annotate(hour=TruncHour("created_at", tzinfo=dt_timezone.utc))
+            .values("product_id", "action", "hour")
+            .annotate(n=Count("id"))
+        )
+        rollups = [
+            ProductActivityRollup(
+                product_id=row["product_id"],
+                action=row["action"],
+                granularity=self.HOUR,
+                period_start=row["hour"],
+                count=row["n"],
+            )
+            for row in rows
+        ]
+        self._upsert(rollups)
+        logger.debug(f"Hourly activity rollup {start:%Y-%m-%d %H:00} to {end:%Y-%m-%d %H:00}: {len(rollups)} rows")
+        return len(rollups)
+
+    def rollup_day(self, day: date) -> int:
+        """
+        Sum one local day's hour rows into day rows.
+
+        Returns:
+            Number of rows written
+        """
+        start, end = ActivitySummaryRollup.day_bounds(day)
+        rows = (
+            ProductActivityRollup.objects.filter(granularity=self.HOUR, period_start__gte=start, period_start__lt=end)
+            .order_by()
+            .values("product_id", "action")
+            .annotate(n=Sum("count"))
+        )
+        rollups = [
+            ProductActivityRollup(
+                product_id=row["product_id"],
+                action=row["action"],
+                granularity=self.DAY,
+                period_start=start,
+                count=row["n"],
+            )
+            for row in rows
+        ]
+        self._upsert(rollups)
+        logger.debug(f"Daily activity rollup for {day}: {len(rollups)} rows")
+        return len(rollups)
+
+    def catch_up(self, now: Optional[datetime] = None) -> int:
+        """
+        Refresh the recent hour rows and the affected day rows.
+
+        Today's day rows are always refreshed and yesterday's shortly after
+        midnight. Hours older than the lookback are refreshed by refresh_late.
+
+        Returns:
+            Number of rows written
+        """
+        now = timezone.localtime(now or timezone.now())
+        grace = timedelta(hours=getattr(settings, "ACTIVITY_ROLLUP_GRACE_HOURS", 2))
+        today = now.date()
+
+        written = self.rollup_hours(now - self.lookback, now)
+        days = {today}
+        if now - ActivitySummaryRollup.day_bounds(today)[0] < grace:
+            days.add(today - timedelta(days=1))
+        for day in sorted(days):
+            written += self.rollup_day(day)
+        return written
+
+    def refresh_late(self, moments: Iterable[datetime], now: Optional[datetime] = None) -> int:
+        """
+        Recompute the hours of events written too late for the lookback, and their day rows.
+
+        Called by whoever wrote the events once they are committed. Hours the
+        next catch_up still covers, or older than ACTIVITY_ROLLUP_LATE_HOURS,
+        are left alone.
+
+        Returns:
+            Number of rows written
+        """
+        now = now or timezone.now()
+        cutoff = self.floor_hour(now - self.lookback) + timedelta(hours=1)
+        horizon = self.floor_hour(now - self.late_horizon)
+        hours = sorted(hour for hour in {self.floor_hour(moment) for moment in moments} if horizon <= hour < cutoff)
+        written = 0
+        for hour in hours:
+            written += self.rollup_hours(hour, hour)
+        for day in sorted({timezone.localtime(hour).date() for hour in hours}):
+            written += self.rollup_day(day)
+        return written
+
+    def rebuild_day(self, day: date) -> int:
+        """Recompute every hour row of a local day from UserClick, then its day rows."""
+        start, end = ActivitySummaryRollup.day_bounds(day)
+        return self.rollup_hours(start, end - timedelta(microseconds=1)) + self.rollup_day(day)
+
+    @classmethod
+    def _upsert(cls, rollups) -> None:
+        if not rollups:
+            return
+        upsert = {"update_conflicts": True, "update_fields": cls.UPDATE_FIELDS}
+        if connection.features.supports_update_conflicts_with_target:
+            upsert["unique_fields"] = ["product", "granularity", "action", "period_start"]
+        ProductActivityRollup.objects.bulk_create(rollups, batch_size=1000, **upsert)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def window_filter(self, start: datetime, end: datetime) -> Q:
+        """Rollup rows covering [start, end): day rows for whole local days, hour rows for the rest."""
+        start = self.floor_hour(start)
+        first_midnight = ActivitySummaryRollup.day_bounds(timezone.localtime(start).date())[0]
+        if first_midnight < start:
+            first_midnight += timedelta(days=1)
+        last_midnight = ActivitySummaryRollup.day_bounds(timezone.localtime(end).date())[0]
+
+        if first_midnight >= last_midnight:
+            return Q(granularity=self.HOUR, period_start__gte=start, period_start__lt=end)
+        return (
+            Q(granularity=self.DAY, period_start__gte=first_midnight, period_start__lt=last_midnight)
+            | Q(granularity=self.HOUR, period_start__gte=start, period_start__lt=first_midnight)
+            | Q(granularity=self.HOUR, period_start__gte=last_midnight, period_start__lt=end)
+        )
+
+    def action_counts(
+        self,
+        start: datetime,
+        end: datetime,
+        product_ids: Optional[Iterable] = None,
+        seller_id=None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Count events per product and action in [start, end) with one grouped query.
+
+        Windows are resolved to whole hours: start is rounded down to its hour
+        and the hour containing end is counted in full.
+
+        Args:
+            start, end: Window bounds
+            product_ids: Restrict to these products
+            seller_id: Restrict to this seller's products
+
+        Returns:
+            {product_id: {action: count}} for products with activity in the window
+        """
+        rows = ProductActivityRollup.objects.filter(self.window_filter(start, end))
+        if product_ids is not None:
+            rows = rows.filter(product_id__in=list(product_ids))
+        if seller_id is not None:
+            rows = rows.filter(product__seller_id=seller_id)
+
+        counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for row in rows.order_by().values("product_id", "action").annotate(n=Sum("count")):
+            counts[str(row["product_id"])][row["action"]] = row["n"]
+        return dict(counts)
+
+    def totals(self, action_counts: Dict[str, int]) -> Dict[str, int]:
+        """Collapse {action: count} into views/clicks/favorites/cart_additions/purchases."""
+        return {name: sum(action_counts.get(action, 0) for action in actions) for name, actions in self.TOTALS.items()}
+
+    def seller_totals(self, seller_id, start: datetime, end: datetime) -> Dict[str, int]:
+        """Windowed totals across every product of a seller."""
+        merged: Dict[str, int] = defaultdict(int)
+        for per_action in self.action_counts(start, end, seller_id=seller_id).values():
+            for action, n in per_action.items():
+                merged[action] += n
+        return self.totals(merged)
@@ -0,0 +1,193 @@
+"""
+ActivityDeduplicator - drops double-fired view events without a database read
+
+UserClick.track_activity used to run a one-second lookback ``exists()`` query
+against UserClick before every insert, just to catch views fired twice by
+React StrictMode, double clicks or immediate refreshes. That is one indexed
+read on the largest table for every tracked event.
+
+The decision is now answered by a TTL set keyed on (action, actor, product,
+event-time bucket). The bucket is the event's own timestamp divided by
+ACTIVITY_DEDUP_WINDOW_SECONDS, so two events are duplicates only if they
+happened within the same window - not merely if they are processed
+together, as when the ingestion drain picks up a spool segment holding
+views seconds apart. A repeat straddling a bucket boundary is let through.
+
+The store only has to remember keys while their bucket can still arrive:
+
+- ``memory`` (default): two rotating per-process generations of
+  ACTIVITY_DEDUP_WINDOW_SECONDS each. Each generation holds at most
+  ACTIVITY_DEDUP_MAX_KEYS keys; beyond that events are let through rather
+  than growing memory.
+- ``redis``: ``SET NX PX`` on a shared key (ACTIVITY_DEDUP_REDIS_URL), so
+  duplicates are caught across workers.
+
+The synchronous UserClick.track_activity path and the batched
+ActivityIngestion drain share the deduplicator, so a repeat is dropped
+whichever path, batch or process it arrives through.
+
+Lookups are counted in ``marketplace_activity_dedup_lookups_total`` by
+result (hit = duplicate dropped, miss = new event, error = store
+unavailable, event let through).
+"""
+
+import logging
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from marketplace.infra.observability.metrics import activity_dedup_lookups_total
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryDedupStore:
+    """Two rotating generations of seen keys."""
+
+    def __init__(self, window: float, max_keys: int = 100000):
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._generation = None
+        self._current = set()
+        self._previous = set()
+
+    def add_new(self, keys: Sequence[str]) -> List[bool]:
+        """Record keys; returns True for each key not seen within the window."""
+        generation = int(time.monotonic() // self.window)
+        with self._lock:
+            if generation != self._generation:
+                self._previous = self._current if self._generation == generation - 1 else set()
+                self._current = set()
+                self._generation = generation
+            results = []
+            for key in keys:
+                if key in self._current or key in self._previous:
+                    results.append(False)
+                    continue
+                if len(self._current) < self.max_keys:
+                    self._current.add(key)
+                results.append(True)
+            return results
+
+
+class RedisDedupStore:
+    """Seen keys shared by every process, expiring after the window."""
+
+    PREFIX = "activity:dedup:"
+
+    def __init__(self, url: str, window: float):
+        import redis
+
+        self.client = redis.from_url(url)
+        self.window_ms = max(int(window * 1000), 1)
+
+    def add_new(self, keys: Sequence[str]) -> List[bool]:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(f"{self.PREFIX}{key}", 1, nx=True, px=self.window_ms)
+        return [bool(created) for created in pipe.execute()]
+
+
+class ActivityDeduplicator:
+    """
+    Answers "was this exact event already tracked a moment ago?".
+    """
+
+    def __init__(self, store=None, window: Optional[float] = None):
+        if window is None:
+            window = getattr(settings, "ACTIVITY_DEDUP_WINDOW_SECONDS", 1)
+        self.window = window
+        if store is None:
+            if getattr(settings, "ACTIVITY_DEDUP_BACKEND", "memory") == "redis":
+                store = RedisDedupStore(
+                    getattr(settings, "ACTIVITY_DEDUP_REDIS_URL", "redis://localhost:6379/3"),
+                    window,
+                )
+            else:
+                store = MemoryDedupStore(window, getattr(settings, "ACTIVITY_DEDUP_MAX_KEYS", 100000))
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def filter_new(self, actor, action: str, product_ids: Iterable, ts: Optional[float] = None) -> list:
+        """
+        Record events and return the product ids that are not duplicates.
+
+        Args:
+            actor: User id or session key
+            action: UserClick action
+            product_ids: Products the action applies to
+            ts: Event time (epoch seconds), now if omitted
+
+        Returns:
+            product_ids minus those seen for this actor and action within the same window
+        """
+        product_ids = list(product_ids)
+        new = self.are_new([(actor, action, product_id, ts) for product_id in product_ids])
+        return [product_id for product_id, is_new in zip(product_ids, new) if is_new]
+
+    def are_new(self, events: Sequence[Tuple]) -> List[bool]:
+        """
+        Record a batch of (actor, action, product_id[, ts]) events in one store round trip.
+
+        ``ts`` is the event time in epoch seconds; events without one are
+        taken to happen now.
+
+        Returns:
+            One flag per event: True if it is not a duplicate. A repeat within
+            the batch itself is a duplicate of its first occurrence only if
+            both fall in the same window.
+        """
+        if not events:
+            return []
+        now = time.time()
+        keys = []
+        for actor, action, product_id, *rest in events:
+            ts = rest[0] if rest and rest[0] is not None else now
+            keys.append(f"{action}|{actor}|{product_id}|{int(ts // self.window)}")
+        try:
+            new = self.store.add_new(keys)
+        except Exception as e:
+            # Dedup is best effort: never lose an event because the store is down
+            logger.warning(f"Activity dedup store unavailable: {e}")
+            activity_dedup_lookups_total.labels(result="error").inc(len(keys))
+            return [True] * len(keys)
+
+        misses = sum(new)
+        hits = len(new) - misses
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+        if hits:
+            activity_dedup_lookups_total.labels(result="hit").inc(hits)
+        if misses:
+            activity_dedup_lookups_total.labels(result="miss").inc(misses)
+        return new
+
+    def is_duplicate(self, actor, action: str, product_id, ts: Optional[float] = None) -> bool:
+        return not self.filter_new(actor, action, [product_id], ts)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def get_activity_deduplicator() -> ActivityDeduplicator:
+    """Return the process-wide ActivityDeduplicator instance."""
+    global _deduplicator
+    if _deduplicator is None:
+        with _deduplicator_lock:
+            if _deduplicator is None:
+                _deduplicator = ActivityDeduplicator()
+    return _deduplicator
@@ -0,0 +1,121 @@
+"""
+DictionaryEncoder - maps user agent / referer strings to lookup table ids
+
+Every UserClick row used to repeat the full User-Agent and Referer text,
+although a busy day only sees a few thousand distinct values of each. The
+strings now live once in the UserAgent and Referrer tables, keyed by the
+SHA-256 of the value, and UserClick stores their ids.
+
+Resolving a value goes through a per-process LRU of value -> id
+(ACTIVITY_LOOKUP_CACHE_SIZE entries per table). Misses are resolved for a
+whole batch at once: one ``value_hash__in`` read, a ``bulk_create`` with
+``ignore_conflicts`` for values never seen before (so concurrent writers
+racing on a new value both succeed), and a re-read of the created hashes.
+
+Ids are only cached once the surrounding transaction commits, so a rolled
+back insert never leaves a dangling id in the cache.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from activity.models import Referrer, UserAgent
+
+
+logger = logging.getLogger(__name__)
+
+
+class DictionaryEncoder:
+    """
+    Resolves strings to ids in a RequestMetadataValue table.
+    """
+
+    def __init__(self, model, max_size: Optional[int] = None):
+        self.model = model
+        self.max_size = max_size if max_size is not None else getattr(settings, "ACTIVITY_LOOKUP_CACHE_SIZE", 10000)
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, value: Optional[str]) -> Optional[int]:
+        """Return the id for value, creating its row if needed (None for empty values)."""
+        if not value:
+            return None
+        return self.encode_many([value])[value]
+
+    def encode_many(self, values: Iterable[Optional[str]]) -> Dict[str, int]:
+        """
+        Resolve many values at once.
+
+        Returns:
+            {value: id} for every non-empty value
+        """
+        ids: Dict[str, int] = {}
+        missing = set()
+        with self._lock:
+            for value in values:
+                if not value or value in ids:
+                    continue
+                cached = self._cache.get(value)
+                if cached is None:
+                    missing.add(value)
+                else:
+                    self._cache.move_to_end(value)
+                    ids[value] = cached
+        if not missing:
+            return ids
+
+        hashes = {self.model.hash_value(value): value for value in missing}
+        found = dict(self.model.objects.filter(value_hash__in=hashes).values_list("value_hash", "id"))
+        new = [self.model(value=value, value_hash=h) for h, value in hashes.items() if h not in found]
+        if new:
+            self.model.objects.bulk_create(new, ignore_conflicts=True)
+            found.update(
+                self.model.objects.filter(value_hash__in=[row.value_hash for row in new]).values_list(
+                    "value_hash", "id"
+                )
+            )
+            logger.debug(f"Added {len(new)} {self.model.__name__} lookup values")
+
+        resolved = {hashes[h]: pk for h, pk in found.items()}
+        ids.update(resolved)
+        transaction.on_commit(lambda: self._remember(resolved))
+        return ids
+
+    def _remember(self, resolved: Dict[str, int]) -> None:
+        with self._lock:
+            for value, pk in resolved.items():
+                self._cache[value] = pk
+                self._cache.move_to_end(value)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_encoders: Dict[type, DictionaryEncoder] = {}
+_encoders_lock = threading.Lock()
+
+
+def _get_encoder(model) -> DictionaryEncoder:
+    encoder = _encoders.get(model)
+    if encoder is None:
+        with _encoders_lock:
+            encoder = _encoders.setdefault(model, DictionaryEncoder(model))
+    return encoder
+
+
+def get_user_agent_encoder() -> DictionaryEncoder:
+    """Return the process-wide UserAgent encoder."""
+    return _get_encoder(UserAgent)
+
+
+def get_referrer_encoder() -> DictionaryEncoder:
+    """Return the process-wide Referrer encoder."""
+    return _get_encoder(Referrer)
@@ -0,0 +1,83 @@
+"""
+HyperLogLog - mergeable distinct-count sketch
+
+A sketch of precision p keeps m = 2**p one-byte registers. Each value is
+hashed to 64 bits; the first p bits pick a register and the register keeps
+the longest run of leading zeros (+1) seen in the remaining bits. The
+estimate has a relative standard error of about 1.04 / sqrt(m):
+
+    p = 12 (default): m = 4096 registers, ~1.6% standard error
+                      (~3.3% at two standard deviations)
+
+Below 2.5 * m distinct values the estimate switches to linear counting over
+empty registers, which is close to exact for the small counts most products
+see in a day. Sketches of the same precision merge losslessly (register-wise
+max), so the union of daily sketches gives the weekly/monthly distinct count
+with the same error bound as a sketch built from the raw values.
+
+Serialized form: one precision byte followed by the zlib-compressed
+registers, so sparse sketches take a few dozen bytes.
+"""
+
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+
+class HyperLogLog:
+    """Distinct-count sketch over string values."""
+
+    DEFAULT_PRECISION = 12
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 16, got {precision}")
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.m)
+        elif len(registers) != self.m:
+            raise ValueError(f"Expected {self.m} registers, got {len(registers)}")
+        else:
+            self.registers = bytearray(registers)
+
+    def add(self, value) -> None:
+        h = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+        index = h >> (64 - self.precision)
+        rest_bits = 64 - self.precision
+        rest = h & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Union other into this sketch."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        zeros = self.registers.count(0)
+        if zeros == self.m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0**-r for r in self.registers)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        """Load a serialized sketch; empty data gives an empty default-precision sketch."""
+        if not data:
+            return cls()
+        data = bytes(data)
+        return cls(data[0], zlib.decompress(data[1:]))
@@ -0,0 +1,185 @@
+"""
+ActivityRetention - archive and expire raw UserClick events
+
+UserClick kept every event, including IP, user agent and referrer, forever,
+so the table and its composite indexes grew without bound. Raw events older
+than ACTIVITY_RETENTION_DAYS are now moved to object storage (S3, or MinIO
+locally, through the infrastructure storage adapter) one day at a time:
+
+1. the day is rolled up into ActivitySummary and the product activity
+   rollups first, so dashboards and analytics keep it
+2. its rows are streamed, in id order, into gzip-compressed JSON-lines
+   parts of at most ACTIVITY_ARCHIVE_PART_ROWS rows under
+   ``{ACTIVITY_ARCHIVE_PREFIX}/YYYY/MM/DD/{first_id}-{last_id}.jsonl.gz``
+3. only the archived ids are deleted, in small batches, so events that
+   arrive late for that day are kept for the next run
+
+Parts are named by the id range they hold, so re-running an interrupted
+day never overwrites a part whose rows were already deleted; at worst a row
+appears in two parts and can be deduplicated by id. The archives hold every
+UserClick column, with the user agent and referer decoded to text, and can
+be reloaded with ``UserClick.objects.bulk_create`` (re-encoding the headers
+through activity.services.encoding) or queried in place by S3 tooling.
+
+The table is not range-partitioned: MySQL does not allow partitioning a
+table with foreign keys, and UserClick references both Product and User.
+Purging whole days by primary key keeps the hot table and its indexes
+bounded to the retention window instead.
+"""
+
+import gzip
+import json
+import logging
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from activity.models import UserClick
+from activity.services.analytics import ActivityAnalytics
+from activity.services.rollup import ActivitySummaryRollup
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityRetention:
+    """
+    Moves expired UserClick rows into compressed day archives.
+    """
+
+    # Archive record key -> UserClick lookup; header values are archived as text
+    FIELDS = {
+        "id": "id",
+        "created_at": "created_at",
+        "product_id": "product_id",
+        "user_id": "user_id",
+        "action": "action",
+        "session_key": "session_key",
+        "ip_address": "ip_address",
+        "user_agent": "user_agent__value",
+        "referer": "referer__value",
+    }
+
+    DELETE_BATCH_SIZE = 5000
+
+    def __init__(self, storage=None):
+        if storage is None:
+            from infrastructure.container import container
+
+            storage = container.storage()
+        self.storage = storage
+        self.rollup = ActivitySummaryRollup()
+
+    @property
+    def retention_days(self) -> int:
+        return getattr(settings, "ACTIVITY_RETENTION_DAYS", 90)
+
+    @property
+    def part_rows(self) -> int:
+        return getattr(settings, "ACTIVITY_ARCHIVE_PART_ROWS", 100000)
+
+    @property
+    def prefix(self) -> str:
+        return getattr(settings, "ACTIVITY_ARCHIVE_PREFIX", "activity-archive/userclick").rstrip("/")
+
+    def part_key(self, day: date, first_id: int, last_id: int) -> str:
+        return f"{self.prefix}/{day:%Y/%m/%d}/{first_id:012d}-{last_id:012d}.jsonl.gz"
+
+    # ------------------------------------------------------------------
+    # Retention job
+    # ------------------------------------------------------------------
+
+    def run(self, now: Optional[datetime] = None, max_days: Optional[int] = None) -> dict:
+        """
+        Archive and delete every expired day, oldest first.
+
+        Args:
+            now: Reference time (defaults to now)
+            max_days: Stop after this many days (ACTIVITY_ARCHIVE_MAX_DAYS_PER_RUN)
+
+        Returns:
+            {"days": ..., "archived": ..., "parts": ...}
+        """
+        now = now or timezone.now()
+        if max_days is None:
+            max_days = getattr(settings, "ACTIVITY_ARCHIVE_MAX_DAYS_PER_RUN", 7)
+        cutoff_day = timezone.localtime(now).date() - timedelta(days=self.retention_days)
+        cutoff, _ = self.rollup.day_bounds(cutoff_day)
+
+        totals = {"days": 0, "archived": 0, "parts": 0}
+        while totals["days"] < max_days:
+            oldest = (
+                UserClick.objects.filter(created_at__lt=cutoff)
+                .order_by("created_at")
+                .values_list("created_at", flat=True)
+                .first()
+            )
+            if oldest is None:
+                break
+            result = self.archive_day(timezone.localtime(oldest).date())
+            totals["days"] += 1
+            totals["archived"] += result["archived"]
+            totals["parts"] += result["parts"]
+        return totals
+
+    def archive_day(self, day: date) -> dict:
+        """
+        Summarize, archive and delete one day of raw events.
+
+        Returns:
+            {"archived": rows moved to storage, "parts": files written}
+        """
+        self.rollup.rollup_day(day)
+        ActivityAnalytics().rebuild_day(day)
+
+        start, end = self.rollup.day_bounds(day)
+        rows = (
+            UserClick.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by("pk")
+            .values_list(*self.FIELDS.values())
+            .iterator(chunk_size=2000)
+        )
+
+        archived_ids: List[int] = []
+        parts = 0
+        buffer = None
+        writer = None
+        in_part = 0
+        for row in rows:
+            if writer is None:
+                buffer = tempfile.TemporaryFile()
+                writer = gzip.GzipFile(fileobj=buffer, mode="wb")
+            record = dict(zip(self.FIELDS, row))
+            record["created_at"] = record["created_at"].isoformat()
+            for key in ("product_id", "user_id"):
+                if record[key] is not None:
+                    record[key] = str(record[key])
+            writer.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            archived_ids.append(record["id"])
+            in_part += 1
+            if in_part >= self.part_rows:
+                self._upload(self.part_key(day, archived_ids[-in_part], archived_ids[-1]), buffer, writer)
+                parts += 1
+                buffer = writer = None
+                in_part = 0
+        if writer is not None:
+            self._upload(self.part_key(day, archived_ids[-in_part], archived_ids[-1]), buffer, writer)
+            parts += 1
+
+        # Everything is in storage; drop exactly the rows that were archived
+        for i in range(0, len(archived_ids), self.DELETE_BATCH_SIZE):
+            UserClick.objects.filter(pk__in=archived_ids[i : i + self.DELETE_BATCH_SIZE]).delete()
+
+        logger.info(f"Archived {len(archived_ids)} activity events for {day} in {parts} parts")
+        return {"archived": len(archived_ids), "parts": parts}
+
+    def _upload(self, key: str, buffer, writer) -> None:
+        writer.close()
+        buffer.seek(0)
+        try:
+            self.storage.upload(buffer, key, "application/gzip", make_public=False)
+        finally:
+            buffer.close()
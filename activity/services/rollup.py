@@ -0,0 +1,196 @@
+"""
+ActivitySummaryRollup - single-pass daily activity summaries
+
+``ActivitySummary.generate_daily_summary`` ran eight ``count()`` queries per
+product per day, so a nightly rollup over the catalog cost millions of
+queries. The rollup now computes every product's daily counters in one
+grouped conditional-aggregation query per day and upserts the summaries
+with a single bulk INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE.
+
+``catch_up`` re-rolls the current (partial) day, and the previous day
+during the first ACTIVITY_ROLLUP_GRACE_HOURS after midnight so events
+drained late from the activity buffer are still counted. It runs hourly,
+so dashboards are never more than an hour stale.
+
+Weekly and monthly summaries sum the daily summaries; their unique users
+and sessions come from unions of the daily HyperLogLog visitor sketches
+(activity.services.sketches) rather than a COUNT(DISTINCT) over raw events,
+so they stay available after the raw events are archived. ``catch_up``
+refreshes the week and month containing yesterday once the day is closed.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from activity.models import ActivitySummary, UserClick
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActivitySummaryRollup:
+    """
+    Rolls UserClick rows up into daily ActivitySummary rows.
+    """
+
+    PERIOD = "daily"
+    PERIODS = ("weekly", "monthly")
+
+    # ActivitySummary counter -> actions counted; views and clicks follow UserClick.METRIC_DELTAS
+    COUNTERS = {
+        "total_views": [a for a, deltas in UserClick.METRIC_DELTAS.items() if "total_views" in deltas],
+        "total_clicks": [a for a, deltas in UserClick.METRIC_DELTAS.items() if "total_clicks" in deltas],
+        "total_favorites": ["favorite"],
+        "total_unfavorites": ["unfavorite"],
+        "total_cart_additions": ["cart_add"],
+        "total_cart_removals": ["cart_remove"],
+    }
+
+    UPDATE_FIELDS = [*COUNTERS, "unique_users", "unique_sessions", "period_end", "updated_at"]
+
+    @staticmethod
+    def day_bounds(day: date):
+        """Return the [start, end) datetimes of a day in the current time zone."""
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def period_days(period_type: str, day: date):
+        """Return the first and last day of the week (Monday-Sunday) or month containing day."""
+        if period_type == "weekly":
+            first = day - timedelta(days=day.weekday())
+            return first, first + timedelta(days=6)
+        if period_type == "monthly":
+            first = day.replace(day=1)
+            next_month = (first + timedelta(days=32)).replace(day=1)
+            return first, next_month - timedelta(days=1)
+        raise ValueError(f"Unknown summary period: {period_type}")
+
+    def aggregate_day(self, day: date, product_ids: Optional[Iterable] = None) -> Dict[str, dict]:
+        """
+        Compute every product's counters for one day in a single grouped query.
+
+        Returns:
+            {product_id: {counter: value}} for products with activity that day
+        """
+        start, end = self.day_bounds(day)
+        clicks = UserClick.objects.filter(created_at__gte=start, created_at__lt=end)
+        if product_ids is not None:
+            clicks = clicks.filter(product_id__in=product_ids)
+        rows = (
+            clicks.order_by()
+            .values("product_id")
+            .annotate(
+                **{field: Count("id", filter=Q(action__in=actions)) for field, actions in self.COUNTERS.items()},
+                unique_users=Count("user_id", distinct=True),
+                unique_sessions=Count("session_key", distinct=True),
+            )
+        )
+        return {row.pop("product_id"): row for row in rows}
+
+    def rollup_day(self, day: date, product_ids: Optional[Iterable] = None) -> int:
+        """
+        Upsert the daily summaries of one day.
+
+        Returns:
+            Number of summaries written
+        """
+        start, end = self.day_bounds(day)
+        counters = self.aggregate_day(day, product_ids)
+        summaries = [
+            ActivitySummary(
+                product_id=product_id,
+                period_type=self.PERIOD,
+                period_start=start,
+                period_end=end - timedelta(microseconds=1),
+                **values,
+            )
+            for product_id, values in counters.items()
+        ]
+        self._upsert(summaries)
+        logger.info(f"Activity rollup for {day}: {len(summaries)} products")
+        return len(summaries)
+
+    def rollup_period(self, period_type: str, day: date) -> int:
+        """
+        Upsert the weekly or monthly summaries of the period containing day.
+
+        Counters are summed from the daily summaries; unique users and
+        sessions are estimated from unions of the daily visitor sketches.
+
+        Returns:
+            Number of summaries written
+        """
+        from activity.services.sketches import get_visitor_sketches
+
+        first_day, last_day = self.period_days(period_type, day)
+        start, end = self.day_bounds(first_day)[0], self.day_bounds(last_day)[1]
+        totals = (
+            ActivitySummary.objects.filter(period_type=self.PERIOD, period_start__gte=start, period_start__lt=end)
+            .order_by()
+            .values("product_id")
+            .annotate(**{field: Sum(field) for field in self.COUNTERS})
+        )
+
+        sketches = get_visitor_sketches()
+        sketches.flush()
+        uniques = sketches.unique_visitors(first_day, last_day)
+        empty = {"unique_users": 0, "unique_sessions": 0}
+        summaries = [
+            ActivitySummary(
+                product_id=row["product_id"],
+                period_type=period_type,
+                period_start=start,
+                period_end=end - timedelta(microseconds=1),
+                **{field: row[field] for field in self.COUNTERS},
+                **uniques.get(str(row["product_id"]), empty),
+            )
+            for row in totals
+        ]
+        self._upsert(summaries)
+        logger.info(f"Activity {period_type} rollup for {first_day}: {len(summaries)} products")
+        return len(summaries)
+
+    @staticmethod
+    def _upsert(summaries) -> None:
+        if not summaries:
+            return
+        upsert = {"update_conflicts": True, "update_fields": ActivitySummaryRollup.UPDATE_FIELDS}
+        if connection.features.supports_update_conflicts_with_target:
+            upsert["unique_fields"] = ["product", "period_type", "period_start"]
+        ActivitySummary.objects.bulk_create(summaries, batch_size=1000, **upsert)
+
+    def rollup_range(self, first_day: date, last_day: date) -> int:
+        """Roll up every day from first_day to last_day inclusive, one query per day."""
+        written = 0
+        day = first_day
+        while day <= last_day:
+            written += self.rollup_day(day)
+            day += timedelta(days=1)
+        return written
+
+    def catch_up(self, now: Optional[datetime] = None) -> int:
+        """
+        Refresh today's partial summaries (and yesterday's, with its week and month, shortly after midnight).
+
+        Returns:
+            Number of summaries written
+        """
+        now = timezone.localtime(now or timezone.now())
+        today = now.date()
+        grace = timedelta(hours=getattr(settings, "ACTIVITY_ROLLUP_GRACE_HOURS", 2))
+        if now - self.day_bounds(today)[0] >= grace:
+            return self.rollup_range(today, today)
+
+        # Yesterday is closed: settle it, then the week and month it belongs to
+        yesterday = today - timedelta(days=1)
+        written = self.rollup_range(yesterday, today)
+        for period_type in self.PERIODS:
+            written += self.rollup_period(period_type, yesterday)
+        return written
@@ -0,0 +1,247 @@
+"""
+VisitorSketches - HyperLogLog unique-visitor counts per product/seller and day
+
+Unique users and sessions used to need ``COUNT(DISTINCT ...)`` over raw
+UserClick rows, which only gets slower as the table grows and is impossible
+for days the retention job has already archived. Every tracked event now
+also feeds two HyperLogLog sketches (users, sessions) for its product and
+for the product's seller, per local day:
+
+- events are added to per-process sketches keyed by (product|seller, id, day)
+- ``flush`` merges them into ProductVisitorSketch / SellerVisitorSketch:
+  missing rows are created with an ignore-conflicts insert, the rows are
+  locked with ``SELECT ... FOR UPDATE`` and written back with one
+  ``bulk_update``, so concurrent flushes from several processes never lose
+  registers
+- pending sketches are flushed inline once older than
+  ACTIVITY_SKETCH_FLUSH_INTERVAL seconds or when ACTIVITY_SKETCH_MAX_PENDING
+  keys are buffered, after every ingestion drain, and at exit. An interval
+  of 0 writes through on every event.
+
+Unique counts for any date range are unions of the daily sketches; see
+activity.services.hll for the error bounds (~1.6% standard error, close
+to exact below ~10k distinct visitors).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from activity.models import ProductVisitorSketch, SellerVisitorSketch
+from activity.services.hll import HyperLogLog
+
+
+logger = logging.getLogger(__name__)
+
+SketchKey = Tuple[str, str, date]  # (scope, owner_id, day)
+
+
+class VisitorSketches:
+    """
+    Buffers unique-visitor sketches and merges them into the database.
+    """
+
+    PRODUCT = "product"
+    SELLER = "seller"
+
+    MODELS = {
+        PRODUCT: (ProductVisitorSketch, "product_id"),
+        SELLER: (SellerVisitorSketch, "seller_id"),
+    }
+
+    def __init__(self):
+        self._pending: Dict[SketchKey, Dict[str, HyperLogLog]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @property
+    def flush_interval(self) -> float:
+        return getattr(settings, "ACTIVITY_SKETCH_FLUSH_INTERVAL", 60)
+
+    @property
+    def max_pending(self) -> int:
+        return getattr(settings, "ACTIVITY_SKETCH_MAX_PENDING", 5000)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def observe(self, product_id, seller_id=None, user_id=None, session_key=None, when=None) -> None:
+        """
+        Record one visitor of a product.
+
+        Args:
+            product_id: Product primary key
+            seller_id: The product's seller, if known
+            user_id: Authenticated user id, if any
+            session_key: Session key, if any
+            when: Event time (defaults to now)
+        """
+        self.observe_many([(product_id, seller_id, user_id, session_key, when)])
+
+    def observe_many(self, visits: Iterable[tuple]) -> None:
+        """Record (product_id, seller_id, user_id, session_key, when) visits, checking for a flush once."""
+        with self._lock:
+            for product_id, seller_id, user_id, session_key, when in visits:
+                if not user_id and not session_key:
+                    continue
+                day = timezone.localtime(when or timezone.now()).date()
+                for scope, owner_id in ((self.PRODUCT, product_id), (self.SELLER, seller_id)):
+                    if owner_id is None:
+                        continue
+                    sketches = self._pending.get((scope, str(owner_id), day))
+                    if sketches is None:
+                        sketches = self._pending[(scope, str(owner_id), day)] = {
+                            "users": HyperLogLog(),
+                            "sessions": HyperLogLog(),
+                        }
+                    if user_id:
+                        sketches["users"].add(user_id)
+                    if session_key:
+                        sketches["sessions"].add(session_key)
+            pending = len(self._pending)
+
+        if pending and (pending >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # The sketches stay buffered; the request that triggered the flush must not fail
+                logger.error(f"Error flushing visitor sketches: {e}", exc_info=True)
+
+    def flush(self) -> int:
+        """
+        Merge all buffered sketches into the database.
+
+        Returns:
+            Number of sketch rows updated
+        """
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                for scope, (model, owner_field) in self.MODELS.items():
+                    entries = {
+                        (owner_id, day): s for (s_scope, owner_id, day), s in pending.items() if s_scope == scope
+                    }
+                    if entries:
+                        self._merge(model, owner_field, entries)
+            except Exception:
+                # Keep the sketches for the next flush rather than dropping them
+                self._restore(pending)
+                raise
+        logger.debug(f"Flushed {len(pending)} visitor sketches")
+        return len(pending)
+
+    @staticmethod
+    def _merge(model, owner_field: str, entries: Dict[Tuple[str, date], Dict[str, HyperLogLog]]) -> None:
+        model.objects.bulk_create(
+            [model(**{owner_field: owner_id, "day": day}) for owner_id, day in entries],
+            ignore_conflicts=True,
+        )
+        owner_ids = {owner_id for owner_id, _ in entries}
+        days = {day for _, day in entries}
+        with transaction.atomic():
+            rows = (
+                model.objects.select_for_update()
+                .filter(**{f"{owner_field}__in": owner_ids, "day__in": days})
+                .order_by("pk")
+            )
+            now = timezone.now()
+            updated = []
+            for row in rows:
+                sketches = entries.get((str(getattr(row, owner_field)), row.day))
+                if sketches is None:
+                    continue
+                for field, sketch in sketches.items():
+                    merged = HyperLogLog.from_bytes(getattr(row, field))
+                    merged.merge(sketch)
+                    setattr(row, field, merged.to_bytes())
+                row.updated_at = now
+                updated.append(row)
+            model.objects.bulk_update(updated, ["users", "sessions", "updated_at"], batch_size=500)
+
+    def _restore(self, pending: Dict[SketchKey, Dict[str, HyperLogLog]]) -> None:
+        with self._lock:
+            for key, sketches in pending.items():
+                current = self._pending.setdefault(key, sketches)
+                if current is not sketches:
+                    for field, sketch in sketches.items():
+                        current[field].merge(sketch)
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def unique_visitors(
+        self,
+        first_day: date,
+        last_day: date,
+        owner_ids: Optional[Iterable] = None,
+        scope: str = PRODUCT,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Estimate distinct users and sessions over a date range from the daily sketches.
+
+        Args:
+            first_day, last_day: Inclusive range of local days
+            owner_ids: Product ids (or seller ids for the seller scope) to report; None for all
+            scope: VisitorSketches.PRODUCT or VisitorSketches.SELLER
+
+        Returns:
+            {owner_id: {"unique_users": n, "unique_sessions": n}}
+        """
+        model, owner_field = self.MODELS[scope]
+        rows = model.objects.filter(day__gte=first_day, day__lte=last_day)
+        if owner_ids is not None:
+            rows = rows.filter(**{f"{owner_field}__in": list(owner_ids)})
+
+        unions: Dict[str, Dict[str, HyperLogLog]] = defaultdict(
+            lambda: {"users": HyperLogLog(), "sessions": HyperLogLog()}
+        )
+        for owner_id, users, sessions in rows.values_list(owner_field, "users", "sessions").iterator(chunk_size=500):
+            unions[str(owner_id)]["users"].merge(HyperLogLog.from_bytes(users))
+            unions[str(owner_id)]["sessions"].merge(HyperLogLog.from_bytes(sessions))
+        return {
+            owner_id: {"unique_users": s["users"].count(), "unique_sessions": s["sessions"].count()}
+            for owner_id, s in unions.items()
+        }
+
+    def seller_unique_visitors(self, seller_id, first_day: date, last_day: date) -> Dict[str, int]:
+        """Distinct users and sessions that interacted with any of a seller's products."""
+        return self.unique_visitors(first_day, last_day, [seller_id], scope=self.SELLER).get(
+            str(seller_id), {"unique_users": 0, "unique_sessions": 0}
+        )
+
+
+_sketches = None
+_sketches_lock = threading.Lock()
+
+
+def get_visitor_sketches() -> VisitorSketches:
+    """Return the process-wide VisitorSketches instance."""
+    global _sketches
+    if _sketches is None:
+        with _sketches_lock:
+            if _sketches is None:
+                _sketches = VisitorSketches()
+                atexit.register(_flush_at_exit, _sketches)
+    return _sketches
+
+
+def _flush_at_exit(sketches: VisitorSketches) -> None:
+    try:
+        sketches.flush()
+    except Exception as e:
+        logger.error(f"Error flushing visitor sketches at exit: {e}")
@@ -1,11 +1,26 @@
-from datetime import date
+import gzip
+import json
+from datetime import date, timedelta
+from importlib import import_module
+from unittest import mock
 
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db.models import Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
 from marketplace.models import Category, Product, ProductMetrics
 
-from .models import ActivitySummary, UserClick
+from .models import ActivitySummary, ProductActivityRollup, UserAgent, UserClick
+from .services.analytics import ActivityAnalytics
+from .services.dedup import ActivityDeduplicator, MemoryDedupStore
+from .services.encoding import DictionaryEncoder
+from .services.hll import HyperLogLog
+from .services.retention import ActivityRetention
+from .services.rollup import ActivitySummaryRollup
+from .services.sketches import get_visitor_sketches
 
 
 User = get_user_model()
@@ -82,6 +97,56 @@ class UserClickModelTest(TestCase):
         metrics.refresh_from_db()
         self.assertEqual(metrics.total_favorites, 0)
 
+    def test_double_fired_view_is_dropped_without_a_query(self):
+        """Test that a repeated view within the dedup window is dropped without touching the database"""
+        first = UserClick.track_activity(product=self.product, action="view", user=self.user)
+
+        with self.assertNumQueries(0):
+            duplicate = UserClick.track_activity(product=self.product, action="view", user=self.user)
+
+        self.assertIsNotNone(first.pk)
+        self.assertIsNone(duplicate.pk)
+        self.assertEqual(UserClick.objects.filter(action="view").count(), 1)
+
+        # Other actions and other visitors are not affected
+        UserClick.track_activity(product=self.product, action="click", user=self.user)
+        UserClick.track_activity(product=self.product, action="click", user=self.user)
+        UserClick.track_activity(product=self.product, action="view", session_key="other_session")
+        self.assertEqual(UserClick.objects.count(), 4)
+
+
+class ActivityDeduplicatorTest(SimpleTestCase):
+    @mock.patch("activity.services.dedup.time.monotonic")
+    def test_repeats_are_matched_by_event_time_window(self, monotonic):
+        dedup = ActivityDeduplicator(store=MemoryDedupStore(window=1), window=1)
+
+        monotonic.return_value = 10.2
+        self.assertEqual(dedup.filter_new("u1", "view", ["a", "b"], ts=100.2), ["a", "b"])
+        monotonic.return_value = 10.9
+        self.assertEqual(dedup.filter_new("u1", "view", ["a", "c"], ts=100.9), ["c"])
+        # A real view a few seconds later, even if processed in the same moment
+        self.assertFalse(dedup.is_duplicate("u1", "view", "b", ts=103.5))
+        # Keys are forgotten after two store windows
+        monotonic.return_value = 13.0
+        self.assertFalse(dedup.is_duplicate("u1", "view", "a", ts=100.5))
+
+        self.assertEqual(dedup.stats(), {"hits": 1, "misses": 5, "hit_rate": 1 / 6})
+
+    def test_events_in_one_batch_are_compared_by_their_own_time(self):
+        dedup = ActivityDeduplicator(store=MemoryDedupStore(window=1), window=1)
+
+        new = dedup.are_new([("u1", "view", "a", 100.1), ("u1", "view", "a", 100.6), ("u1", "view", "a", 104.0)])
+
+        self.assertEqual(new, [True, False, True])
+
+    def test_store_errors_let_events_through(self):
+        store = mock.Mock()
+        store.add_new.side_effect = ConnectionError("redis down")
+        dedup = ActivityDeduplicator(store=store)
+
+        self.assertEqual(dedup.filter_new("u1", "view", ["a"]), ["a"])
+        self.assertEqual(dedup.stats()["hits"], 0)
+
 
 class ActivitySummaryModelTest(TestCase):
     def setUp(self):
@@ -117,3 +182,381 @@ class ActivitySummaryModelTest(TestCase):
         self.assertEqual(summary.total_favorites, 1)
         self.assertEqual(summary.unique_users, 1)
         self.assertEqual(summary.unique_sessions, 1)
+
+    def test_generate_daily_summary_without_activity(self):
+        """Test that a product without activity still gets an empty summary"""
+        summary = ActivitySummary.generate_daily_summary(self.product, date.today())
+
+        self.assertEqual(summary.total_views, 0)
+        self.assertEqual(ActivitySummary.objects.count(), 1)
+
+
+class ActivitySummaryRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        category = Category.objects.create(name="Test Category", slug="test-category")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                description="A test product",
+                seller=self.user,
+                category=category,
+                price=99.99,
+            )
+            for i in range(3)
+        ]
+        self.now = timezone.now().replace(hour=12, minute=0)
+
+    def _click(self, product, action, when=None, **kwargs):
+        UserClick.objects.create(product=product, action=action, created_at=when or self.now, **kwargs)
+
+    def test_rollup_day_summarizes_every_product_in_one_query(self):
+        first, second, idle = self.products
+        self._click(first, "detail_view", user=self.user)
+        self._click(first, "listing_view", session_key="s1")
+        self._click(first, "cart_add", user=self.user)
+        self._click(first, "favorite", user=self.user)
+        self._click(second, "click", session_key="s1")
+        self._click(second, "click", session_key="s2")
+        self._click(second, "click", when=self.now - timedelta(days=1), session_key="s3")
+
+        # one grouped aggregate + one bulk upsert
+        with self.assertNumQueries(2):
+            written = ActivitySummaryRollup().rollup_day(self.now.date())
+
+        self.assertEqual(written, 2)
+        summary = ActivitySummary.objects.get(product=first)
+        self.assertEqual(
+            (summary.total_views, summary.total_clicks, summary.total_cart_additions, summary.total_favorites),
+            (2, 1, 1, 1),
+        )
+        self.assertEqual((summary.unique_users, summary.unique_sessions), (1, 1))
+        summary = ActivitySummary.objects.get(product=second)
+        self.assertEqual((summary.total_clicks, summary.unique_sessions), (2, 2))
+        self.assertFalse(ActivitySummary.objects.filter(product=idle).exists())
+
+    def test_rerun_updates_existing_summaries(self):
+        product = self.products[0]
+        self._click(product, "click", user=self.user)
+        ActivitySummaryRollup().rollup_day(self.now.date())
+        self._click(product, "click", user=self.user)
+
+        ActivitySummaryRollup().rollup_day(self.now.date())
+
+        self.assertEqual(ActivitySummary.objects.get(product=product).total_clicks, 2)
+
+    def test_catch_up_refreshes_yesterday_shortly_after_midnight(self):
+        product = self.products[0]
+        just_after_midnight = self.now.replace(hour=0, minute=30)
+        self._click(product, "click", when=just_after_midnight - timedelta(hours=1), user=self.user)
+        self._click(product, "click", when=just_after_midnight, user=self.user)
+
+        # Yesterday and today, plus yesterday's weekly and monthly summaries
+        self.assertEqual(ActivitySummaryRollup().catch_up(now=just_after_midnight), 4)
+        self.assertEqual(ActivitySummaryRollup().catch_up(now=self.now), 1)
+
+    def test_rollup_period_sums_days_and_unions_visitor_sketches(self):
+        product = self.products[0]
+        sketches = get_visitor_sketches()
+        monday = timezone.localdate(self.now) - timedelta(days=timezone.localdate(self.now).weekday())
+        for offset, visitors in ((0, ["a", "b"]), (1, ["b", "c"])):
+            day = self.now + timedelta(days=(monday - timezone.localdate(self.now)).days + offset)
+            for visitor in visitors:
+                self._click(product, "click", when=day, session_key=visitor)
+                sketches.observe(product.pk, product.seller_id, session_key=visitor, when=day)
+            ActivitySummaryRollup().rollup_day(timezone.localdate(day))
+
+        self.assertEqual(ActivitySummaryRollup().rollup_period("weekly", monday), 1)
+
+        summary = ActivitySummary.objects.get(product=product, period_type="weekly")
+        self.assertEqual(summary.period_start.date(), monday)
+        self.assertEqual((summary.total_clicks, summary.unique_sessions, summary.unique_users), (4, 3, 0))
+
+
+@override_settings(ACTIVITY_RETENTION_DAYS=30, ACTIVITY_ARCHIVE_PART_ROWS=2)
+class ActivityRetentionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        category = Category.objects.create(name="Test Category", slug="test-category")
+        self.product = Product.objects.create(
+            name="Test Product",
+            slug="test-product",
+            description="A test product",
+            seller=self.user,
+            category=category,
+            price=99.99,
+        )
+        self.now = timezone.now().replace(hour=12, minute=0)
+        self.uploads = {}
+        self.storage = mock.MagicMock()
+        self.storage.upload.side_effect = lambda file, path, content_type, make_public: self.uploads.update(
+            {path: gzip.decompress(file.read()).decode().splitlines()}
+        )
+
+    def _click(self, days_ago, action="click"):
+        return UserClick.objects.create(
+            product=self.product, action=action, user=self.user, created_at=self.now - timedelta(days=days_ago)
+        )
+
+    def test_expired_days_are_summarized_archived_and_deleted(self):
+        old = [self._click(40), self._click(40, "detail_view"), self._click(40), self._click(35)]
+        recent = self._click(5)
+
+        result = ActivityRetention(storage=self.storage).run(now=self.now)
+
+        self.assertEqual(result, {"days": 2, "archived": 4, "parts": 3})
+        self.assertEqual(list(UserClick.objects.all()), [recent])
+        records = [json.loads(line) for lines in self.uploads.values() for line in lines]
+        self.assertEqual(sorted(r["id"] for r in records), sorted(c.pk for c in old))
+        self.assertEqual(records[0]["product_id"], str(self.product.pk))
+        self.assertTrue(all(key.endswith(".jsonl.gz") for key in self.uploads))
+
+        summary = ActivitySummary.objects.get(period_start__date=(self.now - timedelta(days=40)).date())
+        self.assertEqual((summary.total_clicks, summary.total_views), (2, 1))
+
+    def test_failed_upload_keeps_the_rows(self):
+        self._click(40)
+        self.storage.upload.side_effect = ConnectionError("s3 down")
+
+        with self.assertRaises(ConnectionError):
+            ActivityRetention(storage=self.storage).run(now=self.now)
+
+        self.assertEqual(UserClick.objects.count(), 1)
+
+
+class DictionaryEncoderTest(TestCase):
+    def setUp(self):
+        self.encoder = DictionaryEncoder(UserAgent, max_size=2)
+
+    def test_repeated_values_share_one_row(self):
+        ids = self.encoder.encode_many(["Firefox", "Chrome", "Firefox", "", None])
+
+        self.assertEqual(set(ids), {"Firefox", "Chrome"})
+        self.assertEqual(UserAgent.objects.count(), 2)
+        self.assertEqual(DictionaryEncoder(UserAgent).encode("Chrome"), ids["Chrome"])
+        self.assertEqual(UserAgent.objects.count(), 2)
+        self.assertIsNone(self.encoder.encode(""))
+
+    def test_ids_are_cached_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.encoder.encode("Firefox")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.encoder.encode("Firefox"), first)
+
+    def test_cache_evicts_least_recently_used(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.encoder.encode_many(["a", "b"])
+            self.encoder.encode("a")
+            self.encoder.encode("c")
+
+        with self.assertNumQueries(0):
+            self.encoder.encode_many(["a", "c"])
+        with self.assertNumQueries(1):
+            self.encoder.encode("b")
+
+    def test_track_activity_stores_encoded_headers(self):
+        user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        category = Category.objects.create(name="Test Category", slug="test-category")
+        product = Product.objects.create(
+            name="Test Product",
+            slug="test-product",
+            description="A test product",
+            seller=user,
+            category=category,
+            price=1,
+        )
+        request = RequestFactory().get("/", HTTP_USER_AGENT="Firefox", HTTP_REFERER="https://example.com/")
+
+        click = UserClick.track_activity(product=product, action="click", user=user, request=request)
+        again = UserClick.track_activity(product=product, action="click", user=user, request=request)
+
+        click.refresh_from_db()
+        self.assertEqual((click.user_agent.value, click.referer.value), ("Firefox", "https://example.com/"))
+        self.assertEqual((again.user_agent_id, again.referer_id), (click.user_agent_id, click.referer_id))
+
+
+class HyperLogLogTest(SimpleTestCase):
+    def test_estimate_is_within_error_bound(self):
+        sketch = HyperLogLog()
+        sketch.update(f"user-{i}" for i in range(50000))
+
+        # Four standard errors (~6.5%) for p=12
+        self.assertAlmostEqual(sketch.count(), 50000, delta=50000 * 0.065)
+
+    def test_small_counts_are_nearly_exact(self):
+        sketch = HyperLogLog()
+        sketch.update(["a", "b", "c", "a", "b"])
+
+        self.assertEqual(sketch.count(), 3)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_merge_is_a_union_and_survives_serialization(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(range(0, 600))
+        second.update(range(400, 1000))
+
+        first.merge(HyperLogLog.from_bytes(second.to_bytes()))
+
+        both = HyperLogLog()
+        both.update(range(1000))
+        self.assertEqual(first.registers, both.registers)
+        self.assertLess(len(HyperLogLog().to_bytes()), 64)
+
+
+class VisitorSketchesTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="testpass123")
+        self.buyer = User.objects.create_user(username="buyer", email="buyer@example.com", password="testpass123")
+        category = Category.objects.create(name="Test Category", slug="test-category")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                description="A test product",
+                seller=self.seller,
+                category=category,
+                price=1,
+            )
+            for i in range(2)
+        ]
+        self.sketches = get_visitor_sketches()
+        self.today = timezone.localdate()
+
+    def test_track_activity_feeds_product_and_seller_sketches(self):
+        first, second = self.products
+        UserClick.track_activity(product=first, action="click", user=self.buyer)
+        UserClick.track_activity(product=second, action="click", user=self.buyer)
+        UserClick.track_activity(product=second, action="click", session_key="anon")
+
+        uniques = self.sketches.unique_visitors(self.today, self.today)
+        self.assertEqual(uniques[str(first.pk)], {"unique_users": 1, "unique_sessions": 0})
+        self.assertEqual(uniques[str(second.pk)], {"unique_users": 1, "unique_sessions": 1})
+        self.assertEqual(
+            self.sketches.seller_unique_visitors(self.seller.pk, self.today, self.today),
+            {"unique_users": 1, "unique_sessions": 1},
+        )
+
+    @override_settings(ACTIVITY_SKETCH_FLUSH_INTERVAL=3600)
+    def test_buffered_sketches_merge_into_existing_rows(self):
+        product = self.products[0]
+        yesterday = timezone.now() - timedelta(days=1)
+        sketches = type(self.sketches)()
+        for when, sessions in ((yesterday, ["a", "b"]), (timezone.now(), ["b", "c"])):
+            for session_key in sessions:
+                sketches.observe(product.pk, product.seller_id, session_key=session_key, when=when)
+            self.assertEqual(sketches.flush(), 2)
+        sketches.observe(product.pk, None, session_key="d")
+        sketches.flush()
+
+        uniques = sketches.unique_visitors(self.today - timedelta(days=1), self.today, [product.pk])
+        self.assertEqual(uniques[str(product.pk)]["unique_sessions"], 4)
+        self.assertEqual(
+            sketches.unique_visitors(self.today, self.today, [product.pk])[str(product.pk)]["unique_sessions"], 3
+        )
+
+
+class ActivityAnalyticsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        category = Category.objects.create(name="Test Category", slug="test-category")
+        self.product = Product.objects.create(
+            name="Test Product",
+            slug="test-product",
+            description="A test product",
+            seller=self.user,
+            category=category,
+            price=99.99,
+        )
+        self.now = timezone.localtime().replace(hour=12, minute=30, second=0, microsecond=0)
+        self.analytics = ActivityAnalytics()
+
+    def _click(self, action, when):
+        UserClick.objects.create(product=self.product, action=action, user=self.user, created_at=when)
+
+    def _rollup(self, first_day, last_day):
+        day = first_day
+        while day <= last_day:
+            self.analytics.rebuild_day(day)
+            day += timedelta(days=1)
+
+    def test_hour_and_day_rows_are_idempotent(self):
+        self._click("click", self.now)
+        self._click("click", self.now + timedelta(minutes=10))
+        self._click("detail_view", self.now - timedelta(hours=3))
+
+        self.analytics.rebuild_day(self.now.date())
+        self.analytics.rebuild_day(self.now.date())
+
+        hours = ProductActivityRollup.objects.filter(granularity="hour")
+        self.assertEqual(sorted(hours.values_list("action", "count")), [("click", 2), ("detail_view", 1)])
+        day = ProductActivityRollup.objects.get(granularity="day", action="click")
+        self.assertEqual(day.count, 2)
+
+    def test_window_sums_day_rows_and_edge_hours_in_one_query(self):
+        for days_ago in range(10):
+            self._click("click", self.now - timedelta(days=days_ago))
+        self._click("listing_view", self.now - timedelta(days=3))
+        self._rollup((self.now - timedelta(days=10)).date(), self.now.date())
+
+        with self.assertNumQueries(1):
+            counts = self.analytics.action_counts(self.now - timedelta(days=7), self.now)[str(self.product.pk)]
+
+        # Days 1-6 come from day rows, the partial first and last days from hour rows
+        self.assertEqual(counts, {"click": 8, "listing_view": 1})
+        self.assertEqual(self.analytics.totals(counts)["views"], 1)
+        self.assertEqual(
+            self.analytics.seller_totals(self.user.pk, self.now - timedelta(hours=1), self.now)["clicks"], 1
+        )
+
+    def test_catch_up_refreshes_recent_hours(self):
+        self._click("click", self.now - timedelta(minutes=20))
+        self._click("click", self.now - timedelta(hours=5))
+
+        self.analytics.catch_up(now=self.now)
+
+        self.assertEqual(ProductActivityRollup.objects.get(granularity="day").count, 1)
+
+    def test_late_events_are_recomputed_when_written(self):
+        self._click("click", self.now - timedelta(minutes=20))
+        self.analytics.catch_up(now=self.now)
+        # Drained after the lookback passed their hour, with their original event time
+        late = [self.now - timedelta(hours=5), self.now - timedelta(days=2)]
+        for when in late:
+            self._click("click", when)
+
+        # Only the two late hours and their days; the current hour is left to catch_up
+        self.assertEqual(self.analytics.refresh_late(late + [self.now], now=self.now), 4)
+
+        days = ProductActivityRollup.objects.filter(granularity="day").order_by("period_start")
+        self.assertEqual(list(days.values_list("count", flat=True)), [1, 2])
+
+    def test_migration_backfills_rollups_from_history(self):
+        backfill = import_module("activity.migrations.0009_backfill_product_activity_rollup").backfill_rollups
+        for days_ago in (0, 0, 3):
+            self._click("click", timezone.now() - timedelta(days=days_ago))
+        # A stale row from an earlier partial run is replaced
+        self.analytics.rebuild_day(timezone.localdate())
+        ProductActivityRollup.objects.filter(granularity="day").update(count=99)
+
+        backfill(apps, None)
+
+        days = ProductActivityRollup.objects.filter(granularity="day").order_by("period_start")
+        self.assertEqual(list(days.values_list("count", flat=True)), [1, 2])
+        self.assertEqual(ProductActivityRollup.objects.filter(granularity="hour").aggregate(n=Sum("count"))["n"], 3)
+
+    def test_stats_endpoint_reads_the_window(self):
+        self._click("favorite", self.now - timedelta(days=2))
+        self._click("favorite", self.now - timedelta(days=40))
+        self._rollup((self.now - timedelta(days=41)).date(), self.now.date())
+        url = reverse("activity:product_stats", kwargs={"product_id": self.product.pk})
+
+        response = self.client.get(url, {"end": self.now.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["activity_counts"]["favorite"], 1)
+
+        response = self.client.get(url, {"days": 60, "end": self.now.isoformat()})
+        self.assertEqual(response.data["totals"]["favorites"], 2)
+
+        self.assertEqual(self.client.get(url, {"days": 0}).status_code, 400)
@@ -1,4 +1,8 @@
+from datetime import timedelta
+
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
@@ -8,6 +12,20 @@ from marketplace.models import Product
 
 from .models import UserClick
 from .serializers import ActivityTrackingSerializer
+from .services.analytics import ActivityAnalytics
+
+
+MAX_STATS_DAYS = 365
+
+
+def _parse_datetime(value):
+    """Parse an ISO datetime query parameter; naive values are in the current time zone."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"not an ISO datetime: {value}")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
 
 
 @api_view(["POST"])
@@ -73,14 +91,32 @@ def track_product_activity(request):
 def get_product_activity_stats(request, product_id):
     """
     Get activity statistics for a specific product.
+
+    Activity counts cover a window given either as ``?days=N`` (default 30,
+    ending now) or as ISO ``?start=...&end=...`` datetimes, and are summed
+    from the hourly/daily activity rollups rather than raw events.
     """
     try:
         product = get_object_or_404(Product, id=product_id, is_active=True)
 
+        # Resolve the window
+        try:
+            end = _parse_datetime(request.GET.get("end")) or timezone.now()
+            start = _parse_datetime(request.GET.get("start"))
+            if start is None:
+                days = int(request.GET.get("days", 30))
+                if not 1 <= days <= MAX_STATS_DAYS:
+                    raise ValueError(f"days must be between 1 and {MAX_STATS_DAYS}")
+                start = end - timedelta(days=days)
+            if start >= end:
+                raise ValueError("start must be before end")
+        except ValueError as e:
+            return Response({"error": f"Invalid window: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
         # Get activity counts
-        activity_counts = {}
-        for action, _ in UserClick.ACTION_CHOICES:
-            activity_counts[action] = UserClick.objects.filter(product=product, action=action).count()
+        analytics = ActivityAnalytics()
+        counts = analytics.action_counts(start, end, product_ids=[product.pk]).get(str(product.pk), {})
+        activity_counts = {action: counts.get(action, 0) for action, _ in UserClick.ACTION_CHOICES}
 
         # Get product metrics if available
         metrics_data = {}
@@ -101,7 +137,9 @@ def get_product_activity_stats(request, product_id):
             {
                 "product_id": product.id,
                 "product_name": product.name,
+                "window": {"start": start, "end": end},
                 "activity_counts": activity_counts,
+                "totals": analytics.totals(activity_counts),
                 "metrics": metrics_data,
             },
             status=status.HTTP_200_OK,
@@ -28,13 +28,13 @@ class MessageAdmin(admin.ModelAdmin):
 class ThreadParticipantInline(admin.TabularInline):
     model = ThreadParticipant
     extra = 0
-    readonly_fields = ("joined_at", "last_read_at")
+    readonly_fields = ("joined_at", "last_read_at", "last_read_message", "unread_count")
 
 
 class ThreadMessageInline(admin.TabularInline):
     model = ThreadMessage
     extra = 0
-    fields = ("sender", "message_type", "text", "image_url", "created_at", "is_read")
+    fields = ("sender", "message_type", "text", "image_url", "created_at")
     readonly_fields = ("created_at",)
     ordering = ("created_at",)
 
@@ -1,19 +1,31 @@
+import asyncio
 import json
 import logging
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 
-from chat.domain.models import ThreadParticipant
+from chat.api.serializers.conversation_serializers import ThreadMessageSerializer
+from chat.domain.models import ThreadMessage, ThreadParticipant
 from chat.domain.services.chat_service import ChatService
+from chat.domain.services.message_buffer import get_message_buffer
+from chat.domain.services.typing import TypingIndicator
+from chat.infra.observability.metrics import channel_layer_publishes_total
+from marketplace.catalog.domain.services.pagination import InvalidCursor
 
 
 logger = logging.getLogger(__name__)
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    HISTORY_PAGE_SIZE = 20
+    HISTORY_MAX_PAGE_SIZE = 100
+
     async def connect(self):
         self.user = self.scope["user"]
+        self._pending_acks = set()
 
         # 1. Validation: User must be authenticated
         if not self.user.is_authenticated:
@@ -23,9 +35,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         # 2. Extract Thread ID
         self.thread_id = self.scope["url_route"]["kwargs"].get("thread_id")
-        self.group_name = f"thread_{self.thread_id}"
+        self.group_name = ChatService.group_name(self.thread_id)
 
-        # 3. Check Permissions (Async DB Call)
+        # 3. Check Permissions (Async DB Call), once per connection: the send path relies on it
         has_permission = await self.check_thread_permission(self.user, self.thread_id)
         if not has_permission:
             logger.warning(f"User {self.user.id} denied access to thread {self.thread_id}")
@@ -34,11 +46,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         # 4. Join Group
         await self.channel_layer.group_add(self.group_name, self.channel_name)
+        self.typing = TypingIndicator(self.publish_typing)
 
         await self.accept()
         logger.info(f"User {self.user.id} connected to thread {self.thread_id}")
 
     async def disconnect(self, close_code):
+        if hasattr(self, "typing"):
+            await self.typing.close()
+
         # Leave group
         if hasattr(self, "group_name"):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
@@ -57,23 +73,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     await self.send_error("Message must have text or image.")
                     return
 
-                # Persist and Broadcast via Service
+                # Broadcast now, persist in the next write-behind batch, acknowledge once saved
                 try:
-                    await self.save_and_broadcast_message(text, image_url)
+                    await self.send_chat_message(text, image_url, payload.get("client_id"))
+                except ValidationError as e:
+                    await self.send_error(f"Invalid message: {'; '.join(e.messages)}")
                 except Exception as e:
-                    logger.error(f"Error saving message: {e}")
+                    logger.error(f"Error sending message: {e}")
                     await self.send_error("Failed to send message")
 
             elif msg_type == "chat.typing":
-                # Broadcast typing status to group
-                await self.channel_layer.group_send(
-                    self.group_name,
-                    {
-                        "type": "chat_typing",
-                        "sender_id": str(self.user.id),
-                        "username": self.user.username,
-                    },
-                )
+                # Coalesced: only started/stopped transitions reach the group (see TypingIndicator)
+                payload = data.get("payload") or {}
+                await self.typing.frame(bool(payload.get("is_typing", True)))
+
+            elif msg_type == "chat.load_older":
+                # Scrollback: payload {"before": <before_cursor>, "page_size": n}; no cursor loads the newest page
+                payload = data.get("payload", {})
+                try:
+                    history = await self.load_history(payload.get("before"), payload.get("page_size"))
+                except InvalidCursor:
+                    await self.send_error("Invalid cursor", code="invalid_cursor")
+                    return
+                await self.send(text_data=json.dumps({"type": "chat.history", "data": history}, cls=DjangoJSONEncoder))
 
             elif msg_type == "ping":
                 await self.send(text_data=json.dumps({"type": "pong"}))
@@ -101,7 +123,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if event["sender_id"] != str(self.user.id):
             await self.send(
                 text_data=json.dumps(
-                    {"type": "chat.typing", "sender_id": event["sender_id"], "username": event["username"]}
+                    {
+                        "type": "chat.typing",
+                        "sender_id": event["sender_id"],
+                        "username": event["username"],
+                        "is_typing": event.get("is_typing", True),
+                    }
                 )
             )
 
@@ -125,7 +152,57 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return False
 
     @database_sync_to_async
-    def save_and_broadcast_message(self, text, image_url):
-        service = ChatService()
-        # This persists AND sends to group (so self.chat_message will be triggered)
-        service.send_message(self.user, self.thread_id, text, image_url)
+    def load_history(self, before, page_size):
+        try:
+            page_size = max(1, min(int(page_size or self.HISTORY_PAGE_SIZE), self.HISTORY_MAX_PAGE_SIZE))
+        except (TypeError, ValueError):
+            page_size = self.HISTORY_PAGE_SIZE
+        page = ChatService().get_conversation_history(self.user, self.thread_id, before=before, page_size=page_size)
+        context = {"read_watermarks": page.pop("read_watermarks")}
+        return {"messages": ThreadMessageSerializer(page.pop("results"), many=True, context=context).data, **page}
+
+    async def send_chat_message(self, text, image_url, client_id=None):
+        """
+        Broadcast a message from the event loop and queue it for persistence.
+
+        Membership was verified at connect, so nothing is read from the
+        database here; the fields are validated before anything is broadcast.
+        The sender gets a ``chat.ack`` (or a ``persist_failed``
+        error) once the message's batch is written.
+        """
+        message = ThreadMessage(thread_id=self.thread_id, sender=self.user, text=text, image_url=image_url)
+        ChatService.validate_message(message)
+        self.typing.reset()
+        await self.channel_layer.group_send(self.group_name, ChatService.message_payload(message))
+        channel_layer_publishes_total.labels(event="message").inc()
+        persisted = get_message_buffer().submit(message)
+        self._pending_acks.add(asyncio.ensure_future(self.acknowledge(message, persisted, client_id)))
+
+    async def publish_typing(self, is_typing):
+        await self.channel_layer.group_send(
+            self.group_name,
+            {
+                "type": "chat_typing",
+                "sender_id": str(self.user.id),
+                "username": self.user.username,
+                "is_typing": is_typing,
+            },
+        )
+        channel_layer_publishes_total.labels(event="typing").inc()
+
+    async def acknowledge(self, message, persisted, client_id):
+        try:
+            await persisted
+            await self.send(
+                text_data=json.dumps(
+                    {
+                        "type": "chat.ack",
+                        "data": {"id": str(message.id), "client_id": client_id, "status": "persisted"},
+                    }
+                )
+            )
+        except Exception as e:
+            logger.error(f"Message {message.id} was broadcast but not persisted: {e}")
+            await self.send_error("Failed to save message", code="persist_failed")
+        finally:
+            self._pending_acks.discard(asyncio.current_task())
@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from chat.domain.models import Thread, ThreadMessage, ThreadParticipant
+from chat.domain.services.chat_service import ChatService
 from marketplace.catalog.domain.models.catalog import Product
 
 
@@ -17,19 +18,29 @@ class ThreadParticipantSerializer(serializers.ModelSerializer):
         fields = ("id", "user", "username", "avatar", "joined_at", "last_read_at")
 
     def get_avatar(self, obj):
-        try:
-            return obj.user.profile.get_profile_picture_temp_url()
-        except Exception:
-            return None
+        # Presign each user's avatar once per response; the requesting user is in every thread
+        avatars = self.context.setdefault("avatars", {})
+        if obj.user_id not in avatars:
+            try:
+                avatars[obj.user_id] = obj.user.profile.get_profile_picture_temp_url()
+            except Exception:
+                avatars[obj.user_id] = None
+        return avatars[obj.user_id]
 
 
 class ThreadMessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.ReadOnlyField(source="sender.username")
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = ThreadMessage
         fields = ("id", "sender", "sender_username", "message_type", "text", "image_url", "created_at", "is_read")
 
+    def get_is_read(self, obj):
+        # Read once another participant's watermark (context "read_watermarks", see ChatService) has passed it
+        watermarks = self.context.get("read_watermarks", {})
+        return any(read_at >= obj.created_at for user_id, read_at in watermarks.items() if user_id != obj.sender_id)
+
 
 class ThreadSerializer(serializers.ModelSerializer):
     participants = ThreadParticipantSerializer(source="thread_participants", many=True, read_only=True)
@@ -38,21 +49,33 @@ class ThreadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Thread
-        fields = ("id", "created_at", "updated_at", "is_group", "name", "participants", "last_message", "unread_count")
-        read_only_fields = ("id", "created_at", "updated_at")
+        fields = (
+            "id",
+            "created_at",
+            "updated_at",
+            "is_group",
+            "name",
+            "participants",
+            "last_message",
+            "last_message_at",
+            "unread_count",
+        )
+        read_only_fields = ("id", "created_at", "updated_at", "last_message_at")
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by("-created_at").first()
-        if last_msg:
-            return ThreadMessageSerializer(last_msg).data
+        if obj.last_message_id:
+            watermarks = ChatService.read_watermarks(obj.thread_participants.all())
+            return ThreadMessageSerializer(obj.last_message, context={"read_watermarks": watermarks}).data
         return None
 
     def get_unread_count(self, obj):
+        # Annotated by ChatService.conversations_for; otherwise read the participant's counter
+        if hasattr(obj, "unread_count"):
+            return obj.unread_count
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            # Simple unread count: messages where sender is NOT current user and is_read is False
-            # Note: Legacy Message model used is_read, ThreadMessage also has it.
-            return obj.messages.exclude(sender=request.user).filter(is_read=False).count()
+            participant = next((p for p in obj.thread_participants.all() if p.user_id == request.user.id), None)
+            return participant.unread_count if participant else 0
         return 0
 
 
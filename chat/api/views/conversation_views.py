@@ -1,6 +1,6 @@
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 from chat.api.serializers.conversation_serializers import (
@@ -9,38 +9,42 @@ from chat.api.serializers.conversation_serializers import (
     ThreadSerializer,
 )
 from chat.domain.models import Thread, ThreadParticipant
-
-
-class MessagePagination(PageNumberPagination):
-    """Pagination for chat messages"""
-
-    page_size = 20
-    page_size_query_param = "page_size"
-    max_page_size = 100
+from chat.domain.services.chat_service import ChatService
+from marketplace.catalog.domain.services.pagination import InvalidCursor
 
 
 class ConversationViewSet(viewsets.ModelViewSet):
     serializer_class = ThreadSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    page_size = 20
+    max_page_size = 100
+
     def get_queryset(self):
         # Return threads where current user is a participant
-        return Thread.objects.filter(participants=self.request.user).distinct()
-
-    def get_paginator(self):
-        # Only paginate the messages action, not the conversation list
-        if self.action == "messages":
-            return super().get_paginator()
-        return None
-
-    @property
-    def paginator(self):
-        # Only paginate the messages action, not the conversation list
-        if self.action == "messages":
-            if not hasattr(self, "_paginator"):
-                self._paginator = MessagePagination()
-            return self._paginator
-        return None
+        return ChatService.conversations_for(self.request.user)
+
+    def _page_size(self, request):
+        try:
+            page_size = int(request.query_params.get("page_size", self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/chat/conversations/?cursor=<token>&page_size=20
+        Conversations ordered by last message, keyset-paginated on last_message_at.
+        """
+        try:
+            page = ChatService().list_conversations(
+                request.user, page_size=self._page_size(request), cursor=request.query_params.get("cursor", "")
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(page.pop("results"), many=True)
+        return Response({"results": serializer.data, **page})
 
     def create(self, request, *args, **kwargs):
         """
@@ -90,23 +94,33 @@ class ConversationViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"])
     def messages(self, request, pk=None):
-        thread = self.get_object()
-        messages = thread.messages.all().order_by("-created_at")
-        page = self.paginate_queryset(messages)
-        if page is not None:
-            serializer = ThreadMessageSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        """
+        GET /api/chat/conversations/{id}/messages/?before=<cursor>&page_size=20
+        Message history, newest first. Pass before_cursor back as ``before`` to
+        load older messages, or after_cursor as ``after`` to load newer ones.
+        """
+        try:
+            page = ChatService().get_conversation_history(
+                request.user,
+                pk,
+                before=request.query_params.get("before"),
+                after=request.query_params.get("after"),
+                page_size=self._page_size(request),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except (ObjectDoesNotExist, PermissionDenied, ValidationError):
+            return Response({"error": "Conversation not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = ThreadMessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        context = {"read_watermarks": page.pop("read_watermarks")}
+        serializer = ThreadMessageSerializer(page.pop("results"), many=True, context=context)
+        return Response({"results": serializer.data, **page})
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
         """
         Mark all messages in the thread as read.
         """
-        from chat.domain.services.chat_service import ChatService
-
         service = ChatService()
         try:
             count = service.mark_messages_as_read(request.user, pk)
@@ -18,10 +18,18 @@ class Thread(models.Model):
     is_group = models.BooleanField(default=False)
     name = models.CharField(max_length=255, blank=True, null=True)
 
+    # Denormalized for the conversation list; maintained by ChatService.send_message
+    last_message = models.ForeignKey(
+        "ThreadMessage", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    # Time of the last message, or of creation until the first one (the list's keyset)
+    last_message_at = models.DateTimeField(default=timezone.now)
+
     class Meta:
         ordering = ["-updated_at"]
         indexes = [
             models.Index(fields=["-updated_at"]),
+            models.Index(fields=["-last_message_at"]),
         ]
 
     def __str__(self):
@@ -32,7 +40,13 @@ class ThreadParticipant(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name="thread_participants")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="thread_participations")
     joined_at = models.DateTimeField(auto_now_add=True)
+    # Read watermark: every message created at or before last_read_at counts as read
     last_read_at = models.DateTimeField(default=timezone.now)
+    last_read_message = models.ForeignKey(
+        "ThreadMessage", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    # Cached count of messages from others after the watermark; maintained by ChatService
+    unread_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("thread", "user")
@@ -58,8 +72,8 @@ class ThreadMessage(models.Model):
     image_url = models.CharField(max_length=500, blank=True, null=True, help_text="S3 object key for image")
 
     # Meta
-    created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)  # Legacy field, though Participant.last_read_at is better
+    # Set when the message is instantiated, not on insert: messages are broadcast before the batched write
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["created_at"]
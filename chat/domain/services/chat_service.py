@@ -1,18 +1,63 @@
+from collections import Counter, defaultdict
+
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, F, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
 
 from chat.domain.models import Thread, ThreadMessage, ThreadParticipant
+from chat.infra.observability.metrics import channel_layer_publishes_total
+from marketplace.catalog.domain.services.pagination import decode_cursor, encode_cursor, paginate_keyset
 
 
 class ChatService:
+    # Message history is ordered newest first on (created_at, id)
+    HISTORY_KEYSET = [("created_at", True), ("pk", True)]
+
     def __init__(self):
         self.channel_layer = get_channel_layer()
 
+    @staticmethod
+    def conversations_for(user):
+        """
+        Threads of a user, newest activity first, ready for ThreadSerializer.
+
+        The last message and its sender are joined in, and the user's own
+        unread counter is annotated as ``unread_count``; participants (with
+        profiles, for avatars) are loaded by one prefetch query.
+        """
+        return (
+            Thread.objects.filter(thread_participants__user=user)
+            .annotate(unread_count=F("thread_participants__unread_count"))
+            .select_related("last_message__sender")
+            .prefetch_related(
+                Prefetch(
+                    "thread_participants",
+                    queryset=ThreadParticipant.objects.select_related("user__profile").order_by("pk"),
+                )
+            )
+            .order_by("-last_message_at")
+        )
+
+    def list_conversations(self, user, page_size=20, cursor=""):
+        """
+        Return one keyset page of a user's conversations, ordered by last message.
+
+        Costs two queries per page whatever the number of threads or messages.
+
+        Raises:
+            InvalidCursor: if the cursor is malformed
+        """
+        return paginate_keyset(self.conversations_for(user), page_size, cursor)
+
     def send_message(self, user, thread_id, text, image_url=None):
         """
         Persist a message and broadcast it to the thread's group.
+
+        Synchronous path; ChatConsumer uses the batched write-behind path in
+        chat.domain.services.message_buffer instead.
         """
         # 1. Validation
         try:
@@ -24,89 +69,188 @@ class ChatService:
             raise PermissionDenied("User is not a participant of this thread")
 
         # 2. Persistence
-        message = ThreadMessage.objects.create(thread=thread, sender=user, text=text, image_url=image_url)
+        message = ThreadMessage(thread=thread, sender=user, text=text, image_url=image_url)
+        self.validate_message(message)
+        self.persist_messages([message])
 
         # 3. Broadcast
         # Group name convention: "thread_{uuid}"
-        group_name = f"thread_{thread.id}"
+        async_to_sync(self.channel_layer.group_send)(self.group_name(thread.id), self.message_payload(message))
+        channel_layer_publishes_total.labels(event="message").inc()
+
+        return message
+
+    @staticmethod
+    def validate_message(message):
+        """
+        Check an unsaved message's fields (text/image_url types and lengths) without reading the database.
+
+        Messages are broadcast before they are written, so anything the
+        database would reject must be caught here.
 
-        payload = {
+        Raises:
+            ValidationError: if a field is invalid
+        """
+        message.full_clean(exclude=["thread", "sender"], validate_unique=False, validate_constraints=False)
+
+    @staticmethod
+    def group_name(thread_id):
+        return f"thread_{thread_id}"
+
+    @staticmethod
+    def message_payload(message):
+        """Channel-layer event broadcasting a message; the sender must be loaded or cached on the instance."""
+        return {
             "type": "chat_message",  # Use underscore convention for handler methods
             "message": {
                 "id": str(message.id),
-                "thread_id": str(thread.id),
-                "sender_id": str(user.id),
-                "sender_username": user.username,
+                "thread_id": str(message.thread_id),
+                "sender_id": str(message.sender_id),
+                "sender_username": message.sender.username,
                 "text": message.text,
                 "image_url": message.image_url,
                 "created_at": message.created_at.isoformat(),
             },
         }
 
-        async_to_sync(self.channel_layer.group_send)(group_name, payload)
-
-        return message
+    @staticmethod
+    def persist_messages(messages):
+        """
+        Insert unsaved messages in order and update the conversation list fields.
 
-    def get_conversation_history(self, user, thread_id, page=1, page_size=20):
+        One multi-row INSERT for all messages, then per thread one UPDATE for
+        its last message and one for the other participants' unread counters,
+        in a single transaction. Messages carry their own id and created_at
+        (set when instantiated), so they can be broadcast before they are saved.
         """
-        Retrieve paginated messages for a thread, ensuring user has access.
+        by_thread = defaultdict(list)
+        for message in messages:
+            by_thread[message.thread_id].append(message)
+
+        with transaction.atomic():
+            ThreadMessage.objects.bulk_create(messages)
+            for thread_id, thread_messages in by_thread.items():
+                last = max(thread_messages, key=lambda m: m.created_at)
+                Thread.objects.filter(pk=thread_id, last_message_at__lte=last.created_at).update(
+                    last_message=last, last_message_at=last.created_at, updated_at=last.created_at
+                )
+
+                # Each participant gains every new message except its own
+                sent = Counter(message.sender_id for message in thread_messages)
+                ThreadParticipant.objects.filter(thread_id=thread_id).update(
+                    unread_count=F("unread_count")
+                    + Case(
+                        *[
+                            When(user_id=sender_id, then=Value(len(thread_messages) - n))
+                            for sender_id, n in sent.items()
+                        ],
+                        default=Value(len(thread_messages)),
+                    )
+                )
+
+    def get_conversation_history(self, user, thread_id, before=None, after=None, page_size=20):
         """
-        # Validation
-        try:
-            thread = Thread.objects.get(id=thread_id)
-        except Thread.DoesNotExist:
-            raise ObjectDoesNotExist("Thread not found")
+        Retrieve one page of a thread's messages, newest first, ensuring user has access.
 
-        if not ThreadParticipant.objects.filter(thread=thread, user=user).exists():
+        Pages are cursors on (created_at, id) rather than page numbers: ``before``
+        returns the messages older than a cursor (scrolling back), ``after`` the
+        ones newer than it (catching up), and neither the newest page. Each page
+        is a range scan on the (thread, created_at) index, so it costs the same
+        however far back it is, and nothing is counted.
+
+        Returns:
+            Dict with results (ThreadMessage list), has_older, has_newer,
+            before_cursor / after_cursor (pass back as before / after), and
+            read_watermarks for ThreadMessageSerializer
+
+        Raises:
+            InvalidCursor: if a cursor is malformed
+        """
+        # Validation: one query for the participants, which also carry the read watermarks
+        participants = list(ThreadParticipant.objects.filter(thread_id=thread_id))
+        if not any(participant.user_id == user.id for participant in participants):
+            if not Thread.objects.filter(id=thread_id).exists():
+                raise ObjectDoesNotExist("Thread not found")
             raise PermissionDenied("User is not a participant of this thread")
 
-        # Pagination
-        # Ordered by created_at DESC for history (newest first)
-        messages_qs = ThreadMessage.objects.filter(thread=thread).order_by("-created_at")
-        paginator = Paginator(messages_qs, page_size)
+        messages_qs = ThreadMessage.objects.filter(thread_id=thread_id).select_related("sender")
+        cursor = before or after
+        if cursor:
+            (created_at, pk), _ = decode_cursor(cursor, self.HISTORY_KEYSET)
+            lookup = "lt" if before else "gt"
+            messages_qs = messages_qs.filter(
+                Q(**{f"created_at__{lookup}": created_at}) | Q(created_at=created_at, **{f"pk__{lookup}": pk})
+            )
 
-        page_obj = paginator.get_page(page)
+        # Older pages walk the index backwards from the cursor, newer pages forwards
+        ordering = ("created_at", "pk") if after else ("-created_at", "-pk")
+        rows = list(messages_qs.order_by(*ordering)[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if after:
+            rows.reverse()
 
-        return page_obj
+        return {
+            "results": rows,
+            "has_older": has_more if not after else True,
+            "has_newer": has_more if after else bool(before),
+            "before_cursor": self._history_cursor(rows[-1]) if rows else None,
+            "after_cursor": self._history_cursor(rows[0]) if rows else None,
+            "read_watermarks": self.read_watermarks(participants),
+        }
+
+    @classmethod
+    def _history_cursor(cls, message):
+        return encode_cursor(cls.HISTORY_KEYSET, [message.created_at, message.pk])
 
     def mark_messages_as_read(self, user, thread_id):
         """
         Mark all messages in a thread as read for the user.
-        """
-        try:
-            thread = Thread.objects.get(id=thread_id)
-        except Thread.DoesNotExist:
-            raise ObjectDoesNotExist("Thread not found")
 
-        participant = ThreadParticipant.objects.filter(thread=thread, user=user).first()
+        Read state is a per-participant watermark: the participant's
+        last_read_at/last_read_message move up to the thread's last message
+        and its unread counter is cleared, in one single-row UPDATE. Messages
+        themselves are never written.
+
+        Returns:
+            Number of messages that were unread
+        """
+        participant = ThreadParticipant.objects.select_related("thread").filter(thread_id=thread_id, user=user).first()
         if not participant:
+            if not Thread.objects.filter(id=thread_id).exists():
+                raise ObjectDoesNotExist("Thread not found")
             raise PermissionDenied("User is not a participant of this thread")
 
-        from django.utils import timezone
-
-        now = timezone.now()
+        thread = participant.thread
+        newly_read = participant.unread_count
 
-        # Update participant's last_read_at
-        participant.last_read_at = now
-        participant.save(update_fields=["last_read_at"])
-
-        # Update messages is_read status (messages sent by OTHERS)
-        # This is efficient for visual indicators
-        updated_count = (
-            ThreadMessage.objects.filter(thread=thread, is_read=False).exclude(sender=user).update(is_read=True)
+        # Take the thread's last message inside the UPDATE, not from the row read above, so a
+        # message committed in between is covered by both the watermark and the cleared counter
+        thread_row = Thread.objects.filter(pk=thread.pk)
+        ThreadParticipant.objects.filter(pk=participant.pk).update(
+            last_read_message=Subquery(thread_row.values("last_message")[:1]),
+            last_read_at=Greatest(F("last_read_at"), Subquery(thread_row.values("last_message_at")[:1])),
+            unread_count=0,
         )
 
-        if updated_count > 0:
+        if newly_read > 0:
             # Broadcast read event
-            group_name = f"thread_{thread.id}"
+            group_name = self.group_name(thread.id)
             payload = {
                 "type": "chat_read",
                 "message": {
                     "thread_id": str(thread.id),
                     "reader_id": str(user.id),
-                    "read_at": now.isoformat(),
+                    "read_at": thread.last_message_at.isoformat(),
+                    "last_read_message_id": str(thread.last_message_id) if thread.last_message_id else None,
                 },
             }
             async_to_sync(self.channel_layer.group_send)(group_name, payload)
+            channel_layer_publishes_total.labels(event="read").inc()
+
+        return newly_read
 
-        return updated_count
+    @staticmethod
+    def read_watermarks(participants):
+        """Map user id -> last_read_at for ThreadMessageSerializer's is_read."""
+        return {participant.user_id: participant.last_read_at for participant in participants}
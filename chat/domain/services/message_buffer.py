@@ -0,0 +1,136 @@
+"""
+MessageWriteBuffer - batched write-behind persistence for chat messages
+
+ChatConsumer used to save every message through the synchronous
+ChatService.send_message: a thread hop per message running a Thread lookup,
+a participant ``exists()`` check and an INSERT, followed by
+``async_to_sync(group_send)`` from inside that thread. Now:
+
+- thread membership is checked once, when the socket connects
+- the consumer builds the message (its id and created_at are set when it is
+  instantiated), validates its fields, broadcasts it straight from the event
+  loop and submits it here
+- the buffer collects messages for up to CHAT_WRITE_BATCH_DELAY seconds or
+  CHAT_WRITE_BATCH_SIZE messages and saves them with
+  ChatService.persist_messages: one multi-row INSERT plus, per thread, one
+  last-message and one unread-counter UPDATE, in a single transaction
+- batches are written one at a time in submission order, so each thread's
+  messages are stored in the order they were sent; ``submit`` returns a
+  future resolved when the message's batch commits, which the consumer uses
+  to acknowledge persistence to the sender
+- a batch the database rejects is retried one message at a time, so only
+  the offending message (e.g. one whose thread was deleted) fails instead
+  of rolling back every other user's messages
+
+There is one buffer per event loop, i.e. per ASGI worker process. Its writer
+task only runs while messages are pending.
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import List, Optional, Tuple
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from chat.domain.models import ThreadMessage
+from chat.domain.services.chat_service import ChatService
+
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteBuffer:
+    """
+    Queues unsaved ThreadMessages and writes them in ordered batches.
+    """
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[Tuple[ThreadMessage, asyncio.Future]]" = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, "CHAT_WRITE_BATCH_SIZE", 100)
+
+    @property
+    def batch_delay(self) -> float:
+        return getattr(settings, "CHAT_WRITE_BATCH_DELAY", 0.01)
+
+    def submit(self, message: ThreadMessage) -> asyncio.Future:
+        """
+        Queue an unsaved message for the next batch.
+
+        Returns:
+            Future resolved with the message once it is committed, or failed
+            with the database error
+        """
+        persisted = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, persisted))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._write_pending())
+        return persisted
+
+    async def _write_pending(self) -> None:
+        while not self._queue.empty():
+            await self._write(await self._collect())
+
+    async def _collect(self) -> List[Tuple[ThreadMessage, asyncio.Future]]:
+        """Take the next batch: whatever arrives within batch_delay of its first message."""
+        loop = asyncio.get_running_loop()
+        batch = [self._queue.get_nowait()]
+        deadline = loop.time() + self.batch_delay
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[Tuple[ThreadMessage, asyncio.Future]]) -> None:
+        messages = [message for message, _ in batch]
+        try:
+            await database_sync_to_async(ChatService.persist_messages)(messages)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Error persisting chat message {messages[0].id}: {e}", exc_info=True)
+                self._resolve(batch[0][1], error=e)
+                return
+            # Every message was already broadcast: retry them one at a time, in order,
+            # so only the message the database rejects is lost
+            logger.warning(f"Error persisting {len(messages)} chat messages, retrying one by one: {e}")
+            for item in batch:
+                await self._write([item])
+            return
+
+        logger.debug(f"Persisted {len(messages)} chat messages")
+        for message, persisted in batch:
+            self._resolve(persisted, result=message)
+
+    @staticmethod
+    def _resolve(persisted: asyncio.Future, result=None, error: Optional[Exception] = None) -> None:
+        if persisted.done():
+            return
+        if error is not None:
+            persisted.set_exception(error)
+        else:
+            persisted.set_result(result)
+
+
+_buffers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MessageWriteBuffer]" = weakref.WeakKeyDictionary()
+
+
+def get_message_buffer() -> MessageWriteBuffer:
+    """Return the MessageWriteBuffer of the running event loop."""
+    loop = asyncio.get_running_loop()
+    buffer = _buffers.get(loop)
+    if buffer is None:
+        buffer = _buffers[loop] = MessageWriteBuffer()
+    return buffer
@@ -0,0 +1,101 @@
+"""
+TypingIndicator - server-side coalescing of typing frames
+
+Clients send a ``chat.typing`` frame on every keystroke. Rebroadcasting each
+one to the thread group meant dozens of channel-layer publishes per second
+per thread for a fast typist. Each connection now runs a two-state machine
+per thread (a ChatConsumer is bound to one thread):
+
+- idle -> typing on the first frame: publish ``started``
+- typing: further frames only push the expiry back, nothing is published
+- typing -> idle when no frame has arrived for CHAT_TYPING_TIMEOUT seconds,
+  CHAT_TYPING_STOP_DELAY seconds after an explicit stop frame (so a stop
+  followed by more typing publishes nothing), or on disconnect: publish
+  ``stopped``
+- sending a message returns to idle silently; receivers clear the
+  indicator when the message arrives
+
+So a burst of typing costs at most one started and one stopped publish, and
+expiry is enforced by the server; clients don't need to send heartbeats or
+run their own timeouts.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from django.conf import settings
+
+from chat.infra.observability.metrics import typing_frames_total
+
+
+class TypingIndicator:
+    """
+    Typing state of one connection in one thread.
+
+    Args:
+        publish: Coroutine function called with True (started) or False (stopped)
+    """
+
+    IDLE = "idle"
+    TYPING = "typing"
+
+    def __init__(self, publish: Callable[[bool], Awaitable[None]]):
+        self._publish = publish
+        self.state = self.IDLE
+        self._deadline = 0.0
+        self._timer: Optional[asyncio.Task] = None
+
+    @property
+    def timeout(self) -> float:
+        return getattr(settings, "CHAT_TYPING_TIMEOUT", 5.0)
+
+    @property
+    def stop_delay(self) -> float:
+        return getattr(settings, "CHAT_TYPING_STOP_DELAY", 1.0)
+
+    async def frame(self, is_typing: bool = True) -> None:
+        """Handle a typing frame from the client."""
+        loop = asyncio.get_running_loop()
+        if not is_typing:
+            if self.state == self.TYPING:
+                self._deadline = min(self._deadline, loop.time() + self.stop_delay)
+            typing_frames_total.labels(result="coalesced").inc()
+            return
+
+        self._deadline = loop.time() + self.timeout
+        if self.state == self.TYPING:
+            typing_frames_total.labels(result="coalesced").inc()
+            return
+
+        self.state = self.TYPING
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._expire())
+        typing_frames_total.labels(result="published").inc()
+        await self._publish(True)
+
+    def reset(self) -> None:
+        """Return to idle without publishing (the user sent a message)."""
+        self.state = self.IDLE
+        self._cancel_timer()
+
+    async def close(self) -> None:
+        """Publish ``stopped`` if still typing; called on disconnect."""
+        self._cancel_timer()
+        if self.state == self.TYPING:
+            self.state = self.IDLE
+            await self._publish(False)
+
+    async def _expire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.state == self.TYPING:
+            remaining = self._deadline - loop.time()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            self.state = self.IDLE
+            await self._publish(False)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None and not self._timer.done() and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
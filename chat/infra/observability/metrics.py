@@ -0,0 +1,12 @@
+from prometheus_client import Counter
+
+
+# Channel Layer Metrics
+channel_layer_publishes_total = Counter(
+    "chat_channel_layer_publishes_total", "Group sends to the chat channel layer", ["event"]
+)
+
+# Typing Indicator Metrics
+typing_frames_total = Counter(
+    "chat_typing_frames_total", "Typing frames received (coalesced = absorbed without a publish)", ["result"]
+)
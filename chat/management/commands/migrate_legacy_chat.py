@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
@@ -36,6 +38,7 @@ class Command(BaseCommand):
                 # 3. Migrate Messages
                 legacy_messages = chat.messages.all()
                 new_messages = []
+                read_flags = {}
                 for msg in legacy_messages:
                     new_msg = ThreadMessage(
                         thread=thread,
@@ -43,7 +46,6 @@ class Command(BaseCommand):
                         message_type=msg.message_type,
                         text=msg.text_content,
                         image_url=msg.image_url,
-                        is_read=msg.is_read,
                     )
                     # We set created_at on the instance, but save() might override it due to auto_now_add=True
                     # So we have to save first, then update, OR use bulk_create which respects it if we are careful?
@@ -51,11 +53,35 @@ class Command(BaseCommand):
                     # unlike save(). Let's try bulk_create for messages for speed.
                     new_msg.created_at = msg.created_at
                     new_messages.append(new_msg)
+                    read_flags[new_msg.pk] = msg.is_read
 
                 if new_messages:
                     ThreadMessage.objects.bulk_create(new_messages)
                     migrated_messages += len(new_messages)
 
+                    # 4. Denormalized conversation list fields
+                    new_messages.sort(key=lambda m: m.created_at)
+                    last = new_messages[-1]
+                    Thread.objects.filter(pk=thread.pk).update(last_message=last, last_message_at=last.created_at)
+
+                    # 5. Read watermarks: just before each user's oldest unread legacy message
+                    for user in (chat.user1, chat.user2):
+                        unread = [m for m in new_messages if m.sender_id != user.id and not read_flags[m.pk]]
+                        if unread:
+                            last_read_at = unread[0].created_at - timedelta(microseconds=1)
+                        else:
+                            last_read_at = last.created_at
+                        read = [m for m in new_messages if m.created_at <= last_read_at]
+                        ThreadParticipant.objects.filter(thread=thread, user=user).update(
+                            last_read_at=last_read_at,
+                            last_read_message=read[-1] if read else None,
+                            unread_count=sum(
+                                1 for m in new_messages if m.sender_id != user.id and m.created_at > last_read_at
+                            ),
+                        )
+                else:
+                    Thread.objects.filter(pk=thread.pk).update(last_message_at=chat.created_at)
+
                 migrated_threads += 1
 
                 if migrated_threads % 100 == 0:
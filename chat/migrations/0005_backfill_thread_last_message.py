@@ -0,0 +1,45 @@
+"""
+Fill Thread.last_message/last_message_at and ThreadParticipant.unread_count.
+
+Each is one UPDATE with a correlated subquery: the newest message of every
+thread, and for every participant the unread messages sent by others.
+"""
+
+from django.db import migrations
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    Thread = apps.get_model("chat", "Thread")
+    ThreadMessage = apps.get_model("chat", "ThreadMessage")
+    ThreadParticipant = apps.get_model("chat", "ThreadParticipant")
+
+    latest = ThreadMessage.objects.filter(thread=OuterRef("pk")).order_by("-created_at")
+    Thread.objects.update(
+        last_message=Subquery(latest.values("pk")[:1]),
+        last_message_at=Coalesce(Subquery(latest.values("created_at")[:1]), F("created_at")),
+    )
+
+    unread = (
+        ThreadMessage.objects.filter(thread=OuterRef("thread_id"), is_read=False)
+        .exclude(sender=OuterRef("user_id"))
+        .order_by()
+        .values("thread")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    ThreadParticipant.objects.update(
+        unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_thread_last_message_unread_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:27
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+BATCH_SIZE = 1000
+
+
+def is_read_to_watermarks(apps, schema_editor):
+    """
+    Derive every participant's read watermark from ThreadMessage.is_read.
+
+    A participant with unread messages from others is placed just before the
+    oldest of them; otherwise its last_read_at is kept. The watermark message
+    and the unread counter are then filled from last_read_at with one UPDATE
+    each.
+    """
+    ThreadMessage = apps.get_model("chat", "ThreadMessage")
+    ThreadParticipant = apps.get_model("chat", "ThreadParticipant")
+
+    oldest_unread = (
+        ThreadMessage.objects.filter(thread=OuterRef("thread_id"), is_read=False)
+        .exclude(sender=OuterRef("user_id"))
+        .order_by("created_at")
+        .values("created_at")[:1]
+    )
+    batch = []
+    for participant in (
+        ThreadParticipant.objects.annotate(oldest_unread=Subquery(oldest_unread))
+        .filter(oldest_unread__isnull=False)
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        participant.last_read_at = participant.oldest_unread - timedelta(microseconds=1)
+        batch.append(participant)
+        if len(batch) >= BATCH_SIZE:
+            ThreadParticipant.objects.bulk_update(batch, ["last_read_at"])
+            batch = []
+    ThreadParticipant.objects.bulk_update(batch, ["last_read_at"])
+
+    read_up_to = ThreadMessage.objects.filter(
+        thread=OuterRef("thread_id"), created_at__lte=OuterRef("last_read_at")
+    ).order_by("-created_at")
+    unread = (
+        ThreadMessage.objects.filter(thread=OuterRef("thread_id"), created_at__gt=OuterRef("last_read_at"))
+        .exclude(sender=OuterRef("user_id"))
+        .order_by()
+        .values("thread")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    ThreadParticipant.objects.update(
+        last_read_message=Subquery(read_up_to.values("pk")[:1]),
+        unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)),
+    )
+
+
+def watermarks_to_is_read(apps, schema_editor):
+    ThreadMessage = apps.get_model("chat", "ThreadMessage")
+    ThreadParticipant = apps.get_model("chat", "ThreadParticipant")
+
+    for thread_id, user_id, last_read_at in ThreadParticipant.objects.values_list(
+        "thread_id", "user_id", "last_read_at"
+    ).iterator(chunk_size=BATCH_SIZE):
+        ThreadMessage.objects.filter(thread_id=thread_id, created_at__lte=last_read_at).exclude(
+            sender_id=user_id
+        ).update(is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_backfill_thread_last_message"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="threadparticipant",
+            name="last_read_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="chat.threadmessage",
+            ),
+        ),
+        migrations.RunPython(is_read_to_watermarks, watermarks_to_is_read),
+        migrations.RemoveField(
+            model_name="threadmessage",
+            name="is_read",
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_read_watermark"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="threadmessage",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
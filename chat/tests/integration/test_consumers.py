@@ -1,10 +1,14 @@
+import asyncio
+import uuid
+
 from channels.db import database_sync_to_async
 from channels.testing import WebsocketCommunicator
 from django.contrib.auth import get_user_model
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 
 from chat.api.consumers import ChatConsumer
-from chat.domain.models import Thread, ThreadParticipant
+from chat.domain.models import Thread, ThreadMessage, ThreadParticipant
+from chat.domain.services.message_buffer import MessageWriteBuffer
 
 
 User = get_user_model()
@@ -57,4 +61,126 @@ class ChatConsumerTests(TransactionTestCase):
         self.assertEqual(response["data"]["text"], "Hello Integration")
         self.assertEqual(response["data"]["sender_id"], str(self.user.id))
 
+        # Acknowledged once the write-behind batch is committed
+        ack = await communicator.receive_json_from()
+        self.assertEqual(
+            ack, {"type": "chat.ack", "data": {"id": response["data"]["id"], "client_id": None, "status": "persisted"}}
+        )
+        message = await database_sync_to_async(ThreadMessage.objects.get)(id=ack["data"]["id"])
+        self.assertEqual(message.text, "Hello Integration")
+
+        await communicator.disconnect()
+
+    async def test_write_buffer_batches_in_order(self):
+        other = await database_sync_to_async(User.objects.create_user)(
+            username="other", email="other@test.com", password="pw"
+        )
+        await database_sync_to_async(ThreadParticipant.objects.create)(thread=self.thread, user=other)
+        messages = [
+            ThreadMessage(thread_id=self.thread.id, sender=self.user if i % 2 else other, text=str(i))
+            for i in range(5)
+        ]
+
+        buffer = MessageWriteBuffer()
+        await asyncio.gather(*[buffer.submit(message) for message in messages])
+
+        stored = await database_sync_to_async(list)(
+            self.thread.messages.order_by("created_at").values_list("text", flat=True)
+        )
+        self.assertEqual(stored, ["0", "1", "2", "3", "4"])
+        thread = await database_sync_to_async(Thread.objects.get)(pk=self.thread.pk)
+        self.assertEqual(thread.last_message_id, messages[-1].id)
+        unread = await database_sync_to_async(dict)(
+            self.thread.thread_participants.values_list("user_id", "unread_count")
+        )
+        self.assertEqual(unread, {self.user.id: 3, other.id: 2})
+
+    async def test_rejected_message_does_not_roll_back_its_batch(self):
+        messages = [
+            ThreadMessage(thread_id=self.thread.id, sender=self.user, text="kept"),
+            # Thread deleted while the sender was still connected
+            ThreadMessage(thread_id=uuid.uuid4(), sender=self.user, text="orphan"),
+            ThreadMessage(thread_id=self.thread.id, sender=self.user, text="also kept"),
+        ]
+
+        buffer = MessageWriteBuffer()
+        results = await asyncio.gather(*[buffer.submit(message) for message in messages], return_exceptions=True)
+
+        self.assertEqual(results[0], messages[0])
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2], messages[2])
+        stored = await database_sync_to_async(list)(
+            ThreadMessage.objects.order_by("created_at").values_list("text", flat=True)
+        )
+        self.assertEqual(stored, ["kept", "also kept"])
+
+    async def test_invalid_message_is_not_broadcast(self):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{self.thread.id}/")
+        communicator.scope["user"] = self.user
+        communicator.scope["url_route"] = {"kwargs": {"thread_id": str(self.thread.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await communicator.send_json_to({"type": "chat.message", "payload": {"image_url": "x" * 501}})
+
+        response = await communicator.receive_json_from()
+        self.assertEqual(response["type"], "error")
+        self.assertTrue(await communicator.receive_nothing())
+        self.assertFalse(await database_sync_to_async(ThreadMessage.objects.exists)())
+        await communicator.disconnect()
+
+    async def test_load_older_messages(self):
+        for i in range(3):
+            await database_sync_to_async(ThreadMessage.objects.create)(
+                thread=self.thread, sender=self.user, text=f"{i}"
+            )
+
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{self.thread.id}/")
+        communicator.scope["user"] = self.user
+        communicator.scope["url_route"] = {"kwargs": {"thread_id": str(self.thread.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await communicator.send_json_to({"type": "chat.load_older", "payload": {"page_size": 2}})
+        response = await communicator.receive_json_from()
+        self.assertEqual(response["type"], "chat.history")
+        self.assertEqual([m["text"] for m in response["data"]["messages"]], ["2", "1"])
+        self.assertTrue(response["data"]["has_older"])
+
+        before = response["data"]["before_cursor"]
+        await communicator.send_json_to({"type": "chat.load_older", "payload": {"before": before, "page_size": 2}})
+        response = await communicator.receive_json_from()
+        self.assertEqual([m["text"] for m in response["data"]["messages"]], ["0"])
+        self.assertFalse(response["data"]["has_older"])
+
         await communicator.disconnect()
+
+    @override_settings(CHAT_TYPING_TIMEOUT=0.1)
+    async def test_typing_frames_are_coalesced(self):
+        other = await database_sync_to_async(User.objects.create_user)(
+            username="other", email="other@test.com", password="pw"
+        )
+        await database_sync_to_async(ThreadParticipant.objects.create)(thread=self.thread, user=other)
+
+        communicators = []
+        for user in (self.user, other):
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{self.thread.id}/")
+            communicator.scope["user"] = user
+            communicator.scope["url_route"] = {"kwargs": {"thread_id": str(self.thread.id)}}
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            communicators.append(communicator)
+        typist, watcher = communicators
+
+        for _ in range(10):
+            await typist.send_json_to({"type": "chat.typing"})
+
+        started = await watcher.receive_json_from()
+        self.assertEqual((started["type"], started["is_typing"]), ("chat.typing", True))
+        # No heartbeat needed: the server expires the indicator
+        stopped = await watcher.receive_json_from(timeout=1)
+        self.assertFalse(stopped["is_typing"])
+        self.assertTrue(await watcher.receive_nothing())
+
+        for communicator in communicators:
+            await communicator.disconnect()
@@ -54,20 +54,104 @@ class ChatServiceTests(TestCase):
         with self.assertRaises(PermissionDenied):
             self.service.send_message(self.outsider, self.thread.id, "Intruder")
 
-    def test_get_history_pagination(self):
+    def test_get_history_cursor_pagination(self):
         # Create 25 messages
         for i in range(25):
             ThreadMessage.objects.create(thread=self.thread, sender=self.user1, text=f"Msg {i}")
 
-        page1 = self.service.get_conversation_history(self.user1, self.thread.id, page=1, page_size=10)
-        self.assertEqual(len(page1), 10)
-
-        page2 = self.service.get_conversation_history(self.user1, self.thread.id, page=2, page_size=10)
-        self.assertEqual(len(page2), 10)
-
-        page3 = self.service.get_conversation_history(self.user1, self.thread.id, page=3, page_size=10)
-        self.assertEqual(len(page3), 5)
+        page1 = self.service.get_conversation_history(self.user1, self.thread.id, page_size=10)
+        self.assertEqual([m.text for m in page1["results"]][:2], ["Msg 24", "Msg 23"])
+        self.assertTrue(page1["has_older"])
+        self.assertFalse(page1["has_newer"])
+
+        # Scrolling back costs the same two queries (participants, messages) at any depth
+        with self.assertNumQueries(2):
+            page2 = self.service.get_conversation_history(
+                self.user1, self.thread.id, before=page1["before_cursor"], page_size=10
+            )
+        self.assertEqual(len(page2["results"]), 10)
+
+        page3 = self.service.get_conversation_history(
+            self.user1, self.thread.id, before=page2["before_cursor"], page_size=10
+        )
+        self.assertEqual([m.text for m in page3["results"]], [f"Msg {i}" for i in range(4, -1, -1)])
+        self.assertFalse(page3["has_older"])
+        self.assertTrue(page3["has_newer"])
+
+        newer = self.service.get_conversation_history(
+            self.user1, self.thread.id, after=page3["after_cursor"], page_size=10
+        )
+        self.assertEqual(newer["results"], page2["results"])
+        self.assertTrue(newer["has_newer"])
 
     def test_get_history_permission_denied(self):
         with self.assertRaises(PermissionDenied):
             self.service.get_conversation_history(self.outsider, self.thread.id)
+
+
+class ConversationListTests(TestCase):
+    def setUp(self):
+        broadcast = patch("chat.domain.services.chat_service.async_to_sync")
+        broadcast.start()
+        self.addCleanup(broadcast.stop)
+
+        self.user = User.objects.create_user(username="u1", email="u1@example.com", password="pw")
+        self.service = ChatService()
+        self.threads = []
+        for i in range(5):
+            other = User.objects.create_user(username=f"other{i}", email=f"o{i}@example.com", password="pw")
+            thread = Thread.objects.create()
+            ThreadParticipant.objects.create(thread=thread, user=self.user)
+            ThreadParticipant.objects.create(thread=thread, user=other)
+            self.service.send_message(other, thread.id, f"Hi {i}")
+            self.threads.append((thread, other))
+
+    def test_send_message_updates_last_message_and_unread_counters(self):
+        thread, other = self.threads[0]
+        self.service.send_message(other, thread.id, "Again")
+        message = self.service.send_message(other, thread.id, "And again")
+
+        thread.refresh_from_db()
+        self.assertEqual(thread.last_message_id, message.id)
+        self.assertEqual(thread.last_message_at, message.created_at)
+        self.assertEqual(ThreadParticipant.objects.get(thread=thread, user=self.user).unread_count, 3)
+        self.assertEqual(ThreadParticipant.objects.get(thread=thread, user=other).unread_count, 0)
+
+        self.service.mark_messages_as_read(self.user, thread.id)
+        self.assertEqual(ThreadParticipant.objects.get(thread=thread, user=self.user).unread_count, 0)
+
+    def test_list_is_keyset_paginated_in_two_queries(self):
+        from chat.api.serializers.conversation_serializers import ThreadSerializer
+
+        with self.assertNumQueries(2):
+            page = self.service.list_conversations(self.user, page_size=3)
+            data = ThreadSerializer(page["results"], many=True).data
+
+        # Newest conversation first
+        self.assertEqual([t["last_message"]["text"] for t in data], ["Hi 4", "Hi 3", "Hi 2"])
+        self.assertEqual([t["unread_count"] for t in data], [1, 1, 1])
+        self.assertTrue(page["has_next"])
+
+        page = self.service.list_conversations(self.user, page_size=3, cursor=page["next_cursor"])
+        self.assertEqual([t.last_message.text for t in page["results"]], ["Hi 1", "Hi 0"])
+        self.assertFalse(page["has_next"])
+
+    def test_mark_read_moves_the_watermark_in_one_update(self):
+        from chat.api.serializers.conversation_serializers import ThreadMessageSerializer
+
+        thread, other = self.threads[0]
+        message = self.service.send_message(other, thread.id, "Unread")
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.service.mark_messages_as_read(self.user, thread.id), 2)
+
+        participant = ThreadParticipant.objects.get(thread=thread, user=self.user)
+        self.assertEqual(participant.last_read_message_id, message.id)
+        self.assertEqual(participant.last_read_at, message.created_at)
+        self.assertEqual(participant.unread_count, 0)
+
+        reply = self.service.send_message(self.user, thread.id, "Reply")
+        context = {"read_watermarks": ChatService.read_watermarks(thread.thread_participants.all())}
+        data = ThreadMessageSerializer([message, reply], many=True, context=context).data
+        self.assertEqual([m["is_read"] for m in data], [True, False])
+        self.assertEqual(self.service.mark_messages_as_read(self.user, thread.id), 0)
@@ -0,0 +1,50 @@
+import asyncio
+
+from django.test import SimpleTestCase, override_settings
+
+from chat.domain.services.typing import TypingIndicator
+from chat.infra.observability.metrics import typing_frames_total
+
+
+@override_settings(CHAT_TYPING_TIMEOUT=0.05, CHAT_TYPING_STOP_DELAY=0.02)
+class TypingIndicatorTests(SimpleTestCase):
+    def setUp(self):
+        self.published = []
+
+        async def publish(is_typing):
+            self.published.append(is_typing)
+
+        self.typing = TypingIndicator(publish)
+
+    async def test_burst_of_frames_publishes_started_once_then_expires(self):
+        coalesced = typing_frames_total.labels(result="coalesced")._value.get()
+
+        for _ in range(20):
+            await self.typing.frame()
+        self.assertEqual(self.published, [True])
+        self.assertEqual(typing_frames_total.labels(result="coalesced")._value.get() - coalesced, 19)
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.published, [True, False])
+        self.assertEqual(self.typing.state, TypingIndicator.IDLE)
+
+    async def test_stop_followed_by_typing_publishes_nothing(self):
+        await self.typing.frame()
+        await self.typing.frame(is_typing=False)
+        await self.typing.frame()
+        await asyncio.sleep(0.03)
+        self.assertEqual(self.published, [True])
+
+        await self.typing.frame(is_typing=False)
+        await asyncio.sleep(0.04)
+        self.assertEqual(self.published, [True, False])
+
+    async def test_message_resets_silently_and_close_publishes_stop(self):
+        await self.typing.frame()
+        self.typing.reset()
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.published, [True])
+
+        await self.typing.frame()
+        await self.typing.close()
+        self.assertEqual(self.published, [True, True, False])
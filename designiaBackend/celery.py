@@ -40,6 +40,48 @@ app.conf.beat_schedule = {
         "schedule": 60.0 * 60.0,  # Every hour
         "options": {"expires": 15.0 * 60.0, "queue": "payment_tasks"},  # Expire after 15 minutes
     },
+    # Recompute time-decayed trending products and autocomplete popularity every 15 minutes
+    "refresh-trending-products": {
+        "task": "marketplace.tasks.refresh_trending_products_task",
+        "schedule": 15.0 * 60.0,
+        "options": {"expires": 10.0 * 60.0, "queue": "marketplace_tasks"},  # Skip if the next run is close
+    },
+    # Write buffered product view/click/favorite counters
+    "flush-product-counters": {
+        "task": "marketplace.tasks.flush_product_counters_task",
+        "schedule": 30.0,
+        "options": {"expires": 25.0, "queue": "marketplace_tasks"},
+    },
+    # Write buffered activity events (views, clicks, cart/favorite actions) to UserClick
+    "drain-activity-events": {
+        "task": "marketplace.tasks.drain_activity_events_task",
+        "schedule": 10.0,
+        "options": {"expires": 9.0, "queue": "marketplace_tasks"},
+    },
+    # Refresh today's per-product activity summaries
+    "rollup-activity-summaries": {
+        "task": "marketplace.tasks.rollup_activity_summaries_task",
+        "schedule": 60.0 * 60.0,  # Every hour
+        "options": {"expires": 30.0 * 60.0, "queue": "marketplace_tasks"},
+    },
+    # Refresh hourly/daily per-product activity rollups for analytics
+    "rollup-product-activity": {
+        "task": "marketplace.tasks.rollup_product_activity_task",
+        "schedule": 5.0 * 60.0,
+        "options": {"expires": 4.0 * 60.0, "queue": "marketplace_tasks"},
+    },
+    # Move raw activity events past the retention window to S3 archives
+    "archive-activity-events": {
+        "task": "marketplace.tasks.archive_activity_events_task",
+        "schedule": 60.0 * 60.0 * 24.0,  # 24 hours
+        "options": {"expires": 60.0 * 60.0, "queue": "marketplace_tasks"},
+    },
+    # Rebuild the related-products table nightly
+    "refresh-related-products": {
+        "task": "marketplace.tasks.refresh_related_products_task",
+        "schedule": 60.0 * 60.0 * 24.0,  # 24 hours
+        "options": {"expires": 60.0 * 60.0, "queue": "marketplace_tasks"},  # Expire after 1 hour
+    },
 }
 
 # Celery configuration settings
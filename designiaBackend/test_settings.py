@@ -34,3 +34,10 @@ else:
     REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"] = [  # noqa: F405
         "rest_framework.authentication.SessionAuthentication"
     ]
+
+# Write product counters through on every increment so tests see them immediately
+PRODUCT_COUNTER_BACKEND = "memory"
+PRODUCT_COUNTER_FLUSH_INTERVAL = 0
+
+# Merge unique-visitor sketches on every event for the same reason
+ACTIVITY_SKETCH_FLUSH_INTERVAL = 0
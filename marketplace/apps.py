@@ -6,6 +6,9 @@ class MarketplaceConfig(AppConfig):
     name = "marketplace"
 
     def ready(self):
+        # Keep the autocomplete index in sync with catalog writes
+        import marketplace.catalog.signals  # noqa: F401
+
         # Register event listeners
         try:
             from marketplace.infra.events.listeners import register_marketplace_listeners
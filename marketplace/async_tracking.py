@@ -1,327 +1,133 @@
 """
 Asynchronous tracking system for marketplace activities.
 
-This module provides background task processing for user activity tracking,
-allowing the API to return responses immediately while processing metrics
-asynchronously for better performance.
+Tracking calls only append an event to the durable activity buffer (see
+marketplace.catalog.domain.services.activity_ingestion), so the API can
+return immediately. A background drainer thread in each process, and the
+``drain_activity_events_task`` Celery beat job, write buffered events to
+UserClick in batches.
 """
 
 import logging
-import queue
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.http import HttpRequest
 
+from marketplace.catalog.domain.services.activity_ingestion import get_activity_ingestion
+
 
-User = get_user_model()
 logger = logging.getLogger(__name__)
 
-# Global thread pool for background processing
-_thread_pool = None
-_processing_queue = queue.Queue()
 _processing_thread = None
+_processing_thread_lock = threading.Lock()
 
 
 class AsyncTracker:
     """
-    Asynchronous tracker that queues tasks for background processing.
+    Asynchronous tracker that buffers activity events for batched processing.
 
     This allows the main API response to return immediately while
     metrics processing happens in the background.
     """
 
+    # Page-level actions recorded as one event per request for all products shown
+    IMPRESSION_ACTIONS = frozenset({"listing_view", "category_view", "search_view"})
+
     @staticmethod
     def initialize():
-        """Initialize the async tracking system."""
-        global _thread_pool, _processing_thread
-
-        if _thread_pool is None:
-            _thread_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="async_tracker")
-            logger.info("Initialized AsyncTracker thread pool")
-
-        if _processing_thread is None or not _processing_thread.is_alive():
-            _processing_thread = threading.Thread(
-                target=AsyncTracker._background_processor, daemon=True, name="metrics_processor"
-            )
-            _processing_thread.start()
-            logger.info("Started background metrics processor thread")
+        """Start the background drainer thread (ACTIVITY_INGESTION_DRAIN_THREAD)."""
+        global _processing_thread
+
+        if not getattr(settings, "ACTIVITY_INGESTION_DRAIN_THREAD", True):
+            return
+        if _processing_thread is not None and _processing_thread.is_alive():
+            return
+        with _processing_thread_lock:
+            if _processing_thread is None or not _processing_thread.is_alive():
+                _processing_thread = threading.Thread(
+                    target=AsyncTracker._background_processor, daemon=True, name="activity_drainer"
+                )
+                _processing_thread.start()
+                logger.info("Started background activity drainer thread")
 
     @staticmethod
     def _background_processor():
-        """Background thread that processes queued tracking tasks."""
-        logger.info("Background metrics processor started")
+        """Background thread that drains the activity buffer."""
+        logger.info("Background activity drainer started")
+        ingestion = get_activity_ingestion()
 
         while True:
             try:
-                # Get task from queue with timeout
-                try:
-                    task = _processing_queue.get(timeout=5.0)
-                except queue.Empty:
-                    continue
-
-                # Process the task
-                AsyncTracker._process_task(task)
-                _processing_queue.task_done()
-
+                ingestion.drain()
             except Exception as e:
-                logger.error(f"Error in background processor: {str(e)}")
-                time.sleep(1)  # Brief delay before continuing
-
-    @staticmethod
-    def _process_task(task: Dict[str, Any]):
-        """Process a single tracking task."""
-        try:
-            task_type = task.get("type")
-            task_data = task.get("data", {})
-
-            if task_type == "listing_view":
-                AsyncTracker._process_listing_view(task_data)
-            elif task_type == "product_view":
-                AsyncTracker._process_product_view(task_data)
-            elif task_type == "product_click":
-                AsyncTracker._process_product_click(task_data)
-            elif task_type == "cart_action":
-                AsyncTracker._process_cart_action(task_data)
-            elif task_type == "favorite_action":
-                AsyncTracker._process_favorite_action(task_data)
-            else:
-                logger.warning(f"Unknown task type: {task_type}")
-
-        except Exception as e:
-            logger.error(f"Error processing task {task.get('type', 'unknown')}: {str(e)}")
-
-    @staticmethod
-    def _process_listing_view(data: Dict[str, Any]):
-        """Process listing view tracking in background."""
-        try:
-            from activity.models import UserClick
-            from marketplace.models import Product
-
-            from .tracking_utils import MetricsHelper
-
-            product_ids = data.get("product_ids", [])
-            user_id = data.get("user_id")
-            session_key = data.get("session_key")
-            _timestamp = data.get("timestamp")
-            request_meta = data.get("request_meta", {})
-
-            # Get products
-            products = Product.objects.filter(id__in=product_ids, is_active=True)
-
-            # Ensure metrics exist (bulk operation)
-            MetricsHelper.bulk_ensure_metrics(list(products))
-
-            # Get user if authenticated
-            user = None
-            if user_id:
-                try:
-                    user = User.objects.get(id=user_id)
-                except User.DoesNotExist:
-                    pass
-
-            # Create a mock request object with stored metadata
-            mock_request = AsyncTracker._create_mock_request(request_meta)
-
-            # Track views for each product
-            tracked_count = 0
-            for product in products:
-                try:
-                    UserClick.track_activity(
-                        product=product,
-                        action="listing_view",
-                        user=user,
-                        session_key=session_key,
-                        request=mock_request,
-                    )
-                    tracked_count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to track listing view for product {product.id}: {str(e)}")
-                    continue
-
-            logger.debug(f"Background listing tracking: {tracked_count}/{len(product_ids)} products")
-
-        except Exception as e:
-            logger.error(f"Error in background listing view processing: {str(e)}")
+                # The failed batch stays in the buffer and is retried on the next pass
+                logger.error(f"Error in background activity drainer: {str(e)}")
+            time.sleep(getattr(settings, "ACTIVITY_INGESTION_DRAIN_INTERVAL", 2))
 
     @staticmethod
-    def _process_product_view(data: Dict[str, Any]):
-        """Process single product view tracking in background."""
-        try:
-            from activity.models import UserClick
-            from marketplace.models import Product
-
-            from .tracking_utils import MetricsHelper
-
-            product_id = data.get("product_id")
-            user_id = data.get("user_id")
-            session_key = data.get("session_key")
-            _timestamp = data.get("timestamp")
-            request_meta = data.get("request_meta", {})
-
-            # Get product
-            try:
-                product = Product.objects.get(id=product_id, is_active=True)
-            except Product.DoesNotExist:
-                logger.warning(f"Product {product_id} not found for view tracking")
-                return
-
-            # Ensure metrics exist
-            MetricsHelper.ensure_metrics_exist(product)
-
-            # Get user if authenticated
-            user = None
-            if user_id:
-                try:
-                    user = User.objects.get(id=user_id)
-                except User.DoesNotExist:
-                    pass
-
-            # Create a mock request object with stored metadata
-            mock_request = AsyncTracker._create_mock_request(request_meta)
-
-            # Track the view
-            UserClick.track_activity(
-                product=product, action="detail_view", user=user, session_key=session_key, request=mock_request
-            )
-
-            logger.info(f"Background view tracking: Product {product.name}")
+    def _visitor(request: Optional[HttpRequest], create_session: bool = True) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Return (user_id, session_key) for a request.
 
-        except Exception as e:
-            logger.error(f"Error in background product view processing: {str(e)}")
+        Anonymous visitors get a session unless create_session is False, in
+        which case only an existing session key is used. Events queued outside
+        a request (request is None) have no visitor.
+        """
+        if request is None:
+            return None, None
+        if request.user.is_authenticated:
+            return request.user.id, None
+        if create_session and not request.session.session_key:
+            request.session.save()
+        return None, request.session.session_key
 
     @staticmethod
-    def _process_product_click(data: Dict[str, Any]):
-        """Process product click tracking in background."""
-        try:
-            from activity.models import UserClick
-            from marketplace.models import Product
-
-            from .tracking_utils import MetricsHelper
-
-            product_id = data.get("product_id")
-            user_id = data.get("user_id")
-            session_key = data.get("session_key")
-            _timestamp = data.get("timestamp")
-            request_meta = data.get("request_meta", {})
-
-            # Get product
-            try:
-                product = Product.objects.get(id=product_id, is_active=True)
-            except Product.DoesNotExist:
-                logger.warning(f"Product {product_id} not found for click tracking")
-                return
-
-            # Ensure metrics exist
-            MetricsHelper.ensure_metrics_exist(product)
-
-            # Get user if authenticated
-            user = None
-            if user_id:
-                try:
-                    user = User.objects.get(id=user_id)
-                except User.DoesNotExist:
-                    pass
-
-            # Create a mock request object with stored metadata
-            mock_request = AsyncTracker._create_mock_request(request_meta)
-
-            # Track the click
-            UserClick.track_activity(
-                product=product, action="click", user=user, session_key=session_key, request=mock_request
-            )
-
-            logger.info(f"Background click tracking: Product {product.name}")
-
-        except Exception as e:
-            logger.error(f"Error in background product click processing: {str(e)}")
+    def _record(action: str, product_ids, user_id, session_key, request: Optional[HttpRequest]) -> bool:
+        AsyncTracker.initialize()
+        return get_activity_ingestion().record(
+            action,
+            product_ids,
+            user_id=user_id,
+            session_key=session_key,
+            request_meta=AsyncTracker._extract_request_meta(request),
+        )
 
     @staticmethod
-    def _process_cart_action(data: Dict[str, Any]):
-        """Process cart action tracking in background."""
-        try:
-            from activity.models import UserClick
-            from marketplace.models import Product
-
-            from .tracking_utils import MetricsHelper
-
-            product_id = data.get("product_id")
-            user_id = data.get("user_id")
-            action = data.get("action", "cart_add")  # cart_add or cart_remove
-            quantity = data.get("quantity", 1)
-            _timestamp = data.get("timestamp")
-            request_meta = data.get("request_meta", {})
-
-            # Get product and user
-            try:
-                product = Product.objects.get(id=product_id, is_active=True)
-                user = User.objects.get(id=user_id) if user_id else None
-            except (Product.DoesNotExist, User.DoesNotExist):
-                logger.warning(f"Product {product_id} or user {user_id} not found for cart tracking")
-                return
-
-            if not user:
-                logger.warning("Cart tracking requires authenticated user")
-                return
-
-            # Ensure metrics exist
-            MetricsHelper.ensure_metrics_exist(product)
-
-            # Create a mock request object with stored metadata
-            mock_request = AsyncTracker._create_mock_request(request_meta)
-
-            # Track the cart action
-            UserClick.track_activity(product=product, action=action, user=user, request=mock_request)
+    def queue_impressions(action: str, products: List, request: HttpRequest) -> bool:
+        """
+        Queue one impression event for every product shown on a page.
 
-            logger.info(f"Background cart tracking: {action} {quantity}x {product.name}")
+        The whole page is buffered as a single event holding the product ids;
+        the activity drain expands it into per-product UserClick rows and
+        metric increments. Nothing is written during the request: anonymous
+        visitors without a session are recorded without one rather than
+        creating a session.
 
-        except Exception as e:
-            logger.error(f"Error in background cart action processing: {str(e)}")
+        Args:
+            action: 'listing_view', 'category_view' or 'search_view'
+            products: Product instances or primary keys shown on the page
+            request: HTTP request
 
-    @staticmethod
-    def _process_favorite_action(data: Dict[str, Any]):
-        """Process favorite action tracking in background."""
+        Returns:
+            bool: True if queued successfully
+        """
+        if action not in AsyncTracker.IMPRESSION_ACTIONS:
+            raise ValueError(f"Not an impression action: {action}")
         try:
-            from activity.models import UserClick
-            from marketplace.models import Product
-
-            from .tracking_utils import MetricsHelper
-
-            product_id = data.get("product_id")
-            user_id = data.get("user_id")
-            action = data.get("action", "favorite")  # favorite or unfavorite
-            _timestamp = data.get("timestamp")
-            request_meta = data.get("request_meta", {})
-
-            # Get product and user
-            try:
-                product = Product.objects.get(id=product_id, is_active=True)
-                user = User.objects.get(id=user_id) if user_id else None
-            except (Product.DoesNotExist, User.DoesNotExist):
-                logger.warning(f"Product {product_id} or user {user_id} not found for favorite tracking")
-                return
-
-            if not user:
-                logger.warning("Favorite tracking requires authenticated user")
-                return
-
-            # Ensure metrics exist
-            MetricsHelper.ensure_metrics_exist(product)
-
-            # Create a mock request object with stored metadata
-            mock_request = AsyncTracker._create_mock_request(request_meta)
-
-            # Track the favorite action
-            UserClick.track_activity(product=product, action=action, user=user, request=mock_request)
-
-            logger.info(f"Background favorite tracking: {action} {product.name}")
+            if not products:
+                return True
+            user_id, session_key = AsyncTracker._visitor(request, create_session=False)
+            product_ids = [getattr(product, "pk", product) for product in products]
+            queued = AsyncTracker._record(action, product_ids, user_id, session_key, request)
+            logger.debug(f"Queued {action} impressions for {len(product_ids)} products")
+            return queued
 
         except Exception as e:
-            logger.error(f"Error in background favorite action processing: {str(e)}")
+            logger.error(f"Error queuing {action} impressions: {str(e)}")
+            return False
 
     @staticmethod
     def queue_listing_view(products: List, request: HttpRequest) -> bool:
@@ -335,37 +141,17 @@ class AsyncTracker:
         Returns:
             bool: True if queued successfully
         """
-        try:
-            AsyncTracker.initialize()
-
-            # Extract user and session info
-            user_id = request.user.id if request.user.is_authenticated else None
-            session_key = None
-
-            if not user_id:
-                if not request.session.session_key:
-                    request.session.save()
-                session_key = request.session.session_key
-
-            # Prepare task data
-            task_data = {
-                "product_ids": [product.id for product in products],
-                "user_id": user_id,
-                "session_key": session_key,
-                "timestamp": datetime.now().isoformat(),
-                "request_meta": AsyncTracker._extract_request_meta(request),
-            }
+        return AsyncTracker.queue_impressions("listing_view", products, request)
 
-            # Queue the task
-            task = {"type": "listing_view", "data": task_data}
-
-            _processing_queue.put(task)
-            logger.debug(f"Queued listing view tracking for {len(products)} products")
-            return True
+    @staticmethod
+    def queue_category_view(products: List, request: HttpRequest) -> bool:
+        """Queue category listing impressions for background processing."""
+        return AsyncTracker.queue_impressions("category_view", products, request)
 
-        except Exception as e:
-            logger.error(f"Error queuing listing view tracking: {str(e)}")
-            return False
+    @staticmethod
+    def queue_search_view(products: List, request: HttpRequest) -> bool:
+        """Queue search result impressions for background processing."""
+        return AsyncTracker.queue_impressions("search_view", products, request)
 
     @staticmethod
     def queue_product_view(product, request: HttpRequest) -> bool:
@@ -380,32 +166,10 @@ class AsyncTracker:
             bool: True if queued successfully
         """
         try:
-            AsyncTracker.initialize()
-
-            # Extract user and session info
-            user_id = request.user.id if request.user.is_authenticated else None
-            session_key = None
-
-            if not user_id:
-                if not request.session.session_key:
-                    request.session.save()
-                session_key = request.session.session_key
-
-            # Prepare task data
-            task_data = {
-                "product_id": product.id,
-                "user_id": user_id,
-                "session_key": session_key,
-                "timestamp": datetime.now().isoformat(),
-                "request_meta": AsyncTracker._extract_request_meta(request),
-            }
-
-            # Queue the task
-            task = {"type": "product_view", "data": task_data}
-
-            _processing_queue.put(task)
+            user_id, session_key = AsyncTracker._visitor(request)
+            queued = AsyncTracker._record("detail_view", [product.id], user_id, session_key, request)
             logger.debug(f"Queued product view tracking for {product.name}")
-            return True
+            return queued
 
         except Exception as e:
             logger.error(f"Error queuing product view tracking: {str(e)}")
@@ -424,32 +188,10 @@ class AsyncTracker:
             bool: True if queued successfully
         """
         try:
-            AsyncTracker.initialize()
-
-            # Extract user and session info
-            user_id = request.user.id if request.user.is_authenticated else None
-            session_key = None
-
-            if not user_id:
-                if not request.session.session_key:
-                    request.session.save()
-                session_key = request.session.session_key
-
-            # Prepare task data
-            task_data = {
-                "product_id": product.id,
-                "user_id": user_id,
-                "session_key": session_key,
-                "timestamp": datetime.now().isoformat(),
-                "request_meta": AsyncTracker._extract_request_meta(request),
-            }
-
-            # Queue the task
-            task = {"type": "product_click", "data": task_data}
-
-            _processing_queue.put(task)
+            user_id, session_key = AsyncTracker._visitor(request)
+            queued = AsyncTracker._record("click", [product.id], user_id, session_key, request)
             logger.debug(f"Queued product click tracking for {product.name}")
-            return True
+            return queued
 
         except Exception as e:
             logger.error(f"Error queuing product click tracking: {str(e)}")
@@ -471,28 +213,13 @@ class AsyncTracker:
             bool: True if queued successfully
         """
         try:
-            AsyncTracker.initialize()
-
             if not user:
                 logger.warning("Cart action tracking requires authenticated user")
                 return False
 
-            # Prepare task data
-            task_data = {
-                "product_id": product.id,
-                "user_id": user.id,
-                "action": action,
-                "quantity": quantity,
-                "timestamp": datetime.now().isoformat(),
-                "request_meta": AsyncTracker._extract_request_meta(request) if request else {},
-            }
-
-            # Queue the task
-            task = {"type": "cart_action", "data": task_data}
-
-            _processing_queue.put(task)
+            queued = AsyncTracker._record(action, [product.id], user.id, None, request)
             logger.debug(f"Queued cart action tracking: {action} {quantity}x {product.name}")
-            return True
+            return queued
 
         except Exception as e:
             logger.error(f"Error queuing cart action tracking: {str(e)}")
@@ -513,27 +240,13 @@ class AsyncTracker:
             bool: True if queued successfully
         """
         try:
-            AsyncTracker.initialize()
-
             if not user:
                 logger.warning("Favorite action tracking requires authenticated user")
                 return False
 
-            # Prepare task data
-            task_data = {
-                "product_id": product.id,
-                "user_id": user.id,
-                "action": action,
-                "timestamp": datetime.now().isoformat(),
-                "request_meta": AsyncTracker._extract_request_meta(request) if request else {},
-            }
-
-            # Queue the task
-            task = {"type": "favorite_action", "data": task_data}
-
-            _processing_queue.put(task)
+            queued = AsyncTracker._record(action, [product.id], user.id, None, request)
             logger.debug(f"Queued favorite action tracking: {action} {product.name}")
-            return True
+            return queued
 
         except Exception as e:
             logger.error(f"Error queuing favorite action tracking: {str(e)}")
@@ -550,8 +263,6 @@ class AsyncTracker:
                 "user_agent": request.META.get("HTTP_USER_AGENT", ""),
                 "ip_address": AsyncTracker._get_client_ip(request),
                 "referer": request.META.get("HTTP_REFERER", ""),
-                "method": request.method,
-                "path": request.path,
             }
         except Exception as e:
             logger.warning(f"Error extracting request metadata: {str(e)}")
@@ -570,39 +281,20 @@ class AsyncTracker:
         except Exception:
             return ""
 
-    @staticmethod
-    def _create_mock_request(request_meta: Dict[str, Any]):
-        """Create a mock request object from stored metadata."""
-
-        class MockRequest:
-            def __init__(self, meta_data):
-                self.META = {
-                    "HTTP_USER_AGENT": meta_data.get("user_agent", ""),
-                    "REMOTE_ADDR": meta_data.get("ip_address", ""),
-                    "HTTP_REFERER": meta_data.get("referer", ""),
-                }
-                self.method = meta_data.get("method", "GET")
-                self.path = meta_data.get("path", "/")
-
-        return MockRequest(request_meta)
-
     @staticmethod
     def get_queue_status() -> Dict[str, Any]:
-        """Get status information about the async tracking system."""
+        """
+        Get status information about the async tracking system.
+
+        Includes buffer depth and capacity, whether backpressure is dropping
+        events, and accepted/dropped/written counters for this process.
+        """
         try:
             return {
-                "queue_size": _processing_queue.qsize() if _processing_queue else 0,
-                "thread_pool_active": _thread_pool is not None,
+                **get_activity_ingestion().status(),
                 "processor_thread_alive": _processing_thread.is_alive() if _processing_thread else False,
                 "processor_thread_name": _processing_thread.name if _processing_thread else None,
             }
         except Exception as e:
             logger.error(f"Error getting queue status: {str(e)}")
             return {"error": str(e)}
-
-
-# Initialize the async tracker when module is imported
-try:
-    AsyncTracker.initialize()
-except Exception as e:
-    logger.error(f"Failed to initialize AsyncTracker: {str(e)}")
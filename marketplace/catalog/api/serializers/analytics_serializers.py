@@ -66,3 +66,46 @@ class SellerAnalyticsSerializer(serializers.Serializer):
     # Period info (for filtering)
     period_start = serializers.DateTimeField(allow_null=True)
     period_end = serializers.DateTimeField(allow_null=True)
+
+
+class FunnelStagesSerializer(serializers.Serializer):
+    """Serializer for conversion funnel stages and step rates"""
+
+    views = serializers.IntegerField()
+    clicks = serializers.IntegerField()
+    cart_additions = serializers.IntegerField()
+    purchases = serializers.IntegerField()
+    units_sold = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+    view_to_click_rate = serializers.FloatField()
+    click_to_cart_rate = serializers.FloatField()
+    cart_to_purchase_rate = serializers.FloatField()
+    view_to_purchase_rate = serializers.FloatField()
+
+
+class FunnelCategorySerializer(FunnelStagesSerializer):
+    """Serializer for the conversion funnel of one category"""
+
+    category_id = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField()
+
+
+class FunnelProductSerializer(FunnelStagesSerializer):
+    """Serializer for the conversion funnel of one product"""
+
+    id = serializers.UUIDField()
+    name = serializers.CharField()
+    slug = serializers.SlugField()
+    category_id = serializers.IntegerField(allow_null=True)
+
+
+class SellerFunnelSerializer(serializers.Serializer):
+    """Serializer for a seller's windowed conversion funnel"""
+
+    totals = FunnelStagesSerializer()
+    categories = FunnelCategorySerializer(many=True)
+    products = FunnelProductSerializer(many=True)
+
+    period_start = serializers.DateTimeField()
+    period_end = serializers.DateTimeField()
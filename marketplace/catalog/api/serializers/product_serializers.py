@@ -1,12 +1,13 @@
 import logging
 
 from django.contrib.auth import get_user_model
+from django.db import models
 from rest_framework import serializers
 
 from ar.services.ar_service import ARService
 from marketplace.cart.domain.services.inventory_service import InventoryService
 from marketplace.cart.domain.services.pricing_service import PricingService
-from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.models.catalog import Product, ProductImage
 from marketplace.catalog.domain.models.interaction import ProductFavorite, ProductMetrics
 
 from .category_serializers import ProductDetailCategorySerializer
@@ -54,6 +55,66 @@ class ImageDataSerializer(serializers.Serializer):
     order = serializers.IntegerField(required=False, default=0, help_text="Display order of the image")
 
 
+class ProductListBatchSerializer(serializers.ListSerializer):
+    """
+    List serializer for product cards that precomputes per-page data.
+
+    Stock, sale, discount, favorite and primary-image data are computed once
+    for the whole page (at most one image query and one favorites query, none
+    when images / ``user_favorites`` are already prefetched) and handed to each child through
+    ``context["product_batch"]``, instead of running services and queries per row.
+    """
+
+    def to_representation(self, data):
+        products = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context["product_batch"] = self._build_batch(products)
+        try:
+            return super().to_representation(products)
+        finally:
+            self.context.pop("product_batch", None)
+
+    def _build_batch(self, products):
+        pricing_service = PricingService()
+        batch = {
+            product.pk: {
+                # Same semantics as InventoryService.is_in_stock, from the already loaded row
+                "is_in_stock": product.stock_quantity > 0 if product.is_active else None,
+                "is_on_sale": pricing_service.is_on_sale(product).value,
+                "discount_percentage": int(pricing_service.calculate_discount_percentage(product).value),
+                "images": None,
+                "is_favorited": False,
+            }
+            for product in products
+        }
+
+        # Primary images: reuse prefetched images, otherwise one query for the page
+        missing_images = [p.pk for p in products if "images" not in getattr(p, "_prefetched_objects_cache", {})]
+        if missing_images:
+            images_by_product = {pk: [] for pk in missing_images}
+            for image in ProductImage.objects.filter(product_id__in=missing_images):
+                images_by_product[image.product_id].append(image)
+            for pk, images in images_by_product.items():
+                batch[pk]["images"] = images
+
+        # Favorites: reuse a `user_favorites` prefetch, otherwise one query for the page
+        request = self.context.get("request")
+        if request and request.user.is_authenticated:
+            missing_favorites = []
+            for product in products:
+                if hasattr(product, "user_favorites"):
+                    batch[product.pk]["is_favorited"] = len(product.user_favorites) > 0
+                else:
+                    missing_favorites.append(product.pk)
+            if missing_favorites:
+                favorited = ProductFavorite.objects.filter(
+                    user=request.user, product_id__in=missing_favorites
+                ).values_list("product_id", flat=True)
+                for pk in favorited:
+                    batch[pk]["is_favorited"] = True
+
+        return batch
+
+
 class ProductListSerializer(serializers.ModelSerializer):
     """Minimal product serializer for list/search - just the essentials for product cards"""
 
@@ -86,9 +147,18 @@ class ProductListSerializer(serializers.ModelSerializer):
             "is_favorited",
         ]
         read_only_fields = ["id", "slug"]
+        list_serializer_class = ProductListBatchSerializer
+
+    def _batch(self, obj):
+        """Per-page data precomputed by ProductListBatchSerializer, if serializing a list."""
+        batch = self.context.get("product_batch")
+        return batch.get(obj.pk) if batch else None
 
     def get_primary_image(self, obj):
-        images = getattr(obj, "_prefetched_objects_cache", {}).get("images", obj.images.all())
+        batch = self._batch(obj)
+        images = batch["images"] if batch and batch["images"] is not None else None
+        if images is None:
+            images = getattr(obj, "_prefetched_objects_cache", {}).get("images", obj.images.all())
         primary_image = None
         first_image = None
         for image in images:
@@ -103,6 +173,9 @@ class ProductListSerializer(serializers.ModelSerializer):
         return None
 
     def get_is_favorited(self, obj):
+        batch = self._batch(obj)
+        if batch:
+            return batch["is_favorited"]
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             if hasattr(obj, "user_favorites"):
@@ -120,12 +193,21 @@ class ProductListSerializer(serializers.ModelSerializer):
         return obj.review_count
 
     def get_is_on_sale(self, obj):
+        batch = self._batch(obj)
+        if batch:
+            return batch["is_on_sale"]
         return PricingService().is_on_sale(obj).value
 
     def get_discount_percentage(self, obj):
+        batch = self._batch(obj)
+        if batch:
+            return batch["discount_percentage"]
         return int(PricingService().calculate_discount_percentage(obj).value)
 
     def get_is_in_stock(self, obj):
+        batch = self._batch(obj)
+        if batch:
+            return batch["is_in_stock"]
         return InventoryService().is_in_stock(str(obj.id)).value
 
 
@@ -173,6 +255,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "images",
             "reviews",
             "average_rating",
+            "review_count",
             "is_in_stock",
             "is_on_sale",
             "discount_percentage",
@@ -187,6 +270,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "id",
             "slug",
             "seller",
+            "review_count",
             "view_count",
             "click_count",
             "favorite_count",
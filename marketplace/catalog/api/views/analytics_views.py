@@ -7,12 +7,32 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from marketplace.catalog.api.serializers.analytics_serializers import SellerAnalyticsSerializer
+from activity.services.analytics import ActivityAnalytics
+from marketplace.catalog.api.serializers.analytics_serializers import SellerAnalyticsSerializer, SellerFunnelSerializer
 from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.services.funnel import ConversionFunnel
 from marketplace.ordering.domain.models.order import Order, OrderItem
 from marketplace.permissions import IsSellerUser
 
 
+def period_bounds(period, now):
+    """
+    Return (start, end) for a dashboard period filter.
+
+    start is None for "all" and for unknown periods.
+    """
+    if period == "today":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0), now
+    if period == "week":
+        return now - timedelta(days=7), now
+    if period == "month":
+        return now - timedelta(days=30), now
+    if period == "year":
+        return now - timedelta(days=365), now
+    # "all" means no period filter
+    return None, now
+
+
 class SellerAnalyticsView(APIView):
     """
     API view for seller dashboard analytics.
@@ -26,18 +46,7 @@ class SellerAnalyticsView(APIView):
 
         # Parse period filter (optional)
         period = request.query_params.get("period", "all")
-        period_start = None
-        period_end = timezone.now()
-
-        if period == "today":
-            period_start = period_end.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == "week":
-            period_start = period_end - timedelta(days=7)
-        elif period == "month":
-            period_start = period_end - timedelta(days=30)
-        elif period == "year":
-            period_start = period_end - timedelta(days=365)
-        # "all" means no period filter
+        period_start, period_end = period_bounds(period, timezone.now())
 
         # Get seller's products
         products = Product.objects.filter(seller=seller)
@@ -54,6 +63,13 @@ class SellerAnalyticsView(APIView):
         total_clicks = product_metrics["total_clicks"] or 0
         total_favorites = product_metrics["total_favorites"] or 0
 
+        # Windowed engagement comes from the hourly/daily activity rollups
+        if period_start:
+            engagement = ActivityAnalytics().seller_totals(seller.pk, period_start, period_end)
+            total_views = engagement["views"]
+            total_clicks = engagement["clicks"]
+            total_favorites = engagement["favorites"]
+
         # Get seller's order items (filtered by period if specified)
         order_items_qs = OrderItem.objects.filter(seller=seller)
         if period_start:
@@ -161,3 +177,26 @@ class SellerAnalyticsView(APIView):
 
         serializer = SellerAnalyticsSerializer(analytics_data)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SellerFunnelView(APIView):
+    """
+    API view for the seller's conversion funnel (view -> click -> cart add -> purchase).
+    Returns funnel stages for the seller, each category and each product over a period.
+    """
+
+    permission_classes = [IsAuthenticated, IsSellerUser]
+
+    def get(self, request):
+        period = request.query_params.get("period", "month")
+        period_start, period_end = period_bounds(period, timezone.now())
+        if period_start is None:
+            return Response(
+                {"error": "period must be one of: today, week, month, year"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        funnel = ConversionFunnel().seller_funnel(request.user.pk, period_start, period_end)
+
+        serializer = SellerFunnelSerializer({**funnel, "period_start": period_start, "period_end": period_end})
+        return Response(serializer.data, status=status.HTTP_200_OK)
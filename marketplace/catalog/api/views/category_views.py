@@ -1,14 +1,13 @@
 import logging
 
-from django.db import models
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from activity.models import UserClick
 from infrastructure.container import container
+from marketplace.async_tracking import AsyncTracker
 from marketplace.catalog.api.serializers.category_serializers import CategorySerializer
 from marketplace.catalog.api.serializers.product_serializers import ProductListSerializer
 from marketplace.catalog.domain.models.catalog import Product
@@ -85,40 +84,15 @@ class CategoryViewSet(viewsets.ViewSet):
         products = (
             Product.objects.filter(category=category, is_active=True)
             .select_related("seller", "category")
-            .prefetch_related("images", "reviews__reviewer", "favorited_by")
-            .annotate(
-                calculated_review_count=models.Count("reviews", filter=models.Q(reviews__is_active=True)),
-                calculated_avg_rating=models.Avg("reviews__rating", filter=models.Q(reviews__is_active=True)),
-            )
+            .prefetch_related("images")
         )
 
         # Apply filtering
-        filter_backend = ProductFilter()
-        products = filter_backend.filter_queryset(request, products, self)
-
-        # Track category views
-        try:
-            from marketplace.tracking_utils import MetricsHelper, SessionHelper
-
-            user, session_key = SessionHelper.get_user_or_session(request)
-            products_list = list(products)
-
-            if products_list:
-                MetricsHelper.bulk_ensure_metrics(products_list)
-
-                for product in products_list:
-                    try:
-                        UserClick.track_activity(
-                            product=product,
-                            action="category_view",
-                            user=user,
-                            session_key=session_key,
-                            request=request,
-                        )
-                    except Exception:
-                        pass
-        except Exception as e:
-            logger.error(f"Error tracking category listing views: {str(e)}")
+        products = ProductFilter(request.query_params, queryset=products, request=request).qs
+
+        # Track category views as one buffered impression event; nothing is written in the request
+        products = list(products)
+        AsyncTracker.queue_category_view(products, request)
 
         serializer = ProductListSerializer(products, many=True, context={"request": request})
         return Response(serializer.data)
@@ -0,0 +1,43 @@
+"""Shared query-param handling for page-number and cursor (keyset) pagination."""
+
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+
+CURSOR_PARAMETERS = [
+    OpenApiParameter(
+        name="cursor",
+        type=str,
+        description=(
+            "Keyset cursor from `next_cursor`/`previous_cursor`. Send an empty value for the first page. "
+            "When present, `page` is ignored and every page costs the same."
+        ),
+    ),
+    OpenApiParameter(
+        name="include_count",
+        type=bool,
+        description="With `cursor`, also return the total `count` (skipped by default)",
+    ),
+]
+
+CURSOR_RESPONSE_FIELDS = {
+    "next_cursor": serializers.CharField(allow_null=True),
+    "previous_cursor": serializers.CharField(allow_null=True),
+}
+
+
+def get_pagination_params(request, default_page_size: int = 20) -> dict:
+    """
+    Read page, page_size, cursor and include_count from the query string.
+
+    ``cursor`` is None unless the parameter is present (an empty value asks
+    for the first cursor page).
+    """
+    params = request.query_params
+    include_count = params.get("include_count")
+    return {
+        "page": int(params.get("page", 1)),
+        "page_size": int(params.get("page_size", default_page_size)),
+        "cursor": params.get("cursor"),
+        "include_count": include_count.lower() == "true" if include_count is not None else None,
+    }
@@ -12,6 +12,11 @@ from rest_framework.response import Response
 
 from infrastructure.container import container
 from marketplace.api.serializers import ErrorResponseSerializer
+from marketplace.catalog.api.views.pagination import (
+    CURSOR_PARAMETERS,
+    CURSOR_RESPONSE_FIELDS,
+    get_pagination_params,
+)
 from marketplace.models import Product, ProductFavorite
 from marketplace.permissions import IsSellerOrReadOnly, IsSellerUser
 from marketplace.serializers import (
@@ -165,18 +170,20 @@ class ProductViewSet(viewsets.ModelViewSet):
             OpenApiParameter(name="page", type=int, description="Page number (default: 1)"),
             OpenApiParameter(name="page_size", type=int, description="Items per page (default: 20)"),
             OpenApiParameter(name="ordering", type=str, description="Order by field (default: -created_at)"),
+            *CURSOR_PARAMETERS,
         ],
         responses={
             200: OpenApiResponse(
                 response=inline_serializer(
                     name="ProductListPaginatedResponse",
                     fields={
-                        "count": serializers.IntegerField(),
+                        "count": serializers.IntegerField(allow_null=True),
                         "page": serializers.IntegerField(),
                         "page_size": serializers.IntegerField(),
                         "num_pages": serializers.IntegerField(),
                         "has_next": serializers.BooleanField(),
                         "has_previous": serializers.BooleanField(),
+                        **CURSOR_RESPONSE_FIELDS,
                         "results": ProductListSerializer(many=True),
                     },
                 ),
@@ -206,13 +213,14 @@ class ProductViewSet(viewsets.ModelViewSet):
         if request.query_params.get("is_featured"):
             filters["is_featured"] = request.query_params.get("is_featured").lower() == "true"
 
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
+        pagination = get_pagination_params(request)
         ordering = request.query_params.get("ordering", "-created_at")
 
-        result = service.list_products(filters, page, page_size, ordering)
+        result = service.list_products(filters, ordering=ordering, **pagination)
 
         if not result.ok:
+            if result.error == ErrorCodes.INVALID_INPUT:
+                return Response({"detail": result.error_detail}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         products = result.value["results"]
@@ -223,6 +231,8 @@ class ProductViewSet(viewsets.ModelViewSet):
             "results": serializer.data,
             "page": result.value["page"],
             "num_pages": result.value["num_pages"],
+            "next_cursor": result.value["next_cursor"],
+            "previous_cursor": result.value["previous_cursor"],
         }
         return Response(response_data)
 
@@ -445,18 +455,20 @@ class ProductViewSet(viewsets.ModelViewSet):
             OpenApiParameter(name="page", type=int, description="Page number (default: 1)"),
             OpenApiParameter(name="page_size", type=int, description="Items per page (default: 20)"),
             OpenApiParameter(name="ordering", type=str, description="Order by field (default: -created_at)"),
+            *CURSOR_PARAMETERS,
         ],
         responses={
             200: OpenApiResponse(
                 response=inline_serializer(
                     name="MyProductListPaginatedResponse",
                     fields={
-                        "count": serializers.IntegerField(),
+                        "count": serializers.IntegerField(allow_null=True),
                         "page": serializers.IntegerField(),
                         "page_size": serializers.IntegerField(),
                         "num_pages": serializers.IntegerField(),
                         "has_next": serializers.BooleanField(),
                         "has_previous": serializers.BooleanField(),
+                        **CURSOR_RESPONSE_FIELDS,
                         "results": ProductListSerializer(many=True),
                     },
                 ),
@@ -469,15 +481,14 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def my_products(self, request):
         service = self.get_service()
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
+        pagination = get_pagination_params(request)
         ordering = request.query_params.get("ordering", "-created_at")
 
-        result = service.list_products(
-            filters={"seller": request.user.id}, page=page, page_size=page_size, ordering=ordering
-        )
+        result = service.list_products(filters={"seller": request.user.id}, ordering=ordering, **pagination)
 
         if not result.ok:
+            if result.error == ErrorCodes.INVALID_INPUT:
+                return Response({"detail": result.error_detail}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         serializer = self.get_serializer(result.value["results"], many=True)
@@ -486,6 +497,8 @@ class ProductViewSet(viewsets.ModelViewSet):
             "results": serializer.data,
             "page": result.value["page"],
             "num_pages": result.value["num_pages"],
+            "next_cursor": result.value["next_cursor"],
+            "previous_cursor": result.value["previous_cursor"],
         }
         return Response(response_data)
 
@@ -509,6 +522,40 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = ProductFavoriteSerializer(favorites, many=True, context={"request": request})
         return Response(serializer.data)
 
+    @extend_schema(
+        operation_id="products_related",
+        summary="Get related products",
+        description="Products similar to this one or viewed and carted by the same shoppers, best first.",
+        parameters=[
+            OpenApiParameter(name="limit", type=int, description="Number of products (default: 10, max: 50)"),
+        ],
+        responses={
+            200: OpenApiResponse(response=ProductListSerializer(many=True), description="Related products"),
+            404: OpenApiResponse(response=ErrorResponseSerializer, description="Product not found"),
+        },
+        tags=["Marketplace - Products"],
+    )
+    @action(detail=True, methods=["get"])
+    def related(self, request, slug=None):
+        product_id = Product.objects.filter(slug=slug, is_active=True).values_list("id", flat=True).first()
+        if product_id is None:
+            return Response({"detail": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = container.search_service().get_related_products(str(product_id), limit=limit)
+
+        if not result.ok:
+            if result.error == ErrorCodes.PRODUCT_NOT_FOUND:
+                return Response({"detail": result.error_detail}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        serializer = ProductListSerializer(result.value, many=True, context={"request": request})
+        return Response(serializer.data)
+
     @extend_schema(
         operation_id="products_toggle_favorite",
         summary="Toggle product favorite status",
@@ -6,8 +6,13 @@ from rest_framework.response import Response
 
 from infrastructure.container import container
 from marketplace.api.serializers import ErrorResponseSerializer
+from marketplace.catalog.api.views.pagination import (
+    CURSOR_PARAMETERS,
+    CURSOR_RESPONSE_FIELDS,
+    get_pagination_params,
+)
 from marketplace.serializers import ProductListSerializer
-from marketplace.services import SearchService
+from marketplace.services import ErrorCodes, SearchService
 
 
 class SearchViewSet(viewsets.ViewSet):
@@ -21,10 +26,44 @@ class SearchViewSet(viewsets.ViewSet):
     def get_service(self) -> SearchService:
         return container.search_service()
 
+    def _extract_filters(self, request) -> dict:
+        """Build the SearchService filter dict from query params."""
+        filters = {}
+        categories = request.query_params.getlist("category")
+        if categories:
+            filters["category"] = categories
+
+        conditions = request.query_params.getlist("condition")
+        if conditions:
+            filters["condition"] = conditions
+
+        if request.query_params.get("price_min"):
+            filters["price_min"] = request.query_params.get("price_min")
+        if request.query_params.get("price_max"):
+            filters["price_max"] = request.query_params.get("price_max")
+        if request.query_params.get("seller"):
+            filters["seller"] = request.query_params.get("seller")
+        if request.query_params.get("min_rating"):
+            filters["min_rating"] = request.query_params.get("min_rating")
+        if request.query_params.get("in_stock"):
+            filters["in_stock"] = request.query_params.get("in_stock").lower() == "true"
+        if request.query_params.get("is_featured"):
+            filters["is_featured"] = request.query_params.get("is_featured").lower() == "true"
+        if request.query_params.get("brand"):
+            filters["brand"] = request.query_params.get("brand")
+        for field in ("tags", "colors"):
+            if request.query_params.get(field):
+                filters[field] = request.query_params.get(field)
+        return filters
+
     @extend_schema(
         operation_id="products_search",
         summary="Search products",
-        description="Search for products with filters and pagination",
+        description=(
+            "Search for products with filters and pagination. Misspelled queries get a `did_you_mean` "
+            "correction; when nothing matches exactly, results for the correction are returned and "
+            "`fuzzy` is true."
+        ),
         parameters=[
             OpenApiParameter(name="q", type=str, description="Search query"),
             OpenApiParameter(name="category", type=str, description="Filter by category (can be multiple)", many=True),
@@ -38,21 +77,27 @@ class SearchViewSet(viewsets.ViewSet):
             OpenApiParameter(name="in_stock", type=bool, description="Only show in-stock products"),
             OpenApiParameter(name="is_featured", type=bool, description="Only show featured products"),
             OpenApiParameter(name="brand", type=str, description="Filter by brand"),
+            OpenApiParameter(name="tags", type=str, description="Filter by tags (comma-separated, any match)"),
+            OpenApiParameter(name="colors", type=str, description="Filter by colors (comma-separated, any match)"),
             OpenApiParameter(name="page", type=int, description="Page number (default: 1)"),
             OpenApiParameter(name="page_size", type=int, description="Items per page (default: 20)"),
             OpenApiParameter(name="sort", type=str, description="Sort by (relevance, price, newest, popular)"),
+            *CURSOR_PARAMETERS,
         ],
         responses={
             200: OpenApiResponse(
                 response=inline_serializer(
                     name="ProductSearchPaginatedResponse",
                     fields={
-                        "count": serializers.IntegerField(),
-                        "page": serializers.IntegerField(),
+                        "count": serializers.IntegerField(allow_null=True),
+                        "page": serializers.IntegerField(allow_null=True),
                         "page_size": serializers.IntegerField(),
-                        "num_pages": serializers.IntegerField(),
+                        "num_pages": serializers.IntegerField(allow_null=True),
                         "has_next": serializers.BooleanField(),
                         "has_previous": serializers.BooleanField(),
+                        **CURSOR_RESPONSE_FIELDS,
+                        "did_you_mean": serializers.CharField(allow_null=True),
+                        "fuzzy": serializers.BooleanField(),
                         "results": ProductListSerializer(many=True),
                     },
                 ),
@@ -67,40 +112,17 @@ class SearchViewSet(viewsets.ViewSet):
         service = self.get_service()
 
         query = request.query_params.get("q", "")
-
-        # Extract filters
-        filters = {}
-        categories = request.query_params.getlist("category")
-        if categories:
-            filters["category"] = categories
-
-        conditions = request.query_params.getlist("condition")
-        if conditions:
-            filters["condition"] = conditions
-
-        if request.query_params.get("price_min"):
-            filters["price_min"] = request.query_params.get("price_min")
-        if request.query_params.get("price_max"):
-            filters["price_max"] = request.query_params.get("price_max")
-        if request.query_params.get("seller"):
-            filters["seller"] = request.query_params.get("seller")
-        if request.query_params.get("min_rating"):
-            filters["min_rating"] = request.query_params.get("min_rating")
-        if request.query_params.get("in_stock"):
-            filters["in_stock"] = request.query_params.get("in_stock").lower() == "true"
-        if request.query_params.get("is_featured"):
-            filters["is_featured"] = request.query_params.get("is_featured").lower() == "true"
-        if request.query_params.get("brand"):
-            filters["brand"] = request.query_params.get("brand")
+        filters = self._extract_filters(request)
 
         # Pagination and sorting
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
+        pagination = get_pagination_params(request)
         sort = request.query_params.get("sort", "relevance")
 
-        result = service.search(query, filters, sort, page, page_size)
+        result = service.search(query, filters, sort, **pagination)
 
         if not result.ok:
+            if result.error == ErrorCodes.INVALID_INPUT:
+                return Response({"detail": result.error_detail}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Serialize products
@@ -110,6 +132,40 @@ class SearchViewSet(viewsets.ViewSet):
 
         return Response(response_data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        operation_id="products_trending",
+        summary="Get trending products",
+        description=(
+            "Products ranked by recent views, clicks, favorites and cart additions, with older "
+            "activity decaying exponentially. Served from a ranking refreshed every few minutes."
+        ),
+        parameters=[
+            OpenApiParameter(name="category", type=str, description="Rank within a category (slug)"),
+            OpenApiParameter(name="limit", type=int, description="Number of products (default: 10)"),
+        ],
+        responses={
+            200: ProductListSerializer(many=True),
+            500: OpenApiResponse(response=ErrorResponseSerializer, description="Internal server error"),
+        },
+        tags=["Marketplace - Search"],
+    )
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        service = self.get_service()
+        category = request.query_params.get("category") or None
+        try:
+            limit = max(1, int(request.query_params.get("limit", 10)))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = service.get_trending_products(limit=limit, category=category)
+
+        if not result.ok:
+            return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        products_data = ProductListSerializer(result.value, many=True, context={"request": request}).data
+        return Response(products_data, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["get"])
     def autocomplete(self, request):
         service = self.get_service()
@@ -127,47 +183,23 @@ class SearchViewSet(viewsets.ViewSet):
     def filters(self, request):
         service = self.get_service()
 
-        # This endpoint is usually for fetching available filter options (facets)
-        # or filtering without a search query (which search service supports via filter_products)
-
-        # For now, let's use it as a direct interface to filter_products if no query is present
-        # If it's meant to return available facets, that would require a new service method.
+        # Direct interface to filter_products (filtering without a search query).
+        # Facet counts for the same filters are served by the `facets` action.
         # Based on "Filters: search_service.filter_products(filters) -> return filtered products" in AC
 
         # Extract filters (same as search)
-        filters = {}
-        categories = request.query_params.getlist("category")
-        if categories:
-            filters["category"] = categories
-
-        conditions = request.query_params.getlist("condition")
-        if conditions:
-            filters["condition"] = conditions
-
-        if request.query_params.get("price_min"):
-            filters["price_min"] = request.query_params.get("price_min")
-        if request.query_params.get("price_max"):
-            filters["price_max"] = request.query_params.get("price_max")
-        if request.query_params.get("seller"):
-            filters["seller"] = request.query_params.get("seller")
-        if request.query_params.get("min_rating"):
-            filters["min_rating"] = request.query_params.get("min_rating")
-        if request.query_params.get("in_stock"):
-            filters["in_stock"] = request.query_params.get("in_stock").lower() == "true"
-        if request.query_params.get("is_featured"):
-            filters["is_featured"] = request.query_params.get("is_featured").lower() == "true"
-        if request.query_params.get("brand"):
-            filters["brand"] = request.query_params.get("brand")
+        filters = self._extract_filters(request)
         if request.query_params.get("condition"):
             filters["condition"] = request.query_params.get("condition")
 
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
+        pagination = get_pagination_params(request)
         sort = request.query_params.get("sort", "newest")
 
-        result = service.filter_products(filters, page, page_size, sort)
+        result = service.filter_products(filters, sort=sort, **pagination)
 
         if not result.ok:
+            if result.error == ErrorCodes.INVALID_INPUT:
+                return Response({"detail": result.error_detail}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         products_data = ProductListSerializer(result.value["results"], many=True, context={"request": request}).data
@@ -175,3 +207,60 @@ class SearchViewSet(viewsets.ViewSet):
         response_data["results"] = products_data
 
         return Response(response_data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        operation_id="products_facets",
+        summary="Get search facets",
+        description=(
+            "Counts per category, brand, condition, price range, minimum rating, tag and color for the "
+            "current query and filters, computed with grouped indexed queries and cached briefly."
+        ),
+        parameters=[
+            OpenApiParameter(name="q", type=str, description="Search query"),
+            OpenApiParameter(name="category", type=str, description="Filter by category (can be multiple)", many=True),
+            OpenApiParameter(
+                name="condition", type=str, description="Filter by condition (can be multiple)", many=True
+            ),
+            OpenApiParameter(name="price_min", type=float, description="Minimum price"),
+            OpenApiParameter(name="price_max", type=float, description="Maximum price"),
+            OpenApiParameter(name="seller", type=str, description="Filter by seller ID"),
+            OpenApiParameter(name="min_rating", type=float, description="Minimum rating"),
+            OpenApiParameter(name="in_stock", type=bool, description="Only count in-stock products"),
+            OpenApiParameter(name="is_featured", type=bool, description="Only count featured products"),
+            OpenApiParameter(name="brand", type=str, description="Filter by brand"),
+            OpenApiParameter(name="tags", type=str, description="Filter by tags (comma-separated, any match)"),
+            OpenApiParameter(name="colors", type=str, description="Filter by colors (comma-separated, any match)"),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=inline_serializer(
+                    name="ProductSearchFacetsResponse",
+                    fields={
+                        "total": serializers.IntegerField(),
+                        "categories": serializers.ListField(child=serializers.DictField()),
+                        "brands": serializers.ListField(child=serializers.DictField()),
+                        "conditions": serializers.ListField(child=serializers.DictField()),
+                        "price_ranges": serializers.ListField(child=serializers.DictField()),
+                        "ratings": serializers.ListField(child=serializers.DictField()),
+                        "tags": serializers.ListField(child=serializers.DictField()),
+                        "colors": serializers.ListField(child=serializers.DictField()),
+                    },
+                ),
+                description="Facet counts",
+            ),
+            500: OpenApiResponse(response=ErrorResponseSerializer, description="Internal server error"),
+        },
+        tags=["Marketplace - Search"],
+    )
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        service = self.get_service()
+        query = request.query_params.get("q", "")
+        filters = self._extract_filters(request)
+
+        result = service.get_facets(query, filters)
+
+        if not result.ok:
+            return Response({"detail": result.error_detail}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(result.value, status=status.HTTP_200_OK)
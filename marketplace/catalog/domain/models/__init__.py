@@ -1,6 +1,9 @@
+from .attributes import ProductColor, ProductTag
 from .catalog import Product, ProductImage
 from .category import Category
 from .interaction import ProductFavorite, ProductMetrics, ProductReview, ProductReviewHelpful
+from .ranking import RelatedProduct, TrendingProduct
+from .search_index import ProductAutocompleteEntry, ProductAutocompletePrefix, SearchTerm, SearchTermTrigram
 
 
 __all__ = [
@@ -11,4 +14,12 @@ __all__ = [
     "ProductReviewHelpful",
     "ProductFavorite",
     "ProductMetrics",
+    "ProductAutocompleteEntry",
+    "ProductAutocompletePrefix",
+    "SearchTerm",
+    "SearchTermTrigram",
+    "TrendingProduct",
+    "RelatedProduct",
+    "ProductTag",
+    "ProductColor",
 ]
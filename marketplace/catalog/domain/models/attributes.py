@@ -0,0 +1,51 @@
+from django.db import models
+
+from .catalog import Product
+
+
+class ProductTag(models.Model):
+    """
+    One normalized (trimmed, lowercased) tag of a product.
+
+    Mirrors the Product.tags JSON list so tag filters and facet counts are
+    indexed lookups on ``value`` instead of JSON substring scans. Kept in sync
+    by ProductAttributeIndex from model signals.
+    """
+
+    MAX_LENGTH = 50
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="tag_entries")
+    value = models.CharField(max_length=MAX_LENGTH)
+
+    class Meta:
+        app_label = "marketplace"
+        unique_together = ["product", "value"]
+        indexes = [
+            models.Index(fields=["value", "product"], name="mkt_product_tag_value_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.value}"
+
+
+class ProductColor(models.Model):
+    """
+    One normalized (trimmed, lowercased) color of a product.
+
+    Mirrors the Product.colors JSON list; see ProductTag.
+    """
+
+    MAX_LENGTH = 50
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="color_entries")
+    value = models.CharField(max_length=MAX_LENGTH)
+
+    class Meta:
+        app_label = "marketplace"
+        unique_together = ["product", "value"]
+        indexes = [
+            models.Index(fields=["value", "product"], name="mkt_product_color_value_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.value}"
@@ -96,6 +96,7 @@ class Product(models.Model):
             models.Index(fields=["brand", "is_active"]),  # Brand filtering
             models.Index(fields=["condition", "is_active"]),  # Condition filtering
             models.Index(fields=["stock_quantity", "is_active"]),  # Stock availability
+            models.Index(fields=["is_active", "-average_rating"]),  # Rating filter/sort
         ]
 
     def save(self, *args, **kwargs):
@@ -0,0 +1,63 @@
+from django.db import models
+
+from .catalog import Product
+from .category import Category
+
+
+class TrendingProduct(models.Model):
+    """
+    Precomputed trending rank of a product.
+
+    Rows with a null category hold the site-wide ranking; the others rank
+    products within their own category. The whole table is replaced by
+    TrendingRanker on every run, so reading the top N is a single
+    ``WHERE category_id = ? ORDER BY rank LIMIT n`` on the (category, rank) index.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="trending_ranks")
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, null=True, blank=True, related_name="trending_products"
+    )
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        app_label = "marketplace"
+        ordering = ["category", "rank"]
+        indexes = [
+            models.Index(fields=["category", "rank"], name="mkt_trending_rank_idx"),
+        ]
+
+    def __str__(self):
+        scope = self.category_id or "all"
+        return f"#{self.rank} {self.product_id} ({scope})"
+
+
+class RelatedProduct(models.Model):
+    """
+    Precomputed top-K related products of a product.
+
+    Scores combine attribute similarity (category, brand, price band, tags,
+    colors) with co-interest mined from UserClick, and are rebuilt in batch by
+    RelatedProductsIndex. The product detail page reads its recommendations
+    with a single ``WHERE product_id = ? ORDER BY rank`` on the (product, rank)
+    index.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="related_entries")
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        app_label = "marketplace"
+        ordering = ["product", "rank"]
+        unique_together = ["product", "related"]
+        indexes = [
+            models.Index(fields=["product", "rank"], name="mkt_related_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> #{self.rank} {self.related_id}"
@@ -0,0 +1,94 @@
+from django.db import models
+
+from .catalog import Product
+
+
+class ProductAutocompleteEntry(models.Model):
+    """
+    Denormalized autocomplete payload, one row per active product.
+
+    Holds everything an autocomplete suggestion needs (name, category, price,
+    primary image key) so a keystroke never touches Product, Category or
+    ProductImage. Maintained by AutocompleteIndex from model signals.
+    """
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="autocomplete_entry"
+    )
+    name = models.CharField(max_length=200)
+    brand = models.CharField(max_length=100, blank=True)
+    category_name = models.CharField(max_length=100, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    # S3 key of the primary image, or the local file name when S3 is not used
+    image_key = models.CharField(max_length=500, blank=True)
+    popularity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = "marketplace"
+
+    def __str__(self):
+        return f"Autocomplete entry for {self.name}"
+
+
+class ProductAutocompletePrefix(models.Model):
+    """
+    Edge n-gram of a token from a product's name, brand or category.
+
+    "Oak Sofa" produces "oa", "oak", "so", "sof", "sofa". Popularity is copied
+    from the entry so the (prefix, -popularity) index answers
+    ``WHERE prefix = ? ORDER BY popularity DESC LIMIT n`` without a sort.
+    """
+
+    MIN_PREFIX_LENGTH = 2
+    MAX_PREFIX_LENGTH = 20
+
+    prefix = models.CharField(max_length=MAX_PREFIX_LENGTH)
+    entry = models.ForeignKey(ProductAutocompleteEntry, on_delete=models.CASCADE, related_name="prefixes")
+    popularity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        app_label = "marketplace"
+        unique_together = ["prefix", "entry"]
+        indexes = [
+            models.Index(fields=["prefix", "-popularity"], name="mkt_autocomplete_prefix_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix} -> {self.entry_id}"
+
+
+class SearchTerm(models.Model):
+    """
+    Vocabulary of words seen in product names and brands.
+
+    Used for "did you mean" corrections; frequency (number of active products
+    using the word) breaks ties between equally close candidates.
+    """
+
+    MAX_TERM_LENGTH = 100
+
+    term = models.CharField(max_length=MAX_TERM_LENGTH, unique=True)
+    length = models.PositiveSmallIntegerField(db_index=True)
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        app_label = "marketplace"
+
+    def __str__(self):
+        return self.term
+
+
+class SearchTermTrigram(models.Model):
+    """Trigram -> term postings used to prune correction candidates."""
+
+    trigram = models.CharField(max_length=3)
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name="trigrams")
+
+    class Meta:
+        app_label = "marketplace"
+        # The unique index leads with trigram, so it also serves trigram lookups
+        unique_together = ["trigram", "term"]
+
+    def __str__(self):
+        return f"{self.trigram} -> {self.term_id}"
@@ -0,0 +1,632 @@
+"""
+ActivityIngestion - batched, durable activity event pipeline
+
+Tracking calls used to push each event onto an unbounded in-process queue
+drained by a single daemon thread, which fetched the Product and User for
+every event and inserted one UserClick at a time. Anything still queued was
+lost on restart, and a slow database let the queue grow without limit.
+
+Events are now appended to a durable buffer and drained in batches:
+
+- product and user ids are resolved with one ``values_list`` query each
+  per batch, never by loading the objects
+- user agents and referers are dictionary-encoded once per batch
+- UserClick rows are written with ``bulk_create``
+- ProductMetrics deltas are summed per product and handed to the buffered
+  product counters, and visitors to the unique-visitor sketches
+- hours of events written after the activity rollups' lookback has passed
+  them are marked for recomputation
+
+Buffers (ACTIVITY_INGESTION_BACKEND):
+
+- ``spool`` (default): JSON-lines segment files in ACTIVITY_SPOOL_DIR.
+  Each process appends to its own active segment and seals it once it
+  holds ACTIVITY_SPOOL_SEGMENT_SIZE events or is older than
+  ACTIVITY_SPOOL_SEGMENT_AGE seconds. Drainers claim sealed segments by
+  renaming them, so several drainers never process the same segment, and
+  a segment is only deleted once its batch is committed.
+- ``redis``: a Redis stream (ACTIVITY_INGESTION_REDIS_URL) read through a
+  consumer group. Entries are acknowledged after commit; entries left
+  pending by a crashed drainer are reclaimed after
+  ACTIVITY_INGESTION_STALE_AFTER seconds.
+
+Backpressure: once ACTIVITY_INGESTION_MAX_PENDING events are waiting, new
+events are dropped and counted instead of growing the buffer further.
+
+Failures: a batch that fails for a transient reason (connection lost,
+deadlock) is put back and retried by the next drain. When the batch insert
+is rejected for its data, the events are retried one at a time and the
+ones the database still rejects are moved to a dead-letter buffer, so a
+single bad event never blocks the events queued behind it.
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DataError, IntegrityError, transaction
+
+from marketplace.catalog.domain.models.catalog import Product
+
+
+logger = logging.getLogger(__name__)
+
+
+def _default_spool_dir() -> Path:
+    return Path(settings.BASE_DIR) / "var" / "activity_spool"
+
+
+def _clean_ip(value) -> Optional[str]:
+    """The address if it is a valid IPv4/IPv6 address, else None (X-Forwarded-For is client input)."""
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except (AttributeError, ValueError):
+        return None
+
+
+class SpoolEventStore:
+    """Append-only JSON-lines segments in a local directory."""
+
+    ACTIVE = ".active"
+    READY = ".ready"
+    CLAIMED = ".claimed"
+    DEAD = ".dead"
+
+    def __init__(self, directory, segment_size: int = 500, segment_age: float = 5.0, stale_after: float = 300.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.segment_age = segment_age
+        # Must stay well above segment_age: a live writer never touches a segment older than that
+        self.stale_after = max(stale_after, segment_age * 2)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._handle = None
+        self._opened_at = 0.0
+        self._active_count = 0
+        self._backlog = (0.0, 0)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def _active_path(self) -> Path:
+        return self.directory / f"{socket.gethostname()}-{os.getpid()}{self.ACTIVE}"
+
+    def append(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: never write through the parent's handle
+                self._pid, self._handle, self._active_count = os.getpid(), None, 0
+            if self._handle is not None and time.monotonic() - self._opened_at >= self.segment_age:
+                self._seal()
+            if self._handle is None:
+                self._open()
+            self._handle.write(line)
+            self._handle.flush()
+            self._active_count += 1
+            if self._active_count >= self.segment_size:
+                self._seal()
+
+    def _open(self) -> None:
+        path = self._active_path()
+        if path.exists():
+            # Left behind by an earlier process that had the same pid
+            self._seal_path(path, self._count_lines(path))
+        self._handle = open(path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+        self._active_count = 0
+
+    def _seal(self) -> None:
+        """Close the active segment and make it available to drainers."""
+        handle, count = self._handle, self._active_count
+        self._handle, self._active_count = None, 0
+        if handle is None:
+            return
+        handle.close()
+        if count:
+            self._seal_path(Path(handle.name), count)
+
+    def _seal_path(self, path: Path, count: int) -> None:
+        sealed = self.directory / f"{time.time_ns()}-{socket.gethostname()}-{os.getpid()}-{count}{self.READY}"
+        try:
+            os.rename(path, sealed)
+        except FileNotFoundError:
+            pass  # already reclaimed as stale
+
+    @classmethod
+    def _base(cls, name: str) -> str:
+        """Segment name without its claim token and state suffix."""
+        name = name.split("~", 1)[0]
+        for suffix in (cls.ACTIVE, cls.READY, cls.CLAIMED):
+            if name.endswith(suffix):
+                return name[: -len(suffix)]
+        return name
+
+    @staticmethod
+    def _count_lines(path: Path) -> int:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+
+    # ------------------------------------------------------------------
+    # Drain path
+    # ------------------------------------------------------------------
+
+    def claim(self, limit: int) -> Optional[Tuple[Path, List[Dict[str, Any]]]]:
+        """
+        Claim the oldest sealed segment.
+
+        Returns:
+            (token, events) or None when nothing is waiting. ``limit`` is
+            not enforced; segments are capped at segment_size on write.
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._active_count:
+                self._seal()
+
+        now = time.time()
+        own_active = self._active_path().name
+        candidates = []
+        for entry in os.scandir(self.directory):
+            name = entry.name
+            if name.endswith(self.READY):
+                candidates.append(entry)
+            elif name.endswith((self.ACTIVE, self.CLAIMED)) and name != own_active:
+                # Segments of dead writers and of drainers that crashed mid-batch
+                try:
+                    if now - entry.stat().st_mtime >= self.stale_after:
+                        candidates.append(entry)
+                except FileNotFoundError:
+                    continue
+
+        for entry in sorted(candidates, key=lambda e: e.name):
+            base = self._base(entry.name)
+            if entry.name.endswith(self.ACTIVE):
+                base = f"{time.time_ns()}-{base}-0"
+            claimed = self.directory / f"{base}~{uuid.uuid4().hex[:8]}{self.CLAIMED}"
+            try:
+                os.rename(entry.path, claimed)
+            except FileNotFoundError:
+                continue  # another drainer got it first
+            os.utime(claimed)
+            return claimed, self._read(claimed)
+        return None
+
+    @staticmethod
+    def _read(path: Path) -> List[Dict[str, Any]]:
+        events = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # Torn final line from a writer that died mid-append
+                    logger.warning(f"Skipping malformed activity event in {path.name}")
+        return events
+
+    def ack(self, token: Path) -> None:
+        try:
+            token.unlink()
+        except FileNotFoundError:
+            pass
+
+    def restore(self, token: Path) -> None:
+        base = self._base(token.name)
+        try:
+            os.rename(token, self.directory / f"{base}{self.READY}")
+        except FileNotFoundError:
+            pass
+
+    def dead_letter(self, events: List[Dict[str, Any]]) -> None:
+        """Set aside events the database rejected; drainers never claim them."""
+        path = self.directory / f"{time.time_ns()}-{socket.gethostname()}-{os.getpid()}-{len(events)}{self.DEAD}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(event, separators=(",", ":")) + "\n" for event in events)
+
+    def backlog(self) -> int:
+        """Events waiting to be drained (sealed segments are counted from their names)."""
+        checked_at, sealed = self._backlog
+        if time.monotonic() - checked_at >= 1.0:
+            sealed = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith((self.READY, self.CLAIMED)):
+                    try:
+                        sealed += int(self._base(entry.name).rsplit("-", 1)[1])
+                    except (IndexError, ValueError):
+                        continue
+            self._backlog = (time.monotonic(), sealed)
+        return sealed + self._active_count
+
+
+class RedisEventStore:
+    """Event buffer shared by every process through a Redis stream."""
+
+    STREAM_KEY = "activity:events"
+    DEAD_LETTER_KEY = "activity:events:dead"
+    DEAD_LETTER_MAXLEN = 100000
+    GROUP = "activity-ingestion"
+
+    def __init__(self, url: str, stale_after: float = 300.0):
+        import redis
+
+        self.client = redis.from_url(url)
+        self.stale_after = stale_after
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        try:
+            self.client.xgroup_create(self.STREAM_KEY, self.GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def append(self, event: Dict[str, Any]) -> None:
+        self.client.xadd(self.STREAM_KEY, {"event": json.dumps(event, separators=(",", ":"))})
+
+    def claim(self, limit: int) -> Optional[Tuple[List[bytes], List[Dict[str, Any]]]]:
+        # Entries a crashed drainer read but never acknowledged come first
+        reclaimed = self.client.xautoclaim(
+            self.STREAM_KEY, self.GROUP, self.consumer, min_idle_time=int(self.stale_after * 1000), count=limit
+        )
+        entries = reclaimed[1]
+        if not entries:
+            response = self.client.xreadgroup(self.GROUP, self.consumer, {self.STREAM_KEY: ">"}, count=limit)
+            entries = response[0][1] if response else []
+        if not entries:
+            return None
+        ids = [entry_id for entry_id, _ in entries]
+        events = [json.loads(fields[b"event"]) for _, fields in entries if fields and b"event" in fields]
+        return ids, events
+
+    def ack(self, token: List[bytes]) -> None:
+        pipe = self.client.pipeline()
+        pipe.xack(self.STREAM_KEY, self.GROUP, *token)
+        pipe.xdel(self.STREAM_KEY, *token)
+        pipe.execute()
+
+    def restore(self, token: List[bytes]) -> None:
+        # Unacknowledged entries stay pending and are reclaimed after stale_after
+        pass
+
+    def dead_letter(self, events: List[Dict[str, Any]]) -> None:
+        pipe = self.client.pipeline()
+        for event in events:
+            pipe.xadd(
+                self.DEAD_LETTER_KEY,
+                {"event": json.dumps(event, separators=(",", ":"))},
+                maxlen=self.DEAD_LETTER_MAXLEN,
+                approximate=True,
+            )
+        pipe.execute()
+
+    def backlog(self) -> int:
+        return self.client.xlen(self.STREAM_KEY)
+
+
+class ActivityIngestion:
+    """
+    Buffers activity events durably and writes them to UserClick in batches.
+    """
+
+    # Actions that require an authenticated user
+    USER_ACTIONS = frozenset({"cart_add", "cart_remove", "favorite", "unfavorite"})
+
+    STAT_KEYS = (
+        "accepted",
+        "dropped_backpressure",
+        "dropped_errors",
+        "processed",
+        "written",
+        "skipped_unknown_product",
+        "skipped_anonymous",
+        "skipped_duplicate",
+        "batches",
+        "failed_batches",
+        "dead_lettered",
+    )
+
+    def __init__(self, store=None):
+        if store is None:
+            stale_after = getattr(settings, "ACTIVITY_INGESTION_STALE_AFTER", 300)
+            if getattr(settings, "ACTIVITY_INGESTION_BACKEND", "spool") == "redis":
+                store = RedisEventStore(
+                    getattr(settings, "ACTIVITY_INGESTION_REDIS_URL", "redis://localhost:6379/3"),
+                    stale_after=stale_after,
+                )
+            else:
+                store = SpoolEventStore(
+                    getattr(settings, "ACTIVITY_SPOOL_DIR", None) or _default_spool_dir(),
+                    segment_size=getattr(settings, "ACTIVITY_SPOOL_SEGMENT_SIZE", 500),
+                    segment_age=getattr(settings, "ACTIVITY_SPOOL_SEGMENT_AGE", 5),
+                    stale_after=stale_after,
+                )
+        self.store = store
+        self.stats = dict.fromkeys(self.STAT_KEYS, 0)
+        self.last_drain_at = None
+        self._stats_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, "ACTIVITY_INGESTION_BATCH_SIZE", 500)
+
+    @property
+    def max_pending(self) -> int:
+        return getattr(settings, "ACTIVITY_INGESTION_MAX_PENDING", 100000)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        action: str,
+        product_ids,
+        user_id=None,
+        session_key: Optional[str] = None,
+        request_meta: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Buffer one activity event.
+
+        Args:
+            action: UserClick action
+            product_ids: Product primary keys the action applies to
+            user_id: Authenticated user id, if any
+            session_key: Session key for anonymous visitors
+            request_meta: ip_address / user_agent / referer of the request
+
+        Returns:
+            bool: False if the event was dropped
+        """
+        try:
+            if self.store.backlog() >= self.max_pending:
+                self._count("dropped_backpressure")
+                return False
+            meta = request_meta or {}
+            self.store.append(
+                {
+                    "action": action,
+                    "product_ids": [str(pk) for pk in product_ids],
+                    "user_id": str(user_id) if user_id else None,
+                    "session_key": session_key,
+                    "ip_address": _clean_ip(meta.get("ip_address")),
+                    "user_agent": meta.get("user_agent", ""),
+                    "referer": meta.get("referer") or None,
+                    "ts": time.time(),
+                }
+            )
+        except Exception as e:
+            self._count("dropped_errors")
+            logger.error(f"Error buffering {action} activity event: {e}")
+            return False
+        self._count("accepted")
+        return True
+
+    # ------------------------------------------------------------------
+    # Drain path
+    # ------------------------------------------------------------------
+
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """
+        Write buffered events to the database.
+
+        Args:
+            max_batches: Stop after this many batches (None drains everything)
+
+        Returns:
+            Number of UserClick rows written
+        """
+        written = 0
+        batches = 0
+        with self._drain_lock:
+            while max_batches is None or batches < max_batches:
+                claimed = self.store.claim(self.batch_size)
+                if claimed is None:
+                    break
+                token, events = claimed
+                try:
+                    written += self._write(events)
+                except Exception:
+                    # Transient failure: the batch goes back to the buffer and is retried by the next drain
+                    self.store.restore(token)
+                    self._count("failed_batches")
+                    raise
+                self.store.ack(token)
+                self._count("processed", len(events))
+                self._count("batches")
+                batches += 1
+            self.last_drain_at = datetime.now(dt_timezone.utc)
+        if written:
+            from activity.services.sketches import get_visitor_sketches
+
+            try:
+                get_visitor_sketches().flush()
+            except Exception as e:
+                # The sketches stay buffered for the next flush; the batch itself is committed
+                logger.error(f"Error flushing visitor sketches after drain: {e}")
+        return written
+
+    def _write(self, events: List[Dict[str, Any]]) -> int:
+        from activity.models import UserClick
+        from activity.services.dedup import get_activity_deduplicator
+        from activity.services.encoding import get_referrer_encoder, get_user_agent_encoder
+        from activity.services.sketches import get_visitor_sketches
+        from marketplace.catalog.domain.services.counters import get_product_counters
+
+        User = get_user_model()
+        product_ids = {pk for event in events for pk in event.get("product_ids", [])}
+        live_products = {
+            str(pk): seller_id
+            for pk, seller_id in Product.objects.filter(pk__in=product_ids, is_active=True).values_list(
+                "pk", "seller_id"
+            )
+        }
+        user_ids = {event["user_id"] for event in events if event.get("user_id")}
+        live_users = {str(pk) for pk in User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)}
+        user_agent_ids = get_user_agent_encoder().encode_many(event.get("user_agent") for event in events)
+        referer_ids = get_referrer_encoder().encode_many(event.get("referer") for event in events)
+
+        # (event, user_id, ts, product_id) for every live product, in event-time order
+        candidates = []
+        skipped = defaultdict(int)
+        for event in sorted(events, key=lambda e: e.get("ts", 0)):
+            action = event["action"]
+            user_id = event.get("user_id") if event.get("user_id") in live_users else None
+            if action in self.USER_ACTIONS and user_id is None:
+                skipped["skipped_anonymous"] += 1
+                continue
+            ts = event.get("ts") or time.time()
+            for product_id in event.get("product_ids", []):
+                if product_id not in live_products:
+                    skipped["skipped_unknown_product"] += 1
+                    continue
+                candidates.append((event, user_id, ts, product_id))
+
+        # Double renders (React StrictMode, double clicks, refreshes) are dropped by the
+        # same deduplicator as UserClick.track_activity, so repeats are caught across
+        # batches and processes; one store round trip per batch. Keys carry the event
+        # time, so real views seconds apart in one segment are both kept
+        dedup_index, dedup_events = [], []
+        for i, (event, user_id, ts, product_id) in enumerate(candidates):
+            visitor = user_id or event.get("session_key")
+            if event["action"] in UserClick.DEDUP_ACTIONS and visitor:
+                dedup_index.append(i)
+                dedup_events.append((visitor, event["action"], product_id, ts))
+        is_new = get_activity_deduplicator().are_new(dedup_events)
+        duplicates = {i for i, new in zip(dedup_index, is_new) if not new}
+        skipped["skipped_duplicate"] += len(duplicates)
+
+        # (event, its UserClick rows) in event-time order
+        rows: List[Tuple[Dict[str, Any], list]] = []
+        for i, (event, user_id, ts, product_id) in enumerate(candidates):
+            if i in duplicates:
+                continue
+            click = UserClick(
+                product_id=product_id,
+                user_id=user_id,
+                action=event["action"],
+                session_key=None if user_id else event.get("session_key"),
+                ip_address=_clean_ip(event.get("ip_address")),
+                user_agent_id=user_agent_ids.get(event.get("user_agent")),
+                referer_id=referer_ids.get(event.get("referer")),
+                created_at=datetime.fromtimestamp(ts, tz=dt_timezone.utc),
+            )
+            if rows and rows[-1][0] is event:
+                rows[-1][1].append(click)
+            else:
+                rows.append((event, [click]))
+
+        clicks = self._insert(rows)
+        if clicks:
+            self._refresh_late_rollups(clicks)
+
+        deltas: Dict[Tuple[str, str], int] = defaultdict(int)
+        for click in clicks:
+            for field, amount in UserClick.METRIC_DELTAS.get(click.action, {}).items():
+                deltas[(click.product_id, field)] += amount
+        counters = get_product_counters()
+        for (product_id, field), amount in deltas.items():
+            if amount:
+                counters.increment_metrics(product_id, field, amount)
+
+        get_visitor_sketches().observe_many(
+            (click.product_id, live_products[click.product_id], click.user_id, click.session_key, click.created_at)
+            for click in clicks
+        )
+
+        for key, amount in skipped.items():
+            self._count(key, amount)
+        self._count("written", len(clicks))
+        logger.debug(f"Activity batch: {len(clicks)} rows from {len(events)} events")
+        return len(clicks)
+
+    @staticmethod
+    def _refresh_late_rollups(clicks) -> None:
+        """Recompute the activity rollups of hours this batch reached too late for their lookback."""
+        from activity.services.analytics import ActivityAnalytics
+
+        try:
+            ActivityAnalytics().refresh_late(click.created_at for click in clicks)
+        except Exception as e:
+            # The rows are committed; only their late hours' rollups stay stale until a rebuild
+            logger.error(f"Error refreshing late activity rollups: {e}")
+
+    def _insert(self, rows: List[Tuple[Dict[str, Any], list]]) -> list:
+        """
+        Insert the batch's UserClick rows; returns the rows written.
+
+        If the database rejects the batch for its data, each event is retried
+        on its own and the events that still fail are dead-lettered. Other
+        errors propagate so the whole batch is retried later.
+        """
+        from activity.models import UserClick
+
+        clicks = [click for _, event_clicks in rows for click in event_clicks]
+        try:
+            with transaction.atomic():
+                UserClick.objects.bulk_create(clicks, batch_size=500)
+            return clicks
+        except (DataError, IntegrityError) as e:
+            logger.warning(f"Activity batch rejected ({e}); retrying {len(rows)} events one by one")
+
+        written, rejected = [], []
+        for event, event_clicks in rows:
+            try:
+                with transaction.atomic():
+                    UserClick.objects.bulk_create(event_clicks)
+            except (DataError, IntegrityError) as e:
+                logger.error(f"Dead-lettering {event.get('action')} activity event: {e}")
+                rejected.append(event)
+                continue
+            written.extend(event_clicks)
+        if rejected:
+            self.store.dead_letter(rejected)
+            self._count("dead_lettered", len(rejected))
+        return written
+
+    def status(self) -> Dict[str, Any]:
+        """Buffer depth, capacity and throughput/drop counters."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        try:
+            pending = self.store.backlog()
+        except Exception as e:
+            logger.error(f"Error reading activity backlog: {e}")
+            pending = None
+        return {
+            "backend": type(self.store).__name__,
+            "queue_size": pending,
+            "capacity": self.max_pending,
+            "backpressure": pending is not None and pending >= self.max_pending,
+            "last_drain_at": self.last_drain_at.isoformat() if self.last_drain_at else None,
+            **stats,
+        }
+
+
+_ingestion = None
+_ingestion_lock = threading.Lock()
+
+
+def get_activity_ingestion() -> ActivityIngestion:
+    """Return the process-wide ActivityIngestion instance."""
+    global _ingestion
+    if _ingestion is None:
+        with _ingestion_lock:
+            if _ingestion is None:
+                _ingestion = ActivityIngestion()
+    return _ingestion
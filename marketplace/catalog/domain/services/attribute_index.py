@@ -0,0 +1,140 @@
+"""
+ProductAttributeIndex - normalized tag and color lookup tables
+
+Product.tags and Product.colors are JSON lists. Filtering them with JSON
+``icontains`` scans every row and false-matches substrings ("red" inside
+"tired"), so each list is mirrored into ProductTag / ProductColor rows with
+one normalized value per row. Filters become semi-joins on the
+(value, product) index and facet counts become a grouped indexed join.
+
+The tables are maintained from model signals (see
+marketplace.catalog.signals) and can be rebuilt with
+``python manage.py rebuild_attribute_index``.
+"""
+
+import logging
+from typing import Iterable, List, Set
+
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet
+
+from marketplace.catalog.domain.models.attributes import ProductColor, ProductTag
+from marketplace.catalog.domain.models.catalog import Product
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_values(values, max_length: int = ProductTag.MAX_LENGTH) -> Set[str]:
+    """
+    Normalize a JSON tag/color list (or a comma-separated string) to lookup values.
+
+    Args:
+        values: List of raw values, a comma-separated string, or None
+
+    Returns:
+        Set of trimmed, lowercased, non-empty values
+    """
+    if not values:
+        return set()
+    if isinstance(values, str):
+        values = values.split(",")
+    elif not isinstance(values, (list, tuple, set)):
+        return set()
+    return {str(value).strip().lower()[:max_length] for value in values if str(value).strip()}
+
+
+class ProductAttributeIndex:
+    """
+    Maintains and queries the ProductTag / ProductColor tables.
+    """
+
+    # Product field -> lookup model
+    ATTRIBUTES = {"tags": ProductTag, "colors": ProductColor}
+
+    # Product fields that affect the index; saves touching only other fields are ignored
+    INDEXED_FIELDS = frozenset(ATTRIBUTES)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def sync_product(self, product: Product) -> None:
+        """Bring a product's tag and color rows in line with its JSON fields."""
+        with transaction.atomic():
+            for field, model in self.ATTRIBUTES.items():
+                wanted = normalize_values(getattr(product, field))
+                existing = set(model.objects.filter(product_id=product.pk).values_list("value", flat=True))
+                if existing - wanted:
+                    model.objects.filter(product_id=product.pk, value__in=existing - wanted).delete()
+                if wanted - existing:
+                    model.objects.bulk_create(
+                        [model(product_id=product.pk, value=value) for value in wanted - existing]
+                    )
+
+    def rebuild(self, batch_size: int = 500) -> int:
+        """
+        Rebuild both tables from the JSON fields of every product.
+
+        Returns:
+            Number of products indexed
+        """
+        indexed = 0
+        with transaction.atomic():
+            for model in self.ATTRIBUTES.values():
+                model.objects.all().delete()
+
+            rows = Product.objects.order_by("pk").values_list("pk", *self.ATTRIBUTES)
+            pending = {model: [] for model in self.ATTRIBUTES.values()}
+            for pk, *attribute_values in rows.iterator(chunk_size=batch_size):
+                for model, values in zip(self.ATTRIBUTES.values(), attribute_values):
+                    pending[model].extend(model(product_id=pk, value=value) for value in normalize_values(values))
+                indexed += 1
+                if indexed % batch_size == 0:
+                    self._flush(pending)
+            self._flush(pending)
+
+        logger.info(f"Attribute index rebuilt for {indexed} products")
+        return indexed
+
+    @staticmethod
+    def _flush(pending) -> None:
+        for model, objects in pending.items():
+            if objects:
+                model.objects.bulk_create(objects, batch_size=1000)
+                objects.clear()
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def filter_q(self, field: str, values: Iterable[str]) -> Q:
+        """
+        Return a Q matching products having any of the given tags/colors.
+
+        Args:
+            field: "tags" or "colors"
+            values: Raw values (list or comma-separated string)
+
+        Returns:
+            Q with an indexed ``pk IN (SELECT product_id ...)`` semi-join
+        """
+        model = self.ATTRIBUTES[field]
+        wanted = normalize_values(values)
+        return Q(pk__in=model.objects.filter(value__in=wanted).values("product_id"))
+
+    def facet_counts(self, field: str, products: QuerySet, limit: int = 20) -> List[dict]:
+        """
+        Count products per tag/color within a product queryset.
+
+        Returns:
+            [{"value": ..., "count": ...}], most common first
+        """
+        model = self.ATTRIBUTES[field]
+        rows = (
+            model.objects.filter(product__in=products.order_by().values("pk"))
+            .values("value")
+            .annotate(count=Count("product_id"))
+            .order_by("-count", "value")[:limit]
+        )
+        return [{"value": row["value"], "count": row["count"]} for row in rows]
@@ -0,0 +1,283 @@
+"""
+AutocompleteIndex - edge n-gram index for search-as-you-type
+
+Products are tokenized (name, brand, category name) and every token prefix of
+MIN_PREFIX_LENGTH..MAX_PREFIX_LENGTH characters is stored in
+ProductAutocompletePrefix, pointing at a denormalized ProductAutocompleteEntry.
+A keystroke is answered by a single indexed lookup on the prefix table joined
+to its entry; no Product, Category or ProductImage rows are read.
+
+The index is maintained incrementally from model signals (see
+marketplace.catalog.signals) and can be rebuilt with
+``python manage.py rebuild_autocomplete_index``. Counter flushes write with
+``UPDATE`` and fire no signals, so popularity is brought up to date by
+``refresh_popularity`` from the periodic trending job.
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.models.search_index import ProductAutocompleteEntry, ProductAutocompletePrefix
+
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_SPLIT_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Split text into lowercase, accent-stripped word tokens.
+
+    Args:
+        text: Raw text (product name, query, ...)
+
+    Returns:
+        List of tokens in order of appearance
+    """
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return [token for token in _TOKEN_SPLIT_RE.split(stripped.lower()) if token and token != "_"]
+
+
+def edge_ngrams(tokens: Iterable[str]) -> Set[str]:
+    """Return every prefix of each token within the configured length bounds."""
+    min_length = ProductAutocompletePrefix.MIN_PREFIX_LENGTH
+    max_length = ProductAutocompletePrefix.MAX_PREFIX_LENGTH
+    prefixes = set()
+    for token in tokens:
+        for length in range(min_length, min(len(token), max_length) + 1):
+            prefixes.add(token[:length])
+    return prefixes
+
+
+class AutocompleteIndex:
+    """
+    Maintains and queries the product autocomplete index.
+
+    Popularity mirrors the previous ``-view_count, -favorite_count`` ordering
+    as a single indexable number. It is captured when a product is indexed,
+    so view-count-only saves do not rewrite the prefix rows, and refreshed in
+    batch by refresh_popularity().
+    """
+
+    FAVORITE_WEIGHT = 5
+    # Candidates read per round trip when some tokens must be verified in Python
+    CANDIDATE_MULTIPLIER = 5
+
+    # Product fields that affect the index; saves touching only other fields are ignored
+    INDEXED_FIELDS = frozenset({"name", "brand", "category", "category_id", "price", "is_active"})
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def index_product(self, product: Product) -> None:
+        """
+        Create or refresh the index rows for a product.
+
+        Inactive products are removed from the index.
+
+        Args:
+            product: Product instance
+        """
+        with transaction.atomic():
+            if not product.is_active:
+                self.remove_product(product.pk)
+                return
+
+            category_name = product.category.name if product.category_id else ""
+            popularity = self._popularity(product)
+            prefixes = edge_ngrams(normalize_tokens(f"{product.name} {product.brand} {category_name}"))
+
+            entry, _ = ProductAutocompleteEntry.objects.update_or_create(
+                product_id=product.pk,
+                defaults={
+                    "name": product.name,
+                    "brand": product.brand or "",
+                    "category_name": category_name,
+                    "price": product.price,
+                    "image_key": self._primary_image_key(product),
+                    "popularity": popularity,
+                },
+            )
+            ProductAutocompletePrefix.objects.filter(entry=entry).delete()
+            ProductAutocompletePrefix.objects.bulk_create(
+                [ProductAutocompletePrefix(prefix=prefix, entry=entry, popularity=popularity) for prefix in prefixes]
+            )
+
+    def refresh_image(self, product_id) -> None:
+        """Update only the stored primary image key of an indexed product."""
+        with transaction.atomic():
+            product = Product.objects.filter(pk=product_id).first()
+            if product is None:
+                return
+            ProductAutocompleteEntry.objects.filter(product_id=product_id).update(
+                image_key=self._primary_image_key(product)
+            )
+
+    def remove_product(self, product_id) -> None:
+        """Drop a product from the index (prefix rows cascade)."""
+        ProductAutocompleteEntry.objects.filter(product_id=product_id).delete()
+
+    def refresh_popularity(self, batch_size: int = 1000) -> int:
+        """
+        Copy current view and favorite counts into the popularity of stale index rows.
+
+        One query finds the entries whose popularity no longer matches their
+        product; each batch of them is then written with one bulk UPDATE of
+        the entries and one UPDATE of their prefix rows.
+
+        Returns:
+            Number of products whose popularity changed
+        """
+        popularity = F("view_count") + F("favorite_count") * self.FAVORITE_WEIGHT
+        stale = list(
+            Product.objects.filter(autocomplete_entry__isnull=False)
+            .annotate(current_popularity=popularity)
+            .exclude(autocomplete_entry__popularity=F("current_popularity"))
+            .values_list("pk", "current_popularity")
+        )
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start : start + batch_size]
+            with transaction.atomic():
+                ProductAutocompleteEntry.objects.bulk_update(
+                    [ProductAutocompleteEntry(product_id=pk, popularity=value) for pk, value in batch],
+                    ["popularity"],
+                )
+                ProductAutocompletePrefix.objects.filter(entry_id__in=[pk for pk, _ in batch]).update(
+                    popularity=Subquery(
+                        ProductAutocompleteEntry.objects.filter(pk=OuterRef("entry_id")).values("popularity")[:1]
+                    )
+                )
+        logger.debug(f"Refreshed autocomplete popularity of {len(stale)} products")
+        return len(stale)
+
+    def rebuild(self, batch_size: int = 500) -> int:
+        """
+        Rebuild the whole index from active products.
+
+        Args:
+            batch_size: Products loaded per batch
+
+        Returns:
+            Number of products indexed
+        """
+        ProductAutocompleteEntry.objects.all().delete()
+        queryset = (
+            Product.objects.filter(is_active=True).select_related("category").prefetch_related("images").order_by("pk")
+        )
+        indexed = 0
+        for product in queryset.iterator(chunk_size=batch_size):
+            self.index_product(product)
+            indexed += 1
+        return indexed
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def lookup(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Return autocomplete suggestions for a partial query.
+
+        Args:
+            query: Partial search query
+            limit: Maximum suggestions
+
+        Returns:
+            List of suggestion dicts (id, name, category, price, image)
+        """
+        tokens = normalize_tokens(query)
+        if not tokens or limit <= 0:
+            return []
+
+        min_length = ProductAutocompletePrefix.MIN_PREFIX_LENGTH
+        max_length = ProductAutocompletePrefix.MAX_PREFIX_LENGTH
+        # Every token is matched against its stored prefix in SQL, longest (most selective) first
+        prefixes = sorted({token[:max_length] for token in tokens if len(token) >= min_length}, key=len, reverse=True)
+        if not prefixes:
+            return []
+        rows = ProductAutocompletePrefix.objects.filter(prefix=prefixes[0])
+        for prefix in prefixes[1:]:
+            rows = rows.filter(entry__prefixes__prefix=prefix)
+        rows = rows.select_related("entry").order_by("-popularity")
+
+        # Single characters and the part of a token beyond the stored prefixes can't be
+        # matched in SQL; those queries read candidates until the limit is filled
+        needs_check = any(len(token) < min_length or len(token) > max_length for token in tokens)
+        if needs_check:
+            rows = rows.iterator(chunk_size=limit * self.CANDIDATE_MULTIPLIER)
+        else:
+            rows = rows[:limit]
+
+        suggestions = []
+        for row in rows:
+            entry = row.entry
+            if needs_check and not self._matches_all(entry, tokens):
+                continue
+            suggestions.append(
+                {
+                    "id": str(entry.product_id),
+                    "name": entry.name,
+                    "category": entry.category_name or None,
+                    "price": float(entry.price),
+                    "image": self.resolve_image_url(entry.image_key),
+                }
+            )
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    @staticmethod
+    def resolve_image_url(image_key: str) -> Optional[str]:
+        """
+        Turn a stored image key into a URL without any database access.
+
+        With the S3 image proxy enabled (the default) this is plain string
+        formatting; otherwise the key is presigned locally by boto3.
+        """
+        if not image_key:
+            return None
+        try:
+            if getattr(settings, "USE_S3", False):
+                from utils.s3_storage import get_s3_storage
+
+                use_proxy = getattr(settings, "S3_USE_PROXY_FOR_IMAGE_LINKS", True)
+                return get_s3_storage().get_file_url(image_key, public=use_proxy, use_proxy=use_proxy)
+            return default_storage.url(image_key)
+        except Exception as e:
+            logger.warning(f"Could not build autocomplete image URL for '{image_key}': {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _popularity(self, product: Product) -> int:
+        return (product.view_count or 0) + (product.favorite_count or 0) * self.FAVORITE_WEIGHT
+
+    @staticmethod
+    def _primary_image_key(product: Product) -> str:
+        images = list(product.images.all())
+        if not images:
+            return ""
+        image = next((img for img in images if img.is_primary), images[0])
+        if image.s3_key:
+            return image.s3_key
+        return image.image.name if image.image else ""
+
+    @staticmethod
+    def _matches_all(entry: ProductAutocompleteEntry, tokens: List[str]) -> bool:
+        entry_tokens = normalize_tokens(f"{entry.name} {entry.brand} {entry.category_name}")
+        return all(any(candidate.startswith(token) for candidate in entry_tokens) for token in tokens)
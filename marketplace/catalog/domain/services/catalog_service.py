@@ -12,7 +12,6 @@ from typing import Any, Dict, List, Optional
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.models import Count, Q
 
@@ -23,6 +22,8 @@ from infrastructure.storage.interface import StorageException
 from marketplace.catalog.domain.models.catalog import Product, ProductImage
 from marketplace.catalog.domain.models.category import Category
 from marketplace.catalog.domain.services.base import BaseService, ErrorCodes, ServiceResult, service_err, service_ok
+from marketplace.catalog.domain.services.counters import get_product_counters
+from marketplace.catalog.domain.services.pagination import InvalidCursor, paginate
 from utils.rbac import is_seller
 
 
@@ -55,6 +56,7 @@ class CatalogService(BaseService):
         """
         super().__init__()
         self.storage = storage or container.storage()
+        self.counters = get_product_counters()
 
     @BaseService.log_performance
     def list_products(
@@ -63,15 +65,24 @@ class CatalogService(BaseService):
         page: int = 1,
         page_size: int = 20,
         ordering: str = "-created_at",
+        cursor: Optional[str] = None,
+        include_count: Optional[bool] = None,
     ) -> ServiceResult[Dict[str, Any]]:
         """
         List products with filtering and pagination.
 
+        Pass ``cursor`` ("" for the first page, then ``next_cursor`` /
+        ``previous_cursor`` from the response) for keyset pagination, where
+        every page costs the same and the COUNT(*) only runs with
+        ``include_count=True``. Without a cursor, page-number pagination is used.
+
         Args:
             filters: Optional filters (category, seller, is_active, etc.)
             page: Page number (1-indexed)
             page_size: Items per page
             ordering: Sort order (default: newest first)
+            cursor: Keyset cursor (None for page-number pagination)
+            include_count: Compute the total count in cursor mode
 
         Returns:
             ServiceResult with paginated product list
@@ -145,25 +156,20 @@ class CatalogService(BaseService):
                     queryset = queryset.order_by("-created_at")
 
                 # Paginate
-                paginator = Paginator(queryset, page_size)
-                page_obj = paginator.get_page(page)
-
-                result_data = {
-                    "results": list(page_obj.object_list),
-                    "count": paginator.count,
-                    "page": page,
-                    "page_size": page_size,
-                    "num_pages": paginator.num_pages,
-                    "has_next": page_obj.has_next(),
-                    "has_previous": page_obj.has_previous(),
-                }
+                result_data = paginate(queryset, page, page_size, cursor=cursor, include_count=include_count)
 
-                span.set_attribute("result.count", paginator.count)
+                if result_data["count"] is not None:
+                    span.set_attribute("result.count", result_data["count"])
 
-                self.logger.info(f"Listed products: count={paginator.count}, page={page}/{paginator.num_pages}")
+                self.logger.info(
+                    f"Listed products: count={result_data['count']}, page={page}/{result_data['num_pages']}, "
+                    f"cursor={'yes' if cursor is not None else 'no'}"
+                )
 
                 return service_ok(result_data)
 
+            except InvalidCursor as e:
+                return service_err(ErrorCodes.INVALID_INPUT, str(e))
             except Exception as e:
                 self.logger.error(f"Error listing products: {e}", exc_info=True)
                 span.record_exception(e)
@@ -194,10 +200,10 @@ class CatalogService(BaseService):
                 .get(id=product_id, is_active=True)
             )
 
-            # Track view asynchronously (TODO: Move to Celery task)
+            # Buffered and flushed in batches, so reads don't write the product row
             if track_view:
+                self.counters.increment_product(product.pk, "view_count")
                 product.view_count += 1
-                product.save(update_fields=["view_count"])
 
             self.logger.info(f"Retrieved product: {product.name} (id={product_id})")
 
@@ -0,0 +1,280 @@
+"""
+ProductCounters - buffered product engagement counters
+
+Views, clicks, favorites and cart additions used to be written one row at a
+time: ``get_product`` saved the product on every read, and every UserClick
+did a get_or_create + ``+= 1`` + save() on ProductMetrics, which loses
+increments when two requests race.
+
+Increments are now accumulated per (model, product, field) in a counter
+store and flushed as grouped, atomic ``SET field = field + n`` updates:
+products with identical pending deltas share one UPDATE statement.
+
+Stores (PRODUCT_COUNTER_BACKEND):
+
+- ``memory`` (default): per-process dict. Flushed inline by whichever
+  increment finds the buffer older than PRODUCT_COUNTER_FLUSH_INTERVAL
+  seconds or larger than PRODUCT_COUNTER_MAX_PENDING keys, and at exit.
+  An interval of 0 writes through on every increment. The beat flush task
+  runs in the Celery worker and can't reach web-process buffers, and
+  increments still buffered when a process is killed or crashes are lost;
+  use ``redis`` where that matters.
+- ``redis``: HINCRBY into a shared hash (PRODUCT_COUNTER_REDIS_URL),
+  flushed by the ``flush_product_counters_task`` Celery beat job. The hash
+  is renamed before it is read, so increments that arrive during a flush
+  land in the next batch instead of being lost.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.models.interaction import ProductMetrics
+
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[str, str, str]  # (target, product_id, field)
+
+
+class MemoryCounterStore:
+    """Thread-safe in-process counter buffer."""
+
+    def __init__(self):
+        self._counts: Dict[CounterKey, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, key: CounterKey, amount: int) -> int:
+        """Add to a counter; returns the number of buffered keys."""
+        with self._lock:
+            self._counts[key] += amount
+            return len(self._counts)
+
+    def drain(self) -> Dict[CounterKey, int]:
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        return dict(counts)
+
+    def restore(self, counts: Dict[CounterKey, int]) -> None:
+        with self._lock:
+            for key, amount in counts.items():
+                self._counts[key] += amount
+
+
+class RedisCounterStore:
+    """Counter buffer shared by every process through a Redis hash."""
+
+    PENDING_KEY = "product_counters:pending"
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.from_url(url)
+
+    @staticmethod
+    def _field(key: CounterKey) -> str:
+        return "|".join(key)
+
+    def add(self, key: CounterKey, amount: int) -> int:
+        self.client.hincrby(self.PENDING_KEY, self._field(key), amount)
+        # Redis buffers are flushed by the beat job, never inline
+        return 0
+
+    def drain(self) -> Dict[CounterKey, int]:
+        import redis
+
+        processing_key = f"product_counters:processing:{uuid.uuid4().hex}"
+        try:
+            self.client.rename(self.PENDING_KEY, processing_key)
+        except redis.ResponseError:
+            return {}  # nothing pending
+        raw = self.client.hgetall(processing_key)
+        self.client.delete(processing_key)
+        counts = {}
+        for field, amount in raw.items():
+            target, product_id, name = field.decode().split("|", 2)
+            counts[(target, product_id, name)] = int(amount)
+        return counts
+
+    def restore(self, counts: Dict[CounterKey, int]) -> None:
+        pipe = self.client.pipeline()
+        for key, amount in counts.items():
+            pipe.hincrby(self.PENDING_KEY, self._field(key), amount)
+        pipe.execute()
+
+
+class ProductCounters:
+    """
+    Buffers counter increments for Product and ProductMetrics and flushes them in batches.
+    """
+
+    PRODUCT = "product"
+    METRICS = "metrics"
+
+    FIELDS = {
+        PRODUCT: frozenset({"view_count", "click_count", "favorite_count"}),
+        METRICS: frozenset({"total_views", "total_clicks", "total_favorites", "total_cart_additions"}),
+    }
+
+    def __init__(self, store=None):
+        backend = getattr(settings, "PRODUCT_COUNTER_BACKEND", "memory")
+        if store is None:
+            if backend == "redis":
+                store = RedisCounterStore(
+                    getattr(settings, "PRODUCT_COUNTER_REDIS_URL", "redis://localhost:6379/3"),
+                )
+            else:
+                store = MemoryCounterStore()
+        self.store = store
+        self.flush_inline = isinstance(store, MemoryCounterStore)
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def flush_interval(self) -> float:
+        return getattr(settings, "PRODUCT_COUNTER_FLUSH_INTERVAL", 10)
+
+    @property
+    def max_pending(self) -> int:
+        return getattr(settings, "PRODUCT_COUNTER_MAX_PENDING", 1000)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def increment(self, target: str, product_id, field: str, amount: int = 1) -> None:
+        """
+        Buffer an increment (or, with a negative amount, a decrement).
+
+        Args:
+            target: ProductCounters.PRODUCT or ProductCounters.METRICS
+            product_id: Product primary key
+            field: Counter field on the target model
+            amount: Delta to apply
+        """
+        if field not in self.FIELDS[target]:
+            raise ValueError(f"Unknown {target} counter: {field}")
+        pending = self.store.add((target, str(product_id), field), amount)
+        if self.flush_inline and (
+            pending >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            try:
+                self.flush()
+            except Exception as e:
+                # The increments stay buffered; the request that triggered the flush must not fail
+                logger.error(f"Error flushing product counters: {e}", exc_info=True)
+
+    def increment_product(self, product_id, field: str, amount: int = 1) -> None:
+        self.increment(self.PRODUCT, product_id, field, amount)
+
+    def increment_metrics(self, product_id, field: str, amount: int = 1) -> None:
+        self.increment(self.METRICS, product_id, field, amount)
+
+    def flush(self) -> int:
+        """
+        Write all buffered increments to the database.
+
+        Returns:
+            Number of counter updates applied (one per product and field)
+        """
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            counts = {key: amount for key, amount in self.store.drain().items() if amount}
+            if not counts:
+                return 0
+            try:
+                self._apply(counts)
+            except Exception:
+                # Keep the increments for the next flush rather than dropping them
+                self.store.restore(counts)
+                raise
+        logger.debug(f"Flushed {len(counts)} product counter updates")
+        return len(counts)
+
+    def _apply(self, counts: Dict[CounterKey, int]) -> None:
+        # target -> product_id -> {field: delta}
+        deltas: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(lambda: defaultdict(dict))
+        for (target, product_id, field), amount in counts.items():
+            deltas[target][product_id][field] = amount
+
+        with transaction.atomic():
+            if deltas[self.PRODUCT]:
+                self._grouped_update(Product.objects.all(), "pk", deltas[self.PRODUCT])
+            if deltas[self.METRICS]:
+                self._ensure_metrics(deltas[self.METRICS].keys())
+                self._grouped_update(
+                    ProductMetrics.objects.all(),
+                    "product_id",
+                    deltas[self.METRICS],
+                    last_updated=timezone.now(),
+                )
+
+    @staticmethod
+    def _grouped_update(queryset, key_field: str, deltas: Dict[str, Dict[str, int]], **extra) -> None:
+        """One UPDATE per distinct delta set; counters never drop below zero."""
+        groups = defaultdict(list)
+        for product_id, fields in deltas.items():
+            groups[tuple(sorted(fields.items()))].append(product_id)
+        for fields, product_ids in groups.items():
+            updates = {field: ProductCounters._applied(field, amount) for field, amount in fields}
+            queryset.filter(**{f"{key_field}__in": product_ids}).update(**updates, **extra)
+
+    @staticmethod
+    def _applied(field: str, amount: int):
+        """
+        Expression for ``field + amount``, clamped at zero.
+
+        The counters are unsigned columns on MySQL, where ``0 + (-1)`` is an
+        out-of-range error before any GREATEST() could clamp it, so decrements
+        only subtract from values that are large enough.
+        """
+        if amount >= 0:
+            return F(field) + Value(amount)
+        return Case(
+            When(**{f"{field}__gte": -amount}, then=F(field) - Value(-amount)),
+            default=Value(0),
+        )
+
+    @staticmethod
+    def _ensure_metrics(product_ids) -> None:
+        existing = set(
+            str(pk)
+            for pk in ProductMetrics.objects.filter(product_id__in=product_ids).values_list("product_id", flat=True)
+        )
+        missing = [pk for pk in product_ids if pk not in existing]
+        if missing:
+            # Skip products deleted since the increment was buffered
+            live = Product.objects.filter(pk__in=missing).values_list("pk", flat=True)
+            ProductMetrics.objects.bulk_create([ProductMetrics(product_id=pk) for pk in live], ignore_conflicts=True)
+
+
+_counters = None
+_counters_lock = threading.Lock()
+
+
+def get_product_counters() -> ProductCounters:
+    """Return the process-wide ProductCounters instance."""
+    global _counters
+    if _counters is None:
+        with _counters_lock:
+            if _counters is None:
+                _counters = ProductCounters()
+                atexit.register(_flush_at_exit, _counters)
+    return _counters
+
+
+def _flush_at_exit(counters: ProductCounters) -> None:
+    try:
+        counters.flush()
+    except Exception as e:
+        logger.error(f"Error flushing product counters at exit: {e}")
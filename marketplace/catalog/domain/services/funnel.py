@@ -0,0 +1,171 @@
+"""
+ConversionFunnel - view -> click -> cart add -> purchase per product, category and seller
+
+Sellers had conversion rates only as two lifetime ratios on the analytics
+dashboard, built from denormalized counters that cannot be windowed and
+never reach the purchase step. The funnel for a time range is now computed
+in batch from data that is already aggregated:
+
+- views, clicks and cart additions come from ProductActivityRollup via one
+  grouped ActivityAnalytics.action_counts query for all of the seller's
+  products
+- purchases, units sold and revenue come from one grouped query over the
+  seller's OrderItem rows in paid orders
+- one query reads the name and category of every product that appears in
+  either, then the per-product rows are summed into per-category and
+  seller totals in a single pass
+
+So a funnel costs three queries whatever the catalogue size or traffic.
+Results are cached per seller and window (rounded to whole hours, like the
+rollups) for CONVERSION_FUNNEL_CACHE_TIMEOUT seconds; the rollups
+themselves are only refreshed every few minutes.
+"""
+
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from activity.services.analytics import ActivityAnalytics
+from marketplace.catalog.domain.models.catalog import Product
+from marketplace.ordering.domain.models.order import OrderItem
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionFunnel:
+    """
+    Computes and caches windowed conversion funnels for a seller's catalogue.
+    """
+
+    STAGES = ("views", "clicks", "cart_additions", "purchases")
+
+    # (rate name, numerator stage, denominator stage)
+    RATES = (
+        ("view_to_click_rate", "clicks", "views"),
+        ("click_to_cart_rate", "cart_additions", "clicks"),
+        ("cart_to_purchase_rate", "purchases", "cart_additions"),
+        ("view_to_purchase_rate", "purchases", "views"),
+    )
+
+    PAID_STATUSES = ["payment_confirmed", "awaiting_shipment", "shipped", "delivered"]
+
+    def __init__(self, analytics: Optional[ActivityAnalytics] = None):
+        self.analytics = analytics or ActivityAnalytics()
+        self.cache_timeout = getattr(settings, "CONVERSION_FUNNEL_CACHE_TIMEOUT", 300)
+
+    def cache_key(self, seller_id, start: datetime, end: datetime) -> str:
+        start, end = self.analytics.floor_hour(start), self.analytics.floor_hour(end)
+        return f"conversion_funnel_{seller_id}_{start:%Y%m%d%H}_{end:%Y%m%d%H}"
+
+    def seller_funnel(self, seller_id, start: datetime, end: datetime, use_cache: bool = True) -> Dict:
+        """
+        Funnel for every product of a seller over [start, end).
+
+        Args:
+            seller_id: Seller (User) primary key
+            start, end: Window bounds, resolved to whole hours
+            use_cache: Whether to serve a cached result (default: True)
+
+        Returns:
+            {"totals": stages, "categories": [...], "products": [...]}; see compute()
+        """
+        key = self.cache_key(seller_id, start, end)
+        if use_cache:
+            cached = cache.get(key)
+            if cached is not None:
+                logger.debug(f"Cache hit for conversion funnel: seller={seller_id}")
+                return cached
+
+        funnel = self.compute(seller_id, start, end)
+        cache.set(key, funnel, self.cache_timeout)
+        return funnel
+
+    def compute(self, seller_id, start: datetime, end: datetime) -> Dict:
+        """
+        Compute a seller's funnel with three grouped queries.
+
+        Returns:
+            Dict with:
+            - totals: the seller's stages
+            - categories: stages per category (category_id None for uncategorised
+              products), ordered by views
+            - products: stages per product with id, name, slug and category_id,
+              ordered by views; only products with activity or sales in the window
+        """
+        start = self.analytics.floor_hour(start)
+
+        activity = self.analytics.action_counts(start, end, seller_id=seller_id)
+        sales = {
+            str(row["product_id"]): row
+            for row in OrderItem.objects.filter(
+                seller_id=seller_id,
+                order__status__in=self.PAID_STATUSES,
+                order__created_at__gte=start,
+                order__created_at__lt=end,
+            )
+            .order_by()
+            .values("product_id")
+            .annotate(purchases=Count("id"), units_sold=Sum("quantity"), revenue=Sum("total_price"))
+        }
+        products = Product.objects.filter(pk__in=set(activity) | set(sales)).values(
+            "id", "name", "slug", "category_id", "category__name"
+        )
+
+        totals = self._empty()
+        categories: Dict = {}
+        product_rows = []
+        for product in products:
+            product_id = str(product["id"])
+            engagement = self.analytics.totals(activity.get(product_id, {}))
+            sold = sales.get(product_id, {})
+            stages = {
+                "views": engagement["views"],
+                "clicks": engagement["clicks"],
+                "cart_additions": engagement["cart_additions"],
+                "purchases": sold.get("purchases", 0),
+                "units_sold": sold.get("units_sold") or 0,
+                "revenue": sold.get("revenue") or Decimal("0"),
+            }
+            category = categories.setdefault(
+                product["category_id"],
+                {"category_id": product["category_id"], "name": product["category__name"] or "", **self._empty()},
+            )
+            for field, value in stages.items():
+                totals[field] += value
+                category[field] += value
+            product_rows.append(
+                {
+                    "id": product["id"],
+                    "name": product["name"],
+                    "slug": product["slug"],
+                    "category_id": product["category_id"],
+                    **self._with_rates(stages),
+                }
+            )
+
+        return {
+            "totals": self._with_rates(totals),
+            "categories": sorted((self._with_rates(c) for c in categories.values()), key=self._rank),
+            "products": sorted(product_rows, key=self._rank),
+        }
+
+    @staticmethod
+    def _rank(row: Dict):
+        return -row["views"], -row["purchases"]
+
+    def _empty(self) -> Dict:
+        return {**{stage: 0 for stage in self.STAGES}, "units_sold": 0, "revenue": Decimal("0")}
+
+    def _with_rates(self, stages: Dict) -> Dict:
+        """Add each step's conversion rate, as a percentage of the previous stage."""
+        rates = {
+            name: round(stages[numerator] / stages[denominator] * 100, 2) if stages[denominator] else 0.0
+            for name, numerator, denominator in self.RATES
+        }
+        return {**stages, **rates}
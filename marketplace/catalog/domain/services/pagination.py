@@ -0,0 +1,225 @@
+"""
+Keyset (cursor) pagination for product listings.
+
+Page-number pagination runs ``COUNT(*)`` over the filtered join plus
+``LIMIT/OFFSET``, so deep pages get linearly slower. Keyset pagination instead
+remembers the sort-key values of the last row served and asks for rows that
+sort strictly after it:
+
+    WHERE (created_at < :c) OR (created_at = :c AND id < :id)
+    ORDER BY created_at DESC, id DESC LIMIT :n
+
+so every page costs the same as the first, and the count is optional.
+
+The keyset is read from the queryset's own ``order_by()`` with the primary
+key appended as tie-breaker, so every ordering the services support is
+paginated without extra configuration. The tie-breaker sorts in the same
+direction as the last sort key: a mixed ``DESC, ASC`` ordering can't be read
+from an index in one direction and makes the database sort every page.
+Cursors are opaque, URL-safe tokens.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.db.models.expressions import OrderBy
+
+
+Keyset = List[Tuple[str, bool]]  # (field or annotation name, descending)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or doesn't match the ordering."""
+
+
+def get_keyset(queryset) -> Keyset:
+    """
+    Return the (field, descending) sort keys of a queryset, ending with the pk.
+
+    An appended pk tie-breaker takes the direction of the last sort key.
+
+    Raises:
+        InvalidCursor: if an ordering term can't be used as a keyset
+    """
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    keyset: Keyset = []
+    for term in ordering:
+        if isinstance(term, OrderBy) and hasattr(term.expression, "name"):
+            field, descending = term.expression.name, term.descending
+        elif isinstance(term, str) and not term.startswith("?"):
+            field, descending = term.lstrip("-"), term.startswith("-")
+        else:
+            raise InvalidCursor(f"Ordering {term!r} is not supported for cursor pagination")
+        if "__" in field:
+            raise InvalidCursor(f"Ordering on related field {field!r} is not supported for cursor pagination")
+        keyset.append(("pk" if field in ("pk", "id") else field, descending))
+        if keyset[-1][0] == "pk":
+            break
+    if not keyset or keyset[-1][0] != "pk":
+        keyset.append(("pk", keyset[-1][1] if keyset else False))
+    return keyset
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(keyset: Keyset, values: List[Any], backwards: bool = False) -> str:
+    """Encode sort-key values into an opaque cursor token."""
+    payload = {
+        "k": [f"{'-' if descending else ''}{field}" for field, descending in keyset],
+        "v": [_json_value(value) for value in values],
+        "b": backwards,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keyset: Keyset) -> Tuple[List[Any], bool]:
+    """
+    Decode a cursor token.
+
+    Returns:
+        (sort-key values, backwards)
+
+    Raises:
+        InvalidCursor: if the token is malformed or was issued for another ordering
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        keys, values, backwards = payload["k"], payload["v"], bool(payload["b"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+    expected = [f"{'-' if descending else ''}{field}" for field, descending in keyset]
+    if keys != expected or len(values) != len(keyset):
+        raise InvalidCursor("Cursor does not match the requested ordering")
+    return values, backwards
+
+
+def _after(keyset: Keyset, values: List[Any], backwards: bool) -> Q:
+    """Build the row-value comparison "sorts after values" (or before, when backwards)."""
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(keyset, values):
+        lookup = "lt" if descending != backwards else "gt"
+        condition |= equal & Q(**{f"{field}__{lookup}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _row_values(obj, keyset: Keyset) -> List[Any]:
+    return [getattr(obj, field) for field, _ in keyset]
+
+
+def paginate_keyset(queryset, page_size: int, cursor: str = "", include_count: bool = False) -> Dict[str, Any]:
+    """
+    Return one keyset page of a sorted queryset.
+
+    Args:
+        queryset: Sorted queryset
+        page_size: Items per page
+        cursor: Cursor from a previous page ("" for the first page)
+        include_count: Also run COUNT(*) over the queryset (off by default)
+
+    Returns:
+        Dict with results, count (None unless requested), page_size,
+        has_next, has_previous, next_cursor, previous_cursor
+
+    Raises:
+        InvalidCursor: if the cursor is invalid for this ordering
+    """
+    keyset = get_keyset(queryset)
+    count = queryset.count() if include_count else None
+
+    backwards = False
+    page_qs = queryset
+    if cursor:
+        values, backwards = decode_cursor(cursor, keyset)
+        page_qs = page_qs.filter(_after(keyset, values, backwards))
+
+    ordering = [f"{'-' if descending != backwards else ''}{field}" for field, descending in keyset]
+    rows = list(page_qs.order_by(*ordering)[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    # Moving forward, a cursor implies earlier rows; moving backwards, it implies later ones
+    has_next = (has_more if not backwards else bool(cursor)) and bool(rows)
+    has_previous = (bool(cursor) if not backwards else has_more) and bool(rows)
+
+    return {
+        "results": rows,
+        "count": count,
+        "page_size": page_size,
+        "has_next": has_next,
+        "has_previous": has_previous,
+        "next_cursor": encode_cursor(keyset, _row_values(rows[-1], keyset)) if has_next else None,
+        "previous_cursor": encode_cursor(keyset, _row_values(rows[0], keyset), backwards=True)
+        if has_previous
+        else None,
+    }
+
+
+def paginate(
+    queryset,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: Optional[str] = None,
+    include_count: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Paginate a sorted queryset by page number or by cursor.
+
+    With ``cursor=None`` the classic page-number contract is kept (count,
+    page, num_pages), and next/previous cursors are added so clients can
+    switch to cursor pagination from any page. Any other cursor value ("" for
+    the first page) selects keyset pagination, where ``page`` and
+    ``num_pages`` are None and the count is only computed on request.
+
+    Raises:
+        InvalidCursor: if the cursor is invalid for this ordering
+    """
+    if cursor is not None:
+        data = paginate_keyset(queryset, page_size, cursor, include_count=bool(include_count))
+        data.update({"page": None, "num_pages": None})
+        return data
+
+    # Order pages by the same keyset so ties are stable and cursors line up
+    keyset = get_keyset(queryset)
+    queryset = queryset.order_by(*[f"{'-' if descending else ''}{field}" for field, descending in keyset])
+
+    paginator = Paginator(queryset, page_size)
+    page_obj = paginator.get_page(page)
+    rows = list(page_obj.object_list)
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if page_obj.has_next():
+            next_cursor = encode_cursor(keyset, _row_values(rows[-1], keyset))
+        if page_obj.has_previous():
+            previous_cursor = encode_cursor(keyset, _row_values(rows[0], keyset), backwards=True)
+
+    return {
+        "results": rows,
+        "count": paginator.count,
+        "page": page,
+        "page_size": page_size,
+        "num_pages": paginator.num_pages,
+        "has_next": page_obj.has_next(),
+        "has_previous": page_obj.has_previous(),
+        "next_cursor": next_cursor,
+        "previous_cursor": previous_cursor,
+    }
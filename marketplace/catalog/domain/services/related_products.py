@@ -0,0 +1,269 @@
+"""
+RelatedProductsIndex - precomputed top-K related products
+
+A product's related products are scored from two signals:
+
+- Attribute similarity: same category, same brand, nearby price band, and
+  Jaccard overlap of tags and colors.
+- Co-interest: how often the same visitor viewed, favorited or added both
+  products to the cart, as a cosine over visitors mined from UserClick.
+
+Scoring every pair of products is quadratic, so candidates come from
+inverted indexes instead: products sharing a category, a (category, price
+band), brand, tag or color, plus everything co-viewed. Oversized postings are
+truncated to their most popular products, so large categories still yield
+close-priced candidates through the price band postings. Each source
+product then scores only its candidates and keeps the top K, so a rebuild
+is linear in catalog size.
+
+The result is written to RelatedProduct by the
+``refresh_related_products_task`` Celery beat job (see marketplace.tasks).
+"""
+
+import heapq
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.models.ranking import RelatedProduct
+
+
+logger = logging.getLogger(__name__)
+
+
+class RelatedProductsIndex:
+    """
+    Builds and serves the precomputed related-products table.
+    """
+
+    CATEGORY_WEIGHT = 3.0
+    BRAND_WEIGHT = 1.5
+    PRICE_WEIGHT = 1.0  # same price band; adjacent bands get half
+    TAG_WEIGHT = 2.0  # times Jaccard overlap
+    COLOR_WEIGHT = 0.5  # times Jaccard overlap
+    CO_INTEREST_WEIGHT = 6.0  # times co-interest cosine
+
+    # Consecutive price bands differ by 30%, matching the old ±30% price filter
+    PRICE_BAND_RATIO = 1.3
+
+    # Interest strength of each action; a visitor counts once per product, at their strongest action
+    INTEREST_WEIGHTS = {
+        "view": 1.0,
+        "detail_view": 1.0,
+        "click": 1.0,
+        "favorite": 2.0,
+        "cart_add": 3.0,
+    }
+    # Visitors who touched more products than this contribute their most recent ones only
+    MAX_VISITOR_PRODUCTS = 50
+    # Candidate postings longer than this keep only their most popular products
+    MAX_POSTING_SIZE = 500
+
+    def __init__(self):
+        self.top_k = getattr(settings, "RELATED_PRODUCTS_TOP_K", 20)
+        self.window_days = getattr(settings, "RELATED_PRODUCTS_WINDOW_DAYS", 90)
+        self.batch_size = getattr(settings, "RELATED_PRODUCTS_BATCH_SIZE", 500)
+
+    # ------------------------------------------------------------------
+    # Signals
+    # ------------------------------------------------------------------
+
+    def price_band(self, price) -> int:
+        """Logarithmic price band: products within ~30% of each other share or neighbour a band."""
+        return int(math.floor(math.log(max(float(price), 1.0), self.PRICE_BAND_RATIO)))
+
+    def _load_catalog(self) -> Dict[Any, Dict[str, Any]]:
+        """Load the attributes of every active product, most popular first."""
+        rows = (
+            Product.objects.filter(is_active=True)
+            .order_by("-view_count", "-favorite_count", "pk")
+            .values_list("pk", "category_id", "brand", "price", "tags", "colors")
+        )
+        catalog = {}
+        for pk, category_id, brand, price, tags, colors in rows.iterator(chunk_size=2000):
+            catalog[pk] = {
+                "category": category_id,
+                "brand": (brand or "").strip().lower(),
+                "band": self.price_band(price),
+                "tags": {str(tag).strip().lower() for tag in tags or [] if str(tag).strip()},
+                "colors": {str(color).strip().lower() for color in colors or [] if str(color).strip()},
+            }
+        return catalog
+
+    def compute_co_interest(self, now: Optional[datetime] = None) -> Dict[Any, Dict[Any, float]]:
+        """
+        Return co-interest cosine between products that share visitors.
+
+        Returns:
+            Dict mapping product_id to {other product_id: cosine}
+        """
+        from activity.models import UserClick
+
+        now = now or timezone.now()
+        rows = (
+            UserClick.objects.filter(
+                created_at__gte=now - timedelta(days=self.window_days),
+                action__in=list(self.INTEREST_WEIGHTS),
+            )
+            .exclude(user__isnull=True, session_key__isnull=True)
+            .values_list("user_id", "session_key", "product_id", "action")
+            .order_by("-created_at")
+        )
+
+        # visitor -> product -> strongest interest
+        visitors: Dict[Hashable, Dict[Any, float]] = defaultdict(dict)
+        for user_id, session_key, product_id, action in rows.iterator(chunk_size=5000):
+            if not user_id and not session_key:
+                continue
+            products = visitors[("u", user_id) if user_id else ("s", session_key)]
+            weight = self.INTEREST_WEIGHTS[action]
+            if product_id in products:
+                products[product_id] = max(products[product_id], weight)
+            elif len(products) < self.MAX_VISITOR_PRODUCTS:
+                products[product_id] = weight
+
+        norms: Dict[Any, float] = defaultdict(float)
+        dots: Dict[Any, Dict[Any, float]] = defaultdict(lambda: defaultdict(float))
+        for products in visitors.values():
+            items = list(products.items())
+            for i, (a, weight_a) in enumerate(items):
+                norms[a] += weight_a * weight_a
+                for b, weight_b in items[i + 1 :]:
+                    dots[a][b] += weight_a * weight_b
+                    dots[b][a] += weight_a * weight_b
+
+        return {
+            a: {b: dot / math.sqrt(norms[a] * norms[b]) for b, dot in others.items()} for a, others in dots.items()
+        }
+
+    def _build_postings(self, catalog: Dict[Any, Dict[str, Any]]) -> Dict[Tuple, List[Any]]:
+        """Inverted index from attribute keys to products (catalog order, i.e. most popular first)."""
+        postings: Dict[Tuple, List[Any]] = defaultdict(list)
+        for pk, attrs in catalog.items():
+            for key in self._attribute_keys(attrs):
+                if len(postings[key]) < self.MAX_POSTING_SIZE:
+                    postings[key].append(pk)
+        return postings
+
+    def _attribute_keys(self, attrs: Dict[str, Any], band_offsets: Tuple[int, ...] = (0,)) -> List[Tuple]:
+        """Posting keys of a product; candidates are looked up in the neighbouring price bands too."""
+        keys = [("category", attrs["category"])]
+        keys.extend(("band", attrs["category"], attrs["band"] + offset) for offset in band_offsets)
+        if attrs["brand"]:
+            keys.append(("brand", attrs["brand"]))
+        keys.extend(("tag", tag) for tag in attrs["tags"])
+        keys.extend(("color", color) for color in attrs["colors"])
+        return keys
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def score(self, a: Dict[str, Any], b: Dict[str, Any], co_interest: float = 0.0) -> float:
+        """Relatedness of product attributes ``b`` to ``a``."""
+        total = self.CO_INTEREST_WEIGHT * co_interest
+        if a["category"] is not None and a["category"] == b["category"]:
+            total += self.CATEGORY_WEIGHT
+        if a["brand"] and a["brand"] == b["brand"]:
+            total += self.BRAND_WEIGHT
+        band_distance = abs(a["band"] - b["band"])
+        if band_distance == 0:
+            total += self.PRICE_WEIGHT
+        elif band_distance == 1:
+            total += self.PRICE_WEIGHT / 2
+        total += self.TAG_WEIGHT * self._jaccard(a["tags"], b["tags"])
+        total += self.COLOR_WEIGHT * self._jaccard(a["colors"], b["colors"])
+        return total
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def compute(self, now: Optional[datetime] = None) -> Dict[Any, List[Tuple[Any, float]]]:
+        """
+        Compute the top-K related products of every active product.
+
+        Returns:
+            Dict mapping product_id to [(related product_id, score)], best first
+        """
+        catalog = self._load_catalog()
+        co_interest = self.compute_co_interest(now)
+        postings = self._build_postings(catalog)
+
+        results = {}
+        for pk, attrs in catalog.items():
+            co_scores = co_interest.get(pk, {})
+            candidates = set(co_scores)
+            for key in self._attribute_keys(attrs, band_offsets=(-1, 0, 1)):
+                candidates.update(postings.get(key, ()))
+            candidates.discard(pk)
+
+            scored = (
+                (other, self.score(attrs, catalog[other], co_scores.get(other, 0.0)))
+                for other in candidates
+                if other in catalog
+            )
+            # Ties are broken by product id so rebuilds are stable
+            results[pk] = heapq.nlargest(self.top_k, scored, key=lambda item: (item[1], str(item[0])))
+        return results
+
+    def rebuild(self, now: Optional[datetime] = None) -> int:
+        """
+        Recompute and store related products for the whole catalog.
+
+        Rows are replaced in batches of source products, so readers only ever
+        see a complete list for any product.
+
+        Returns:
+            Number of RelatedProduct rows written
+        """
+        now = now or timezone.now()
+        results = self.compute(now)
+
+        written = 0
+        product_ids = list(results)
+        for start in range(0, len(product_ids), self.batch_size):
+            batch = product_ids[start : start + self.batch_size]
+            rows = [
+                RelatedProduct(product_id=pk, related_id=related_id, rank=rank, score=score, computed_at=now)
+                for pk in batch
+                for rank, (related_id, score) in enumerate(results[pk], start=1)
+            ]
+            with transaction.atomic():
+                RelatedProduct.objects.filter(product_id__in=batch).delete()
+                RelatedProduct.objects.bulk_create(rows, batch_size=1000)
+            written += len(rows)
+
+        # Drop lists of products that are no longer active
+        RelatedProduct.objects.exclude(product__is_active=True).delete()
+
+        logger.info(f"Related products rebuilt: {len(product_ids)} products, {written} rows written")
+        return written
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def related(self, product_id, limit: int = 10) -> List[Product]:
+        """
+        Return the precomputed related products of a product, best first.
+
+        Returns:
+            Active related products; empty if none have been computed
+        """
+        entries = (
+            RelatedProduct.objects.filter(product_id=product_id, related__is_active=True)
+            .select_related("related__seller", "related__category")
+            .prefetch_related("related__images")
+            .order_by("rank")[:limit]
+        )
+        return [entry.related for entry in entries]
@@ -12,7 +12,8 @@ from decimal import Decimal
 from typing import Dict, List
 
 from django.core.cache import cache
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Round
 
 from marketplace.catalog.domain.models.catalog import Product
 from marketplace.catalog.domain.models.interaction import ProductReview
@@ -219,21 +220,10 @@ class ReviewMetricsService(BaseService):
             if not dist_result.ok:
                 return dist_result
 
-            # Save to Product model
-            # We use update() to avoid overwriting other fields concurrently, or select_for_update
-            # But since this is specific metrics update, update() is safer/faster for just these fields
-            # provided we don't need to trigger other signals (save() triggers signals)
-            # However, Product.save() might have logic. Let's check Product.save().
-            # It only handles slug. So update() is fine, or fetching and saving.
-            # Let's fetch and save to be safe and consistent with ORM usage.
-            try:
-                product = Product.objects.get(id=product_id)
-                product.average_rating = Decimal(str(avg_result.value))
-                product.review_count = count_result.value
-                product.save(update_fields=["average_rating", "review_count"])
-            except Product.DoesNotExist:
+            # Review writes already keep the Product columns exact (see catalog signals);
+            # refreshing here as well lets update_metrics() repair a drifted product.
+            if not self.refresh_product_rating(product_id):
                 self.logger.warning(f"Product {product_id} not found when updating metrics")
-                # We can still return the calculated metrics if needed, but it's weird.
 
             metrics = {
                 "average_rating": float(avg_result.value),
@@ -250,6 +240,33 @@ class ReviewMetricsService(BaseService):
             self.logger.error(f"Error updating metrics for product {product_id}: {e}", exc_info=True)
             return service_err(ErrorCodes.INTERNAL_ERROR, str(e))
 
+    def refresh_product_rating(self, product_id: str) -> bool:
+        """
+        Recompute Product.average_rating and Product.review_count from active reviews.
+
+        Runs as a single UPDATE with correlated subqueries, so the columns are
+        exact even with concurrent review writes, and nothing is read into Python.
+        Rating filters and the rating sort read these columns directly.
+
+        Args:
+            product_id: Product UUID
+
+        Returns:
+            True if the product exists
+        """
+        active_reviews = ProductReview.objects.filter(product_id=OuterRef("pk"), is_active=True).order_by()
+        average = active_reviews.values("product_id").annotate(value=Avg("rating")).values("value")
+        count = active_reviews.values("product_id").annotate(value=Count("id")).values("value")
+
+        updated = Product.objects.filter(pk=product_id).update(
+            average_rating=Coalesce(
+                Cast(Round(Subquery(average), 2), output_field=DecimalField(max_digits=3, decimal_places=2)),
+                Value(Decimal("0.00")),
+            ),
+            review_count=Coalesce(Subquery(count), Value(0)),
+        )
+        return updated > 0
+
     @BaseService.log_performance
     def get_top_reviews(self, product_id: str, limit: int = 10) -> ServiceResult[List[ProductReview]]:
         """
@@ -0,0 +1,172 @@
+"""
+Search backends for SearchService.
+
+Each backend knows how to turn a free-text query into a filtered, optionally
+ranked Product queryset for one database vendor. SearchService picks the
+backend once at startup and keeps the filter/sort contract identical across
+vendors: ranked backends annotate ``rank`` so relevance sorting can use it.
+
+Backends:
+- PostgresSearchBackend: tsvector/tsquery ranking
+- MySQLFullTextBackend: FULLTEXT index with MATCH ... AGAINST in boolean mode
+- BasicSearchBackend: ICONTAINS fallback (SQLite, tests, unsupported queries)
+"""
+
+import logging
+import re
+from typing import List
+
+from django.db.models import FloatField, Func, Q
+
+
+logger = logging.getLogger(__name__)
+
+
+class MatchAgainst(Func):
+    """
+    MySQL ``MATCH (cols) AGAINST (query IN BOOLEAN MODE)`` expression.
+
+    Columns must exactly match a FULLTEXT index definition, otherwise MySQL
+    refuses the query (error 1191).
+    """
+
+    template = "MATCH (%(expressions)s) AGAINST (%(search)s IN BOOLEAN MODE)"
+    output_field = FloatField()
+
+    def __init__(self, *expressions, search: str, **extra):
+        super().__init__(*expressions, **extra)
+        self.search = search
+
+    def as_sql(self, compiler, connection, function=None, template=None, **extra_context):
+        sql, params = super().as_sql(compiler, connection, function, template, search="%s", **extra_context)
+        return sql, (*params, self.search)
+
+
+class BasicSearchBackend:
+    """ICONTAINS search across name, description, brand and tags. Not ranked."""
+
+    vendor = "basic"
+    supports_ranking = False
+
+    def apply(self, queryset, query: str):
+        """
+        Filter queryset by query.
+
+        Args:
+            queryset: Product queryset
+            query: Raw search query
+
+        Returns:
+            Filtered queryset
+        """
+        search_q = (
+            Q(name__icontains=query)
+            | Q(description__icontains=query)
+            | Q(brand__icontains=query)
+            | Q(tags__icontains=query)
+        )
+        return queryset.filter(search_q)
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    """PostgreSQL full-text search weighted on name (A) and description (B)."""
+
+    vendor = "postgresql"
+    supports_ranking = True
+
+    def apply(self, queryset, query: str):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        search_vector = SearchVector("name", weight="A") + SearchVector("description", weight="B")
+        search_query = SearchQuery(query)
+        return queryset.annotate(search=search_vector, rank=SearchRank(search_vector, search_query)).filter(
+            search=search_query
+        )
+
+
+class MySQLFullTextBackend(BasicSearchBackend):
+    """
+    MySQL/InnoDB FULLTEXT search.
+
+    Uses the ``marketplace_product_search_ft`` index (name, description, brand)
+    created by migration 0021. The user query is rewritten into boolean mode:
+
+    - plain words become required prefix terms: ``sofa bed`` -> ``+sofa* +bed*``
+    - words are split on punctuation like the index: ``mid-century`` ->
+      ``+mid* +century*``
+    - ``-word`` excludes a term
+    - ``"quoted phrases"`` must match exactly
+
+    Words shorter than innodb_ft_min_token_size are never indexed, so they are
+    dropped; if no required term survives, the ICONTAINS fallback is used for
+    that query so short searches like "tv" still return results.
+    """
+
+    vendor = "mysql"
+    supports_ranking = True
+
+    # Must stay in sync with the FULLTEXT index created in migration 0021
+    FULLTEXT_FIELDS = ("name", "description", "brand")
+    MIN_TOKEN_LENGTH = 3  # InnoDB default innodb_ft_min_token_size
+
+    _TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+    _NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+    def build_boolean_query(self, query: str) -> str:
+        """
+        Rewrite a user query into a safe MySQL boolean-mode expression.
+
+        Args:
+            query: Raw search query
+
+        Returns:
+            Boolean-mode query string, or "" if no required term remains
+        """
+        required: List[str] = []
+        excluded: List[str] = []
+
+        for phrase, word in self._TOKEN_RE.findall(query or ""):
+            if phrase:
+                cleaned = " ".join(self._NON_WORD_RE.sub(" ", phrase).split())
+                if len(cleaned) >= self.MIN_TOKEN_LENGTH:
+                    required.append(f'+"{cleaned}"')
+                continue
+
+            # InnoDB splits "mid-century" into "mid" and "century", so match the parts, not "midcentury"
+            parts = [part for part in self._NON_WORD_RE.split(word) if len(part) >= self.MIN_TOKEN_LENGTH]
+            if not parts:
+                continue
+            if word.startswith("-"):
+                excluded.append(f'-"{" ".join(parts)}"' if len(parts) > 1 else f"-{parts[0]}")
+            else:
+                required.extend(f"+{part}*" for part in parts)
+
+        # A boolean query made only of exclusions matches nothing
+        if not required:
+            return ""
+        return " ".join(required + excluded)
+
+    def apply(self, queryset, query: str):
+        boolean_query = self.build_boolean_query(query)
+        if not boolean_query:
+            logger.debug(f"No indexable terms in '{query}', using ICONTAINS fallback")
+            return super().apply(queryset, query)
+
+        return queryset.annotate(rank=MatchAgainst(*self.FULLTEXT_FIELDS, search=boolean_query)).filter(rank__gt=0)
+
+
+def get_search_backend(vendor: str) -> BasicSearchBackend:
+    """
+    Return the search backend for a database vendor.
+
+    Args:
+        vendor: django connection.vendor ("postgresql", "mysql", "sqlite", ...)
+
+    Returns:
+        Search backend instance
+    """
+    if vendor == "postgresql":
+        return PostgresSearchBackend()
+    if vendor == "mysql":
+        return MySQLFullTextBackend()
+    return BasicSearchBackend()
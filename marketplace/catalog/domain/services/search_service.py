@@ -7,17 +7,26 @@ autocomplete, and pagination. Optimized for performance with database indexes.
 Story 2.8: SearchService - Product Search & Filtering
 """
 
+import hashlib
+import json
 import logging
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.core.paginator import Paginator
-from django.db.models import Avg, F, Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, IntegerField, Value, When
 
 from marketplace.catalog.domain.models.catalog import Product
 from marketplace.catalog.domain.models.category import Category
+from marketplace.catalog.domain.services.attribute_index import ProductAttributeIndex
+from marketplace.catalog.domain.services.autocomplete_index import AutocompleteIndex
 from marketplace.catalog.domain.services.base import BaseService, ErrorCodes, ServiceResult, service_err, service_ok
+from marketplace.catalog.domain.services.pagination import InvalidCursor, paginate
+from marketplace.catalog.domain.services.related_products import RelatedProductsIndex
+from marketplace.catalog.domain.services.search_backends import get_search_backend
+from marketplace.catalog.domain.services.spelling_index import SpellingIndex
+from marketplace.catalog.domain.services.trending import TrendingRanker
 
 
 logger = logging.getLogger(__name__)
@@ -33,33 +42,59 @@ class SearchService(BaseService):
     - Sorting by relevance, price, rating, date
     - Autocomplete suggestions
     - Search suggestions (related queries)
+    - Facet counts (category, brand, condition, price, rating, tags, colors)
     - Performance-optimized queries
 
     Features:
     - PostgreSQL full-text search (when available)
-    - Fallback to ILIKE search for non-Postgres databases
-    - Cursor-based pagination for consistency
+    - MySQL FULLTEXT search with MATCH ... AGAINST ranking (when available)
+    - Fallback to ILIKE search for other databases
+    - Keyset (cursor) pagination with optional counts, page numbers for old clients
     - Search result ranking
+    - Typo tolerance ("did you mean" + fuzzy fallback) via a trigram index
+    - Time-decayed trending products from a precomputed ranking
+    - Related products from a precomputed top-K table
     """
 
+    # Price facet buckets as (key, min inclusive, max exclusive); None means unbounded
+    PRICE_BUCKETS = [
+        ("0-50", None, 50),
+        ("50-100", 50, 100),
+        ("100-250", 100, 250),
+        ("250-500", 250, 500),
+        ("500-1000", 500, 1000),
+        ("1000+", 1000, None),
+    ]
+    # Rating facets are cumulative ("4 stars & up")
+    RATING_THRESHOLDS = [4, 3, 2, 1]
+    BRAND_FACET_LIMIT = 20
+    ATTRIBUTE_FACET_LIMIT = 20
+
     def __init__(self):
         """Initialize SearchService."""
         super().__init__()
-        self.use_postgres_search = self._check_postgres_support()
-
-    def _check_postgres_support(self) -> bool:
+        self.facet_cache_timeout = getattr(settings, "SEARCH_FACET_CACHE_TIMEOUT", 60)
+        self.backend = get_search_backend(self._get_db_vendor())
+        self.autocomplete_index = AutocompleteIndex()
+        self.attribute_index = ProductAttributeIndex()
+        self.spelling_index = SpellingIndex()
+        self.trending = TrendingRanker()
+        self.related_index = RelatedProductsIndex()
+        self.fuzzy_min_results = getattr(settings, "SEARCH_FUZZY_MIN_RESULTS", 3)
+
+    def _get_db_vendor(self) -> str:
         """
-        Check if PostgreSQL full-text search is available.
+        Get the database vendor used to pick a search backend.
 
         Returns:
-            bool: True if Postgres search is available
+            str: Django connection vendor, or "unknown" if unavailable
         """
         try:
             from django.db import connection
 
-            return connection.vendor == "postgresql"
+            return connection.vendor
         except Exception:
-            return False
+            return "unknown"
 
     @BaseService.log_performance
     def search(
@@ -69,16 +104,28 @@ class SearchService(BaseService):
         sort: str = "relevance",
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
+        include_count: Optional[bool] = None,
     ) -> ServiceResult[Dict[str, Any]]:
         """
         Search products with filters and sorting.
 
+        Pagination is by page number, or by keyset when ``cursor`` is given
+        ("" for the first page); see marketplace.catalog.domain.services.pagination.
+
+        When fewer than SEARCH_FUZZY_MIN_RESULTS products match, the query is
+        spell-corrected against the trigram index. A correction that finds
+        more products is returned as ``did_you_mean``; if the exact query found
+        nothing, the corrected results are served instead and ``fuzzy`` is True.
+
         Args:
             query: Search query string
             filters: Optional filters (category, price_min, price_max, seller, min_rating, in_stock)
             sort: Sort order (relevance, price_asc, price_desc, rating, newest)
             page: Page number
             page_size: Items per page
+            cursor: Keyset cursor (None for page-number pagination)
+            include_count: Compute the total count in cursor mode
 
         Returns:
             ServiceResult with paginated search results
@@ -97,72 +144,83 @@ class SearchService(BaseService):
         try:
             filters = filters or {}
 
-            # Start with base queryset
-            queryset = Product.objects.select_related("seller", "category").prefetch_related("images")
-
-            # Apply search query
-            if query:
-                if self.use_postgres_search:
-                    # Use PostgreSQL full-text search
-                    search_vector = SearchVector("name", weight="A") + SearchVector("description", weight="B")
-                    search_query = SearchQuery(query)
-                    queryset = queryset.annotate(
-                        search=search_vector, rank=SearchRank(search_vector, search_query)
-                    ).filter(search=search_query)
-                else:
-                    # Fallback to ILIKE search
-                    search_q = (
-                        Q(name__icontains=query)
-                        | Q(description__icontains=query)
-                        | Q(brand__icontains=query)
-                        | Q(tags__icontains=query)
+            queryset = self._build_search_queryset(query, filters, sort)
+
+            result_data = paginate(queryset, page, page_size, cursor=cursor, include_count=include_count)
+
+            # Typo tolerance: when exact matching finds few results, suggest a
+            # corrected query; with no results at all, serve the corrected results.
+            did_you_mean = None
+            fuzzy = False
+            if query and self._result_size(result_data) < self.fuzzy_min_results:
+                correction = self.spelling_index.correct(query)
+                if correction:
+                    corrected = paginate(
+                        self._build_search_queryset(correction, filters, sort),
+                        page,
+                        page_size,
+                        cursor=cursor,
+                        include_count=include_count,
                     )
-                    queryset = queryset.filter(search_q)
-
-            # Apply filters
-            queryset = self._apply_filters(queryset, filters)
-
-            # Apply sorting
-            queryset = self._apply_sorting(queryset, sort, query)
-
-            # Only show active products by default
-            if "is_active" not in filters:
-                queryset = queryset.filter(is_active=True)
-
-            # Paginate
-            paginator = Paginator(queryset, page_size)
-            page_obj = paginator.get_page(page)
-
-            result_data = {
-                "results": list(page_obj.object_list),
-                "count": paginator.count,
-                "page": page,
-                "page_size": page_size,
-                "num_pages": paginator.num_pages,
-                "has_next": page_obj.has_next(),
-                "has_previous": page_obj.has_previous(),
-                "query": query,
-                "filters": filters,
-                "sort": sort,
-            }
+                    if self._result_size(corrected) > self._result_size(result_data):
+                        did_you_mean = correction
+                        if not result_data["results"]:
+                            fuzzy = True
+                            result_data = corrected
+
+            result_data.update(
+                {"query": query, "did_you_mean": did_you_mean, "fuzzy": fuzzy, "filters": filters, "sort": sort}
+            )
 
             self.logger.info(
                 f"Search: query='{query}', filters={filters}, sort={sort}, "
-                f"results={paginator.count}, page={page}/{paginator.num_pages}"
+                f"results={result_data['count']}, page={page}/{result_data['num_pages']}, did_you_mean={did_you_mean}"
             )
 
             return service_ok(result_data)
 
+        except InvalidCursor as e:
+            return service_err(ErrorCodes.INVALID_INPUT, str(e))
         except Exception as e:
             self.logger.error(f"Error searching products: query='{query}', error={e}", exc_info=True)
             return service_err(ErrorCodes.INTERNAL_ERROR, str(e))
 
+    @staticmethod
+    def _result_size(page_data: Dict[str, Any]) -> int:
+        """Total matches when counted, otherwise a lower bound from the page itself."""
+        if page_data["count"] is not None:
+            return page_data["count"]
+        return len(page_data["results"]) + (1 if page_data["has_next"] else 0)
+
+    def _build_search_queryset(self, query: str, filters: Dict[str, Any], sort: str):
+        """Build the filtered, sorted queryset for a search query."""
+        # Start with base queryset
+        queryset = Product.objects.select_related("seller", "category").prefetch_related("images")
+
+        # Apply search query (full-text on Postgres/MySQL, ILIKE elsewhere)
+        if query:
+            queryset = self.backend.apply(queryset, query)
+
+        # Apply filters
+        queryset = self._apply_filters(queryset, filters)
+
+        # Apply sorting
+        queryset = self._apply_sorting(queryset, sort, query)
+
+        # Only show active products by default
+        if "is_active" not in filters:
+            queryset = queryset.filter(is_active=True)
+
+        return queryset
+
     @BaseService.log_performance
     def autocomplete(self, query: str, limit: int = 10) -> ServiceResult[List[Dict[str, Any]]]:
         """
         Get autocomplete suggestions for search query.
 
-        Returns top matching product names for autocomplete dropdown.
+        Returns top matching products for the autocomplete dropdown from the
+        edge n-gram index (one indexed lookup, no per-row queries). Matching
+        is on word prefixes of the product name, brand and category.
 
         Args:
             query: Partial search query
@@ -176,31 +234,15 @@ class SearchService(BaseService):
             >>> if result.ok:
             ...     suggestions = result.value
             ...     # [
-            ...     #   {"id": "...", "name": "iPhone 15", "category": "Electronics"},
-            ...     #   {"id": "...", "name": "iPhone 14", "category": "Electronics"},
+            ...     #   {"id": "...", "name": "iPhone 15", "category": "Electronics", "price": 999.0, "image": "..."},
+            ...     #   {"id": "...", "name": "iPhone 14", "category": "Electronics", "price": 799.0, "image": None},
             ...     # ]
         """
         try:
             if not query or len(query) < 2:
                 return service_ok([])
 
-            # Search product names
-            queryset = (
-                Product.objects.filter(name__icontains=query, is_active=True)
-                .select_related("category")
-                .order_by("-view_count", "-favorite_count")[:limit]
-            )
-
-            suggestions = [
-                {
-                    "id": str(product.id),
-                    "name": product.name,
-                    "category": product.category.name if product.category else None,
-                    "price": float(product.price),
-                    "image": product.images.first().get_proxy_url() if product.images.exists() else None,
-                }
-                for product in queryset
-            ]
+            suggestions = self.autocomplete_index.lookup(query, limit)
 
             self.logger.info(f"Autocomplete: query='{query}', suggestions={len(suggestions)}")
 
@@ -265,7 +307,13 @@ class SearchService(BaseService):
 
     @BaseService.log_performance
     def filter_products(
-        self, filters: Dict[str, Any], page: int = 1, page_size: int = 20, sort: str = "newest"
+        self,
+        filters: Dict[str, Any],
+        page: int = 1,
+        page_size: int = 20,
+        sort: str = "newest",
+        cursor: Optional[str] = None,
+        include_count: Optional[bool] = None,
     ) -> ServiceResult[Dict[str, Any]]:
         """
         Filter products without search query.
@@ -277,6 +325,8 @@ class SearchService(BaseService):
             page: Page number
             page_size: Items per page
             sort: Sort order
+            cursor: Keyset cursor (None for page-number pagination)
+            include_count: Compute the total count in cursor mode
 
         Returns:
             ServiceResult with paginated filtered products
@@ -302,29 +352,197 @@ class SearchService(BaseService):
                 queryset = queryset.filter(is_active=True)
 
             # Paginate
-            paginator = Paginator(queryset, page_size)
-            page_obj = paginator.get_page(page)
-
-            result_data = {
-                "results": list(page_obj.object_list),
-                "count": paginator.count,
-                "page": page,
-                "page_size": page_size,
-                "num_pages": paginator.num_pages,
-                "has_next": page_obj.has_next(),
-                "has_previous": page_obj.has_previous(),
-                "filters": filters,
-                "sort": sort,
-            }
-
-            self.logger.info(f"Filter products: filters={filters}, sort={sort}, results={paginator.count}")
+            result_data = paginate(queryset, page, page_size, cursor=cursor, include_count=include_count)
+            result_data.update({"filters": filters, "sort": sort})
+
+            self.logger.info(f"Filter products: filters={filters}, sort={sort}, results={result_data['count']}")
 
             return service_ok(result_data)
 
+        except InvalidCursor as e:
+            return service_err(ErrorCodes.INVALID_INPUT, str(e))
         except Exception as e:
             self.logger.error(f"Error filtering products: filters={filters}, error={e}", exc_info=True)
             return service_err(ErrorCodes.INTERNAL_ERROR, str(e))
 
+    @BaseService.log_performance
+    def get_facets(
+        self, query: str = "", filters: Optional[Dict[str, Any]] = None, use_cache: bool = True
+    ) -> ServiceResult[Dict[str, Any]]:
+        """
+        Get facet counts for a search query and filter set.
+
+        Category, brand, condition, price and rating facets come from one
+        grouped query over the same queryset that search() uses; tag and
+        color facets are grouped joins on their lookup tables. The result is
+        cached briefly per normalized query + filter set, so a results page
+        needs a single round trip.
+
+        Args:
+            query: Search query string (optional)
+            filters: Filters, same keys as search()
+            use_cache: Whether to use the cached facets (default: True)
+
+        Returns:
+            ServiceResult with facet counts
+
+        Example:
+            >>> result = search_service.get_facets("sofa", {"in_stock": True})
+            >>> if result.ok:
+            ...     result.value["categories"]
+            ...     # [{"slug": "living-room", "name": "Living Room", "count": 42}, ...]
+        """
+        try:
+            filters = filters or {}
+            cache_key = self._facet_cache_key(query, filters)
+
+            if use_cache:
+                cached_facets = cache.get(cache_key)
+                if cached_facets is not None:
+                    self.logger.debug(f"Cache hit for facets: query='{query}', filters={filters}")
+                    return service_ok(cached_facets)
+
+            queryset = Product.objects.all()
+            if query:
+                queryset = self.backend.apply(queryset, query)
+            queryset = self._apply_filters(queryset, filters)
+            if "is_active" not in filters:
+                queryset = queryset.filter(is_active=True)
+
+            # One GROUP BY over every facet dimension; each row is a combination count
+            rows = (
+                queryset.annotate(
+                    price_bucket=self._price_bucket_expression(), rating_bucket=self._rating_bucket_expression()
+                )
+                .order_by()
+                .values("category__slug", "category__name", "brand", "condition", "price_bucket", "rating_bucket")
+                .annotate(count=Count("id"))
+            )
+
+            facets = self._collect_facets(rows)
+            for field in ProductAttributeIndex.ATTRIBUTES:
+                facets[field] = self.attribute_index.facet_counts(field, queryset, limit=self.ATTRIBUTE_FACET_LIMIT)
+            facets["query"] = query
+            facets["filters"] = filters
+
+            cache.set(cache_key, facets, self.facet_cache_timeout)
+
+            self.logger.info(f"Facets: query='{query}', filters={filters}, total={facets['total']}")
+
+            return service_ok(facets)
+
+        except Exception as e:
+            self.logger.error(f"Error getting facets: query='{query}', filters={filters}, error={e}", exc_info=True)
+            return service_err(ErrorCodes.INTERNAL_ERROR, str(e))
+
+    def _facet_cache_key(self, query: str, filters: Dict[str, Any]) -> str:
+        """
+        Build a cache key that is stable across parameter order and casing.
+
+        Args:
+            query: Search query
+            filters: Filter dict
+
+        Returns:
+            Cache key string
+        """
+        normalized_filters = {
+            key: sorted(str(v) for v in value) if isinstance(value, (list, tuple)) else str(value)
+            for key, value in filters.items()
+        }
+        payload = json.dumps(
+            {
+                "q": " ".join((query or "").lower().split()),
+                "filters": normalized_filters,
+                "vendor": self.backend.vendor,
+            },
+            sort_keys=True,
+        )
+        return f"search_facets_{hashlib.md5(payload.encode()).hexdigest()}"
+
+    def _price_bucket_expression(self) -> Case:
+        """Map Product.price to its PRICE_BUCKETS key."""
+        whens = []
+        for key, low, high in self.PRICE_BUCKETS:
+            conditions = {}
+            if low is not None:
+                conditions["price__gte"] = low
+            if high is not None:
+                conditions["price__lt"] = high
+            whens.append(When(then=Value(key), **conditions))
+        return Case(*whens, default=Value(""), output_field=CharField())
+
+    def _rating_bucket_expression(self) -> Case:
+        """Map Product.average_rating to the highest RATING_THRESHOLDS value it reaches (0 if none)."""
+        whens = [
+            When(average_rating__gte=threshold, then=Value(threshold))
+            for threshold in sorted(self.RATING_THRESHOLDS, reverse=True)
+        ]
+        return Case(*whens, default=Value(0), output_field=IntegerField())
+
+    def _collect_facets(self, rows) -> Dict[str, Any]:
+        """
+        Fold grouped combination rows into per-facet counts.
+
+        Args:
+            rows: Iterable of dicts from the grouped facet query
+
+        Returns:
+            Facet dict (total, categories, brands, conditions, price_ranges, ratings)
+        """
+        total = 0
+        categories: Dict[str, Dict[str, Any]] = {}
+        brands: Dict[str, int] = {}
+        conditions: Dict[str, int] = {}
+        price_counts: Dict[str, int] = {}
+        rating_counts: Dict[int, int] = {}
+
+        for row in rows:
+            count = row["count"]
+            total += count
+
+            slug = row["category__slug"]
+            if slug:
+                entry = categories.setdefault(slug, {"slug": slug, "name": row["category__name"], "count": 0})
+                entry["count"] += count
+
+            if row["brand"]:
+                brands[row["brand"]] = brands.get(row["brand"], 0) + count
+
+            conditions[row["condition"]] = conditions.get(row["condition"], 0) + count
+
+            if row["price_bucket"]:
+                price_counts[row["price_bucket"]] = price_counts.get(row["price_bucket"], 0) + count
+
+            rating_counts[row["rating_bucket"]] = rating_counts.get(row["rating_bucket"], 0) + count
+
+        condition_labels = dict(Product.CONDITION_CHOICES)
+        cumulative = 0
+        ratings = []
+        for threshold in sorted(self.RATING_THRESHOLDS, reverse=True):
+            cumulative += rating_counts.get(threshold, 0)
+            ratings.append({"min_rating": threshold, "count": cumulative})
+
+        return {
+            "total": total,
+            "categories": sorted(categories.values(), key=lambda c: (-c["count"], c["name"])),
+            "brands": [
+                {"value": brand, "count": count}
+                for brand, count in sorted(brands.items(), key=lambda b: (-b[1], b[0]))[: self.BRAND_FACET_LIMIT]
+            ],
+            "conditions": [
+                {"value": value, "label": label, "count": conditions[value]}
+                for value, label in condition_labels.items()
+                if conditions.get(value)
+            ],
+            "price_ranges": [
+                {"key": key, "min": low, "max": high, "count": price_counts[key]}
+                for key, low, high in self.PRICE_BUCKETS
+                if price_counts.get(key)
+            ],
+            "ratings": ratings,
+        }
+
     def _apply_filters(self, queryset, filters: Dict[str, Any]):
         """
         Apply filters to queryset.
@@ -357,8 +575,8 @@ class SearchService(BaseService):
         # Rating filter (minimum rating)
         if "min_rating" in filters:
             min_rating = Decimal(str(filters["min_rating"]))
-            # Annotate with average rating and filter
-            queryset = queryset.annotate(avg_rating=Avg("reviews__rating")).filter(avg_rating__gte=min_rating)
+            # Denormalized column kept exact by review writes; indexed with is_active
+            queryset = queryset.filter(average_rating__gte=min_rating)
 
         # Stock availability filter
         if "in_stock" in filters and filters["in_stock"]:
@@ -375,6 +593,11 @@ class SearchService(BaseService):
         if "brand" in filters:
             queryset = queryset.filter(brand__icontains=filters["brand"])
 
+        # Tag and color filters (any match) via the normalized lookup tables
+        for field in ProductAttributeIndex.ATTRIBUTES:
+            if filters.get(field):
+                queryset = queryset.filter(self.attribute_index.filter_q(field, filters[field]))
+
         # Featured filter
         if "is_featured" in filters:
             queryset = queryset.filter(is_featured=filters["is_featured"])
@@ -397,8 +620,8 @@ class SearchService(BaseService):
         Returns:
             Sorted queryset
         """
-        if sort == "relevance" and query and self.use_postgres_search:
-            # Sort by search rank (already annotated in search method)
+        if sort == "relevance" and query and "rank" in queryset.query.annotations:
+            # Sort by search rank (annotated by ranking search backends)
             return queryset.order_by("-rank", "-view_count")
         elif sort == "relevance":
             # Fallback relevance: view count
@@ -408,10 +631,8 @@ class SearchService(BaseService):
         elif sort in ["price_desc", "price_high"]:
             return queryset.order_by("-price", "-created_at")
         elif sort == "rating":
-            # Sort by average rating
-            return queryset.annotate(avg_rating=Avg("reviews__rating")).order_by(
-                F("avg_rating").desc(nulls_last=True), "-view_count"
-            )
+            # Sort by the denormalized average rating (unreviewed products are 0.00)
+            return queryset.order_by("-average_rating", "-review_count", "-view_count")
         elif sort == "newest":
             return queryset.order_by("-created_at")
         elif sort == "popular":
@@ -421,13 +642,17 @@ class SearchService(BaseService):
             return queryset.order_by("-created_at")
 
     @BaseService.log_performance
-    def get_trending_products(self, limit: int = 10, timeframe_days: int = 7) -> ServiceResult[List[Product]]:
+    def get_trending_products(self, limit: int = 10, category: Optional[str] = None) -> ServiceResult[List[Product]]:
         """
-        Get trending products based on recent views and favorites.
+        Get trending products from the precomputed, time-decayed ranking.
+
+        The ranking is refreshed periodically by TrendingRanker from recent
+        views, clicks, favorites and cart additions. Until it has been
+        computed, products are ordered by lifetime view and favorite counts.
 
         Args:
             limit: Number of products to return
-            timeframe_days: Timeframe for trending calculation (default: 7 days)
+            category: Category slug to rank within (default: site-wide)
 
         Returns:
             ServiceResult with list of trending products
@@ -438,16 +663,18 @@ class SearchService(BaseService):
             ...     trending = result.value
         """
         try:
-            # For now, simple trending based on view_count and favorite_count
-            # TODO: Enhance with time-weighted scoring using view/favorite timestamps
-            queryset = (
-                Product.objects.filter(is_active=True)
-                .select_related("seller", "category")
-                .prefetch_related("images")
-                .order_by("-view_count", "-favorite_count")[:limit]
-            )
-
-            products = list(queryset)
+            products = self.trending.top(limit, category_slug=category)
+
+            if not products and not self.trending.has_ranking():
+                queryset = Product.objects.filter(is_active=True)
+                if category:
+                    queryset = queryset.filter(category__slug=category)
+                queryset = (
+                    queryset.select_related("seller", "category")
+                    .prefetch_related("images")
+                    .order_by("-view_count", "-favorite_count")[:limit]
+                )
+                products = list(queryset)
 
             self.logger.info(f"Retrieved {len(products)} trending products")
 
@@ -462,7 +689,9 @@ class SearchService(BaseService):
         """
         Get products related to a given product.
 
-        Related by: same category, similar price range, same brand.
+        Served from the precomputed RelatedProduct table (attribute similarity
+        plus co-views/co-cart signals). Products without a computed list yet
+        fall back to a live query: same category, similar price range, same brand.
 
         Args:
             product_id: Product UUID
@@ -477,6 +706,11 @@ class SearchService(BaseService):
             ...     related = result.value
         """
         try:
+            products = self.related_index.related(product_id, limit)
+            if products:
+                self.logger.info(f"Retrieved {len(products)} precomputed related products for product {product_id}")
+                return service_ok(products)
+
             # Get the reference product
             try:
                 product = Product.objects.get(id=product_id, is_active=True)
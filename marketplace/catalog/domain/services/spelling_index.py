@@ -0,0 +1,204 @@
+"""
+SpellingIndex - trigram index for typo-tolerant search
+
+Words from product names and brands are stored in SearchTerm, with their
+trigrams in SearchTermTrigram. To correct a misspelled query word, candidate
+terms sharing trigrams with it (and of similar length) are pulled with one
+grouped query, then ranked in Python by edit distance, trigram similarity and
+frequency. Only the best candidates per word are ever compared, so the cost
+does not grow with the size of the catalog.
+
+New words are added from the Product post_save signal (see
+marketplace.catalog.signals). Frequencies and words no longer used by any
+product are refreshed by ``python manage.py rebuild_spelling_index``.
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from django.db import transaction
+from django.db.models import Count
+
+from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.models.search_index import SearchTerm, SearchTermTrigram
+from marketplace.catalog.domain.services.autocomplete_index import normalize_tokens
+
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def trigrams(term: str) -> Set[str]:
+    """
+    Return the padded trigrams of a word (pg_trgm style).
+
+    "bed" -> {"  b", " be", "bed", "ed "}
+    """
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the trigram sets of two words."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions)."""
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        previous_previous, previous = previous, current
+    return previous[len(b)]
+
+
+class SpellingIndex:
+    """Maintains the search vocabulary and suggests corrections for queries."""
+
+    MIN_TERM_LENGTH = 3
+    # Candidates compared in Python per misspelled word
+    CANDIDATE_LIMIT = 50
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def extract_terms(cls, text: str) -> Set[str]:
+        """Return the indexable words of a text (no short words or pure numbers)."""
+        return {
+            token
+            for token in normalize_tokens(text)
+            if cls.MIN_TERM_LENGTH <= len(token) <= SearchTerm.MAX_TERM_LENGTH and not token.isdigit()
+        }
+
+    def add_product(self, product: Product) -> None:
+        """Add any new words from a product's name and brand to the vocabulary."""
+        terms = self.extract_terms(f"{product.name} {product.brand}")
+        if not terms:
+            return
+        with transaction.atomic():
+            existing = set(SearchTerm.objects.filter(term__in=terms).values_list("term", flat=True))
+            self._create_terms({term: 1 for term in terms - existing})
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """
+        Rebuild the vocabulary from active products.
+
+        Args:
+            batch_size: Products loaded per batch
+
+        Returns:
+            Number of terms indexed
+        """
+        frequencies: Counter = Counter()
+        products = Product.objects.filter(is_active=True).values_list("name", "brand")
+        for name, brand in products.iterator(chunk_size=batch_size):
+            frequencies.update(self.extract_terms(f"{name} {brand}"))
+
+        with transaction.atomic():
+            SearchTerm.objects.all().delete()
+            self._create_terms(frequencies, batch_size=batch_size)
+        return len(frequencies)
+
+    def _create_terms(self, frequencies: Dict[str, int], batch_size: int = 1000) -> None:
+        if not frequencies:
+            return
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term, length=len(term), frequency=count) for term, count in frequencies.items()],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        # bulk_create with ignore_conflicts doesn't return primary keys on every backend
+        term_ids = SearchTerm.objects.filter(term__in=list(frequencies)).values_list("term", "id")
+        SearchTermTrigram.objects.bulk_create(
+            [
+                SearchTermTrigram(trigram=gram, term_id=term_id)
+                for term, term_id in term_ids
+                for gram in trigrams(term)
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def correct(self, query: str) -> Optional[str]:
+        """
+        Suggest a corrected query.
+
+        Known words are kept; unknown words are replaced by the closest
+        vocabulary term within max_edits() edits. Only the words themselves
+        are rewritten, so search operators (``-excluded``, ``"phrases"``)
+        and the rest of the query are kept as typed.
+
+        Args:
+            query: Raw search query
+
+        Returns:
+            Query with the corrected words, or None if nothing was corrected
+        """
+        tokens = normalize_tokens(query)
+        candidates = [token for token in tokens if len(token) >= self.MIN_TERM_LENGTH and not token.isdigit()]
+        if not candidates:
+            return None
+
+        known = set(SearchTerm.objects.filter(term__in=candidates).values_list("term", flat=True))
+        corrections = {}
+        for token in set(candidates) - known:
+            replacement = self._closest_term(token)
+            if replacement:
+                corrections[token] = replacement
+
+        if not corrections:
+            return None
+
+        def replace(match):
+            normalized = normalize_tokens(match.group())
+            if len(normalized) == 1 and normalized[0] in corrections:
+                return corrections[normalized[0]]
+            return match.group()
+
+        return _WORD_RE.sub(replace, query)
+
+    @staticmethod
+    def max_edits(term: str) -> int:
+        """Allowed typos for a word: one for short words, two otherwise."""
+        return 1 if len(term) <= 4 else 2
+
+    def _closest_term(self, token: str) -> Optional[str]:
+        max_edits = self.max_edits(token)
+        rows = (
+            SearchTermTrigram.objects.filter(
+                trigram__in=trigrams(token),
+                term__length__gte=len(token) - max_edits,
+                term__length__lte=len(token) + max_edits,
+            )
+            .values("term__term", "term__frequency")
+            .annotate(shared=Count("id"))
+            .order_by("-shared", "-term__frequency")[: self.CANDIDATE_LIMIT]
+        )
+
+        best = None
+        best_key = None
+        for row in rows:
+            term = row["term__term"]
+            distance = edit_distance(token, term)
+            if distance > max_edits:
+                continue
+            key = (distance, -trigram_similarity(token, term), -row["term__frequency"])
+            if best_key is None or key < best_key:
+                best, best_key = term, key
+        return best
@@ -0,0 +1,162 @@
+"""
+TrendingRanker - time-decayed trending products
+
+Every interaction recorded in UserClick contributes its action weight, halved
+every TRENDING_HALF_LIFE_HOURS, so a burst of activity this morning outranks
+a product that was popular last month:
+
+    score = sum(weight(action) * 0.5 ** (age_hours / half_life))
+
+Events are read once per run from a bounded window (TRENDING_WINDOW_DAYS),
+grouped per product, action and hour in the database, and decayed in Python.
+The top TRENDING_TOP_N products site-wide and per category are written to
+TrendingProduct, which is all the trending endpoint reads.
+
+The ranking is refreshed by the ``refresh_trending_products_task`` Celery
+beat job (see marketplace.tasks).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from marketplace.catalog.domain.models.catalog import Product
+from marketplace.catalog.domain.models.ranking import TrendingProduct
+
+
+logger = logging.getLogger(__name__)
+
+
+class TrendingRanker:
+    """
+    Computes and serves the precomputed trending ranking.
+
+    Listing, search and category impressions are deliberately not weighted:
+    they measure where a product was shown, not interest in it.
+    """
+
+    ACTION_WEIGHTS = {
+        "view": 1.0,
+        "detail_view": 1.0,
+        "click": 2.0,
+        "favorite": 4.0,
+        "cart_add": 6.0,
+    }
+
+    def __init__(self):
+        self.half_life_hours = getattr(settings, "TRENDING_HALF_LIFE_HOURS", 24)
+        self.window_days = getattr(settings, "TRENDING_WINDOW_DAYS", 7)
+        self.top_n = getattr(settings, "TRENDING_TOP_N", 50)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def compute_scores(self, now: Optional[datetime] = None) -> Dict[Tuple[str, Optional[int]], float]:
+        """
+        Return decayed scores of active products with activity in the window.
+
+        Returns:
+            Dict mapping (product_id, category_id) to score
+        """
+        from activity.models import UserClick
+
+        now = now or timezone.now()
+        rows = (
+            UserClick.objects.filter(
+                created_at__gte=now - timedelta(days=self.window_days),
+                created_at__lte=now,
+                action__in=list(self.ACTION_WEIGHTS),
+                product__is_active=True,
+            )
+            .annotate(hour=TruncHour("created_at"))
+            .values("product_id", "product__category_id", "action", "hour")
+            .annotate(events=Count("id"))
+            .order_by()
+        )
+
+        scores: Dict[Tuple[str, Optional[int]], float] = defaultdict(float)
+        for row in rows:
+            # Treat each hourly bucket as if its events happened mid-hour
+            age_hours = max((now - row["hour"]).total_seconds() / 3600 - 0.5, 0)
+            decay = 0.5 ** (age_hours / self.half_life_hours)
+            key = (row["product_id"], row["product__category_id"])
+            scores[key] += self.ACTION_WEIGHTS[row["action"]] * row["events"] * decay
+        return scores
+
+    def rebuild(self, now: Optional[datetime] = None) -> int:
+        """
+        Recompute the ranking and replace the TrendingProduct table.
+
+        Returns:
+            Number of ranking rows written
+        """
+        now = now or timezone.now()
+        scores = self.compute_scores(now)
+
+        # Highest score first; ties broken by product id so runs are stable
+        ordered = sorted(scores.items(), key=lambda item: (-item[1], str(item[0][0])))
+
+        rows = []
+        per_category: Dict[int, int] = defaultdict(int)
+        for rank, ((product_id, _), score) in enumerate(ordered[: self.top_n], start=1):
+            rows.append(TrendingProduct(product_id=product_id, rank=rank, score=score, computed_at=now))
+        for (product_id, category_id), score in ordered:
+            if category_id is None or per_category[category_id] >= self.top_n:
+                continue
+            per_category[category_id] += 1
+            rows.append(
+                TrendingProduct(
+                    product_id=product_id,
+                    category_id=category_id,
+                    rank=per_category[category_id],
+                    score=score,
+                    computed_at=now,
+                )
+            )
+
+        with transaction.atomic():
+            TrendingProduct.objects.all().delete()
+            TrendingProduct.objects.bulk_create(rows, batch_size=500)
+
+        logger.info(f"Trending ranking rebuilt: {len(scores)} products scored, {len(rows)} rows written")
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def top(self, limit: int = 10, category_slug: Optional[str] = None) -> List[Product]:
+        """
+        Return the top trending products, site-wide or within a category.
+
+        Args:
+            limit: Number of products (capped at TRENDING_TOP_N)
+            category_slug: Category to rank within (None for site-wide)
+
+        Returns:
+            Products in rank order; empty if the ranking hasn't been computed
+        """
+        ranks = TrendingProduct.objects.filter(product__is_active=True)
+        if category_slug:
+            ranks = ranks.filter(category__slug=category_slug)
+        else:
+            ranks = ranks.filter(category__isnull=True)
+
+        ranks = (
+            ranks.select_related("product__seller", "product__category")
+            .prefetch_related("product__images")
+            .order_by("rank")[: min(limit, self.top_n)]
+        )
+        return [entry.product for entry in ranks]
+
+    def has_ranking(self) -> bool:
+        """Whether a ranking has been computed (it may still be empty for a category)."""
+        return TrendingProduct.objects.exists()
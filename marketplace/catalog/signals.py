@@ -0,0 +1,117 @@
+"""
+Catalog signal handlers.
+
+Keeps the autocomplete index, the spelling vocabulary and the tag/color
+lookup tables in sync with Product, ProductImage and Category writes.
+Index updates run inside the triggering transaction (in their own
+savepoint), so a rolled-back save also rolls back its index rows and a
+failed index update never breaks the save. Deleted products drop out
+through the index rows' CASCADE foreign keys.
+
+Review writes refresh the denormalized Product.average_rating/review_count
+columns in the same transaction; unlike the search indexes, a failure there
+fails the write, since rating filters and sorting depend on those columns.
+A review moved to another product refreshes both products.
+"""
+
+import logging
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from marketplace.catalog.domain.models import Category, Product, ProductImage, ProductReview
+from marketplace.catalog.domain.services.attribute_index import ProductAttributeIndex
+from marketplace.catalog.domain.services.autocomplete_index import AutocompleteIndex
+from marketplace.catalog.domain.services.review_metrics_service import ReviewMetricsService
+from marketplace.catalog.domain.services.spelling_index import SpellingIndex
+
+
+logger = logging.getLogger(__name__)
+
+attribute_index = ProductAttributeIndex()
+autocomplete_index = AutocompleteIndex()
+spelling_index = SpellingIndex()
+review_metrics_service = ReviewMetricsService()
+
+# ProductReview fields that change a product's rating columns
+REVIEW_RATING_FIELDS = frozenset({"rating", "is_active", "product", "product_id"})
+
+
+def _safely(func, *args):
+    """Run an index update, logging instead of breaking the write that triggered it."""
+    try:
+        func(*args)
+    except Exception as e:
+        logger.error(f"Search index update failed ({func.__name__}{args}): {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    # Counter updates (view_count, click_count, ...) don't change suggestions
+    if update_fields is not None and not (set(update_fields) & AutocompleteIndex.INDEXED_FIELDS):
+        return
+    _safely(autocomplete_index.index_product, instance)
+    if instance.is_active:
+        _safely(spelling_index.add_product, instance)
+
+
+@receiver(post_save, sender=Product)
+def sync_product_attributes(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not (set(update_fields) & ProductAttributeIndex.INDEXED_FIELDS):
+        return
+    # A new product without tags or colors has nothing to index
+    if created and not instance.tags and not instance.colors:
+        return
+    _safely(attribute_index.sync_product, instance)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def refresh_image_on_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _safely(autocomplete_index.refresh_image, instance.product_id)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+
+    def reindex():
+        products = Product.objects.filter(category=instance, is_active=True).prefetch_related("images")
+        for product in products:
+            product.category = instance
+            autocomplete_index.index_product(product)
+
+    _safely(reindex)
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_product(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_product_id = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not (set(update_fields) & {"product", "product_id"}):
+        return
+    instance._previous_product_id = (
+        ProductReview.objects.filter(pk=instance.pk).values_list("product_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def refresh_product_rating(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # e.g. helpful_count updates don't affect the rating
+    if update_fields is not None and not (set(update_fields) & REVIEW_RATING_FIELDS):
+        return
+    review_metrics_service.refresh_product_rating(instance.product_id)
+    previous = getattr(instance, "_previous_product_id", None)
+    if previous is not None and previous != instance.product_id:
+        review_metrics_service.refresh_product_rating(previous)
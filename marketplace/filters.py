@@ -1,6 +1,9 @@
 import django_filters
 from django.db.models import F, Q
 
+from marketplace.catalog.domain.services.attribute_index import ProductAttributeIndex
+from marketplace.catalog.domain.services.spelling_index import SpellingIndex
+
 from .models import Category, Product
 
 
@@ -53,6 +56,7 @@ class ProductFilter(django_filters.FilterSet):
             ("price", "price"),
             ("view_count", "popularity"),
             ("favorite_count", "favorites"),
+            ("average_rating", "rating"),
             ("name", "name"),
         ),
         field_labels={
@@ -60,6 +64,7 @@ class ProductFilter(django_filters.FilterSet):
             "price": "Price",
             "popularity": "Popularity",
             "favorites": "Favorites",
+            "rating": "Rating",
             "name": "Name",
         },
     )
@@ -104,45 +109,40 @@ class ProductFilter(django_filters.FilterSet):
         return queryset
 
     def filter_min_rating(self, queryset, name, value):
-        """Filter products with minimum average rating"""
+        """Filter products with minimum average rating (denormalized, indexed column)"""
         if value:
-            # This would require a more complex annotation in the view
-            # For now, we'll use a simple approach
-            product_ids = []
-            for product in queryset:
-                if product.average_rating >= value:
-                    product_ids.append(product.id)
-            return queryset.filter(id__in=product_ids)
+            return queryset.filter(average_rating__gte=value)
         return queryset
 
     def filter_search(self, queryset, name, value):
-        """Search across multiple fields"""
+        """Search across multiple fields, retrying with a spelling correction when nothing matches"""
         if value:
-            return queryset.filter(
-                Q(name__icontains=value)
-                | Q(description__icontains=value)
-                | Q(brand__icontains=value)
-                | Q(model__icontains=value)
-                | Q(tags__icontains=value)
-            )
+            results = queryset.filter(self._search_q(value))
+            if not results.exists():
+                correction = SpellingIndex().correct(value)
+                if correction:
+                    return queryset.filter(self._search_q(correction))
+            return results
         return queryset
 
+    @staticmethod
+    def _search_q(value):
+        return (
+            Q(name__icontains=value)
+            | Q(description__icontains=value)
+            | Q(brand__icontains=value)
+            | Q(model__icontains=value)
+            | Q(tags__icontains=value)
+        )
+
     def filter_tags(self, queryset, name, value):
-        """Filter by tags (comma-separated)"""
+        """Filter by tags (comma-separated, any match)"""
         if value:
-            tag_list = [tag.strip() for tag in value.split(",")]
-            query = Q()
-            for tag in tag_list:
-                query |= Q(tags__icontains=tag)
-            return queryset.filter(query)
+            return queryset.filter(ProductAttributeIndex().filter_q("tags", value))
         return queryset
 
     def filter_colors(self, queryset, name, value):
-        """Filter by colors (comma-separated)"""
+        """Filter by colors (comma-separated, any match)"""
         if value:
-            color_list = [color.strip() for color in value.split(",")]
-            query = Q()
-            for color in color_list:
-                query |= Q(colors__icontains=color)
-            return queryset.filter(query)
+            return queryset.filter(ProductAttributeIndex().filter_q("colors", value))
         return queryset
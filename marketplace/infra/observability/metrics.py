@@ -20,3 +20,8 @@ cart_validation_duration = Histogram("marketplace_cart_validation_seconds", "Car
 internal_api_calls_total = Counter(
     "marketplace_internal_api_calls_total", "Total internal API calls", ["endpoint", "status"]
 )
+
+# Activity Tracking Metrics
+activity_dedup_lookups_total = Counter(
+    "marketplace_activity_dedup_lookups_total", "Activity dedup decisions (hit = duplicate dropped)", ["result"]
+)
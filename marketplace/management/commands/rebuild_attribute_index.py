@@ -0,0 +1,42 @@
+"""
+Django management command to rebuild the product tag and color lookup tables.
+
+The tables are kept up to date from model signals; run this after bulk imports
+that bypass signals (bulk_create, raw SQL, loaddata) or to backfill them.
+
+Usage:
+    python manage.py rebuild_attribute_index
+    python manage.py rebuild_attribute_index --batch-size 200
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace.catalog.domain.services.attribute_index import ProductAttributeIndex
+from marketplace.models import ProductColor, ProductTag
+
+
+class Command(BaseCommand):
+    help = "Rebuild the normalized product tag and color lookup tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products loaded per batch (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        self.stdout.write(self.style.SUCCESS("=== REBUILDING TAG AND COLOR INDEX ==="))
+
+        try:
+            indexed = ProductAttributeIndex().rebuild(batch_size=batch_size)
+        except Exception as e:
+            raise CommandError(f"Error rebuilding tag and color index: {str(e)}") from e
+
+        self.stdout.write(f"Indexed products: {indexed}")
+        self.stdout.write(f"Tags: {ProductTag.objects.count()}")
+        self.stdout.write(f"Colors: {ProductColor.objects.count()}")
+        self.stdout.write(self.style.SUCCESS("  Tag and color index rebuilt successfully!"))
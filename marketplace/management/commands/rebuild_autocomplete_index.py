@@ -0,0 +1,42 @@
+"""
+Django management command to rebuild the product autocomplete index.
+
+The index is kept up to date from model signals; run this after bulk imports
+that bypass signals (bulk_create, raw SQL, loaddata) or to refresh popularity.
+
+Usage:
+    python manage.py rebuild_autocomplete_index
+    python manage.py rebuild_autocomplete_index --batch-size 200
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace.catalog.domain.services.autocomplete_index import AutocompleteIndex
+from marketplace.models import ProductAutocompleteEntry, ProductAutocompletePrefix
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product autocomplete (edge n-gram) index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products loaded per batch (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        self.stdout.write(self.style.SUCCESS("=== REBUILDING AUTOCOMPLETE INDEX ==="))
+
+        try:
+            indexed = AutocompleteIndex().rebuild(batch_size=batch_size)
+        except Exception as e:
+            raise CommandError(f"Error rebuilding autocomplete index: {str(e)}") from e
+
+        self.stdout.write(f"Indexed products: {indexed}")
+        self.stdout.write(f"Entries: {ProductAutocompleteEntry.objects.count()}")
+        self.stdout.write(f"Prefixes: {ProductAutocompletePrefix.objects.count()}")
+        self.stdout.write(self.style.SUCCESS("  Autocomplete index rebuilt successfully!"))
@@ -0,0 +1,42 @@
+"""
+Django management command to rebuild the search spelling (trigram) index.
+
+New words are added from model signals; run this periodically to refresh
+word frequencies and drop words no active product uses any more, and after
+bulk imports that bypass signals.
+
+Usage:
+    python manage.py rebuild_spelling_index
+    python manage.py rebuild_spelling_index --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace.catalog.domain.services.spelling_index import SpellingIndex
+from marketplace.models import SearchTermTrigram
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search spelling (trigram) index used for did-you-mean suggestions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows processed per batch (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        self.stdout.write(self.style.SUCCESS("=== REBUILDING SPELLING INDEX ==="))
+
+        try:
+            terms = SpellingIndex().rebuild(batch_size=batch_size)
+        except Exception as e:
+            raise CommandError(f"Error rebuilding spelling index: {str(e)}") from e
+
+        self.stdout.write(f"Terms: {terms}")
+        self.stdout.write(f"Trigrams: {SearchTermTrigram.objects.count()}")
+        self.stdout.write(self.style.SUCCESS("  Spelling index rebuilt successfully!"))
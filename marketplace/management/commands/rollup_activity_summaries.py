@@ -0,0 +1,70 @@
+"""
+Django management command to (re)build daily activity summaries.
+
+The hourly ``rollup_activity_summaries_task`` keeps today's summaries current;
+run this to backfill history or rebuild days after a data fix.
+
+Usage:
+    python manage.py rollup_activity_summaries
+    python manage.py rollup_activity_summaries --days 30
+    python manage.py rollup_activity_summaries --date 2025-01-31
+    python manage.py rollup_activity_summaries --period monthly --date 2025-01-31
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from activity.services.rollup import ActivitySummaryRollup
+
+
+class Command(BaseCommand):
+    help = "Roll UserClick activity up into daily (or weekly/monthly) ActivitySummary rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=1,
+            help="Number of days to roll up, ending today (default: 1)",
+        )
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            help="Roll up a single day (YYYY-MM-DD) instead of the last --days days",
+        )
+        parser.add_argument(
+            "--period",
+            choices=["daily", *ActivitySummaryRollup.PERIODS],
+            default="daily",
+            help="Summary period; weekly/monthly roll up every period touching the selected days (default: daily)",
+        )
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            first_day = last_day = options["date"]
+        else:
+            if options["days"] < 1:
+                raise CommandError("--days must be at least 1")
+            last_day = timezone.localdate()
+            first_day = last_day - timedelta(days=options["days"] - 1)
+
+        self.stdout.write(self.style.SUCCESS("=== ROLLING UP ACTIVITY SUMMARIES ==="))
+
+        rollup = ActivitySummaryRollup()
+        try:
+            if options["period"] == "daily":
+                summaries = rollup.rollup_range(first_day, last_day)
+            else:
+                summaries = 0
+                day = first_day
+                while day <= last_day:
+                    summaries += rollup.rollup_period(options["period"], day)
+                    day = rollup.period_days(options["period"], day)[1] + timedelta(days=1)
+        except Exception as e:
+            raise CommandError(f"Error rolling up activity summaries: {str(e)}") from e
+
+        self.stdout.write(f"Days: {first_day} to {last_day}")
+        self.stdout.write(f"Summaries written: {summaries}")
+        self.stdout.write(self.style.SUCCESS("  Activity summaries rolled up successfully!"))
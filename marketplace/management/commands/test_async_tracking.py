@@ -55,8 +55,20 @@ class Command(BaseCommand):
         try:
             status = AsyncTracker.get_queue_status()
 
-            self.stdout.write(f"Queue Size: {status.get('queue_size', 'Unknown')}")
-            self.stdout.write(f"Thread Pool Active: {status.get('thread_pool_active', False)}")
+            self.stdout.write(f"Backend: {status.get('backend', 'Unknown')}")
+            self.stdout.write(
+                f"Queue Size: {status.get('queue_size', 'Unknown')} / {status.get('capacity', 'Unknown')}"
+            )
+            self.stdout.write(f"Backpressure: {status.get('backpressure', False)}")
+            self.stdout.write(
+                f"Accepted: {status.get('accepted', 0)}  Written: {status.get('written', 0)}  "
+                f"Batches: {status.get('batches', 0)}  Failed Batches: {status.get('failed_batches', 0)}"
+            )
+            self.stdout.write(
+                f"Dropped: {status.get('dropped_backpressure', 0)} (backpressure), "
+                f"{status.get('dropped_errors', 0)} (errors)"
+            )
+            self.stdout.write(f"Last Drain: {status.get('last_drain_at') or 'never'}")
             self.stdout.write(f"Processor Thread Alive: {status.get('processor_thread_alive', False)}")
             self.stdout.write(f"Processor Thread Name: {status.get('processor_thread_name', 'Unknown')}")
 
@@ -0,0 +1,43 @@
+# Generated manually for MySQL full-text product search
+
+from django.db import migrations
+
+
+FULLTEXT_INDEX_NAME = "marketplace_product_search_ft"
+
+
+def create_fulltext_index(apps, schema_editor):
+    """
+    Create the FULLTEXT index used by MySQLFullTextBackend.
+
+    Only MySQL supports FULLTEXT indexes; other vendors keep using their own
+    search path (Postgres tsvector, ICONTAINS on SQLite), so this is a no-op there.
+    """
+    if schema_editor.connection.vendor != "mysql":
+        return
+
+    Product = apps.get_model("marketplace", "Product")
+    table = schema_editor.quote_name(Product._meta.db_table)
+    schema_editor.execute(
+        f"CREATE FULLTEXT INDEX {schema_editor.quote_name(FULLTEXT_INDEX_NAME)} ON {table} (name, description, brand)"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+
+    Product = apps.get_model("marketplace", "Product")
+    table = schema_editor.quote_name(Product._meta.db_table)
+    schema_editor.execute(f"DROP INDEX {schema_editor.quote_name(FULLTEXT_INDEX_NAME)} ON {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("marketplace", "0020_gdpr_productreview_anonymization"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-16 19:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("marketplace", "0021_product_fulltext_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductAutocompleteEntry",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="autocomplete_entry",
+                        serialize=False,
+                        to="marketplace.product",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("brand", models.CharField(blank=True, max_length=100)),
+                ("category_name", models.CharField(blank=True, max_length=100)),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("image_key", models.CharField(blank=True, max_length=500)),
+                ("popularity", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProductAutocompletePrefix",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("prefix", models.CharField(max_length=20)),
+                ("popularity", models.PositiveIntegerField(default=0)),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prefixes",
+                        to="marketplace.productautocompleteentry",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["prefix", "-popularity"],
+                        name="mkt_autocomplete_prefix_idx",
+                    )
+                ],
+                "unique_together": {("prefix", "entry")},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-16 20:16
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+
+def backfill_product_ratings(apps, schema_editor):
+    """
+    Recompute Product.average_rating/review_count from active reviews.
+
+    Rating filters and sorting now read these columns instead of aggregating
+    reviews per query, so existing rows must be exact before they are used.
+    """
+    Product = apps.get_model("marketplace", "Product")
+    ProductReview = apps.get_model("marketplace", "ProductReview")
+
+    active_reviews = ProductReview.objects.filter(product_id=OuterRef("pk"), is_active=True).order_by()
+    average = active_reviews.values("product_id").annotate(value=Avg("rating")).values("value")
+    count = active_reviews.values("product_id").annotate(value=Count("id")).values("value")
+
+    Product.objects.update(
+        average_rating=Coalesce(
+            Cast(Round(Subquery(average), 2), output_field=DecimalField(max_digits=3, decimal_places=2)),
+            Value(Decimal("0.00")),
+        ),
+        review_count=Coalesce(Subquery(count), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("marketplace", "0023_search_spelling_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "-average_rating"],
+                name="marketplace_is_acti_35c5f0_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_product_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-16 20:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("marketplace", "0024_product_rating_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingProduct",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveIntegerField()),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trending_products",
+                        to="marketplace.category",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trending_ranks",
+                        to="marketplace.product",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["category", "rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["category", "rank"], name="mkt_trending_rank_idx"
+                    )
+                ],
+            },
+        ),
+    ]
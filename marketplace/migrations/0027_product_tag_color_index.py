@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-16 20:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tags_and_colors(apps, schema_editor):
+    """
+    Mirror existing Product.tags/colors JSON lists into the lookup tables.
+
+    Tag and color filters read only the lookup tables, so they must be
+    populated before the new filters serve traffic. Normalization matches
+    attribute_index.normalize_values (trimmed, lowercased, max 50 chars).
+    """
+    Product = apps.get_model("marketplace", "Product")
+    ProductTag = apps.get_model("marketplace", "ProductTag")
+    ProductColor = apps.get_model("marketplace", "ProductColor")
+
+    def normalize(values):
+        if not isinstance(values, list):
+            return set()
+        return {str(value).strip().lower()[:50] for value in values if str(value).strip()}
+
+    tags, colors = [], []
+    for pk, product_tags, product_colors in Product.objects.values_list("pk", "tags", "colors").iterator():
+        tags.extend(ProductTag(product_id=pk, value=value) for value in normalize(product_tags))
+        colors.extend(ProductColor(product_id=pk, value=value) for value in normalize(product_colors))
+        if len(tags) + len(colors) >= 5000:
+            ProductTag.objects.bulk_create(tags)
+            ProductColor.objects.bulk_create(colors)
+            tags, colors = [], []
+    ProductTag.objects.bulk_create(tags)
+    ProductColor.objects.bulk_create(colors)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("marketplace", "0026_related_products"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductColor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.CharField(max_length=50)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="color_entries",
+                        to="marketplace.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["value", "product"], name="mkt_product_color_value_idx"
+                    )
+                ],
+                "unique_together": {("product", "value")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.CharField(max_length=50)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_entries",
+                        to="marketplace.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["value", "product"], name="mkt_product_tag_value_idx"
+                    )
+                ],
+                "unique_together": {("product", "value")},
+            },
+        ),
+        migrations.RunPython(backfill_tags_and_colors, migrations.RunPython.noop),
+    ]
@@ -2,11 +2,19 @@ from marketplace.cart.domain.models import Cart, CartItem
 from marketplace.catalog.domain.models import (
     Category,
     Product,
+    ProductAutocompleteEntry,
+    ProductAutocompletePrefix,
+    ProductColor,
     ProductFavorite,
     ProductImage,
     ProductMetrics,
     ProductReview,
     ProductReviewHelpful,
+    ProductTag,
+    RelatedProduct,
+    SearchTerm,
+    SearchTermTrigram,
+    TrendingProduct,
 )
 from marketplace.ordering.domain.models import Order, OrderItem, OrderShipping
 
@@ -24,4 +32,12 @@ __all__ = [
     "ProductReviewHelpful",
     "ProductFavorite",
     "ProductMetrics",
+    "ProductAutocompleteEntry",
+    "ProductAutocompletePrefix",
+    "SearchTerm",
+    "SearchTermTrigram",
+    "TrendingProduct",
+    "RelatedProduct",
+    "ProductTag",
+    "ProductColor",
 ]
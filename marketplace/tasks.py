@@ -0,0 +1,171 @@
+"""
+Marketplace Celery Tasks
+
+Periodic jobs that precompute catalog rankings and recommendations, flush
+buffered product counters, drain buffered activity events, roll activity up
+into daily summaries and hourly analytics rollups, and archive expired raw
+activity.
+"""
+
+import logging
+
+from celery import shared_task
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, queue="marketplace_tasks")
+def refresh_trending_products_task(self):
+    """
+    Celery task to recompute the time-decayed trending ranking and the autocomplete popularity.
+
+    Returns:
+        dict: Refresh result
+    """
+    try:
+        from marketplace.catalog.domain.services.autocomplete_index import AutocompleteIndex
+        from marketplace.catalog.domain.services.trending import TrendingRanker
+
+        rows = TrendingRanker().rebuild()
+        logger.info(f"Trending products refreshed: {rows} ranking rows")
+        # Counter flushes bypass the signals that keep the autocomplete index current
+        refreshed = AutocompleteIndex().refresh_popularity()
+        return {"success": True, "rows": rows, "autocomplete_refreshed": refreshed}
+
+    except Exception as e:
+        logger.error(f"Error in trending products task: {e}")
+        try:
+            raise self.retry(countdown=60 * (2**self.request.retries))
+        except self.MaxRetriesExceededError:
+            return {"success": False, "rows": 0, "error": f"Max retries exceeded: {str(e)}"}
+
+
+@shared_task(bind=True, max_retries=3, queue="marketplace_tasks")
+def refresh_related_products_task(self):
+    """
+    Celery task to rebuild the precomputed related-products table.
+
+    Returns:
+        dict: Refresh result
+    """
+    try:
+        from marketplace.catalog.domain.services.related_products import RelatedProductsIndex
+
+        rows = RelatedProductsIndex().rebuild()
+        logger.info(f"Related products refreshed: {rows} rows")
+        return {"success": True, "rows": rows}
+
+    except Exception as e:
+        logger.error(f"Error in related products task: {e}")
+        try:
+            raise self.retry(countdown=60 * (2**self.request.retries))
+        except self.MaxRetriesExceededError:
+            return {"success": False, "rows": 0, "error": f"Max retries exceeded: {str(e)}"}
+
+
+@shared_task(bind=True, max_retries=0, queue="marketplace_tasks")
+def flush_product_counters_task(self):
+    """
+    Celery task to write buffered product counters (views, clicks, favorites) to the database.
+
+    Returns:
+        dict: Flush result
+    """
+    try:
+        from marketplace.catalog.domain.services.counters import get_product_counters
+
+        updates = get_product_counters().flush()
+        return {"success": True, "updates": updates}
+
+    except Exception as e:
+        # Unapplied increments are put back in the buffer for the next run
+        logger.error(f"Error in product counters flush task: {e}")
+        return {"success": False, "updates": 0, "error": str(e)}
+
+
+@shared_task(bind=True, max_retries=0, queue="marketplace_tasks")
+def drain_activity_events_task(self):
+    """
+    Celery task to write buffered activity events to UserClick in batches.
+
+    Returns:
+        dict: Drain result
+    """
+    try:
+        from marketplace.catalog.domain.services.activity_ingestion import get_activity_ingestion
+
+        written = get_activity_ingestion().drain()
+        return {"success": True, "written": written}
+
+    except Exception as e:
+        # The failed batch stays in the buffer for the next run
+        logger.error(f"Error in activity drain task: {e}")
+        return {"success": False, "written": 0, "error": str(e)}
+
+
+@shared_task(bind=True, max_retries=3, queue="marketplace_tasks")
+def rollup_activity_summaries_task(self):
+    """
+    Celery task to refresh today's daily activity summaries (and yesterday's shortly after midnight).
+
+    Returns:
+        dict: Rollup result
+    """
+    try:
+        from activity.services.rollup import ActivitySummaryRollup
+
+        summaries = ActivitySummaryRollup().catch_up()
+        return {"success": True, "summaries": summaries}
+
+    except Exception as e:
+        logger.error(f"Error in activity rollup task: {e}")
+        try:
+            raise self.retry(countdown=60 * (2**self.request.retries))
+        except self.MaxRetriesExceededError:
+            return {"success": False, "summaries": 0, "error": f"Max retries exceeded: {str(e)}"}
+
+
+@shared_task(bind=True, max_retries=3, queue="marketplace_tasks")
+def rollup_product_activity_task(self):
+    """
+    Celery task to refresh the recent hourly (and today's daily) product activity rollups.
+
+    Returns:
+        dict: Rollup result
+    """
+    try:
+        from activity.services.analytics import ActivityAnalytics
+
+        rows = ActivityAnalytics().catch_up()
+        return {"success": True, "rows": rows}
+
+    except Exception as e:
+        logger.error(f"Error in product activity rollup task: {e}")
+        try:
+            raise self.retry(countdown=60 * (2**self.request.retries))
+        except self.MaxRetriesExceededError:
+            return {"success": False, "rows": 0, "error": f"Max retries exceeded: {str(e)}"}
+
+
+@shared_task(bind=True, max_retries=3, queue="marketplace_tasks")
+def archive_activity_events_task(self):
+    """
+    Celery task to move raw activity events past the retention window into storage archives.
+
+    Returns:
+        dict: Retention result
+    """
+    try:
+        from activity.services.retention import ActivityRetention
+
+        result = ActivityRetention().run()
+        logger.info(f"Activity retention: archived {result['archived']} events from {result['days']} days")
+        return {"success": True, **result}
+
+    except Exception as e:
+        logger.error(f"Error in activity retention task: {e}")
+        try:
+            raise self.retry(countdown=60 * (2**self.request.retries))
+        except self.MaxRetriesExceededError:
+            return {"success": False, "days": 0, "error": f"Max retries exceeded: {str(e)}"}
@@ -1,6 +1,7 @@
 from decimal import Decimal  # Import Decimal
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
@@ -71,6 +72,8 @@ class SearchViewIntegrationTest(TestCase):
         self.search_url = reverse("marketplace:product-search")
         self.autocomplete_url = reverse("marketplace:product-autocomplete")
         self.filters_url = reverse("marketplace:product-filters")
+        self.facets_url = reverse("marketplace:product-facets")
+        cache.clear()
 
     def test_search_basic(self):
         response = self.client.get(self.search_url, {"q": "phone"})
@@ -121,3 +124,34 @@ class SearchViewIntegrationTest(TestCase):
         response = self.client.get(self.search_url, {"sort": "price_asc"})
         results = response.data["results"]
         self.assertEqual(results[0]["id"], str(self.p3.id))  # 49
+
+    def test_search_cursor_pagination(self):
+        response = self.client.get(self.search_url, {"sort": "price_asc", "page_size": 2, "cursor": ""})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["count"])
+        self.assertEqual([r["id"] for r in response.data["results"]], [str(self.p3.id), str(self.p2.id)])
+
+        response = self.client.get(
+            self.search_url, {"sort": "price_asc", "page_size": 2, "cursor": response.data["next_cursor"]}
+        )
+        self.assertEqual([r["id"] for r in response.data["results"]], [str(self.p1.id)])
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_search_invalid_cursor(self):
+        response = self.client.get(self.search_url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets_endpoint(self):
+        response = self.client.get(self.facets_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 3)  # p4 is inactive
+        categories = {c["slug"]: c["count"] for c in response.data["categories"]}
+        self.assertEqual(categories, {"electronics": 2, "books": 1})
+        prices = {p["key"]: p["count"] for p in response.data["price_ranges"]}
+        self.assertEqual(prices, {"0-50": 1, "500-1000": 2})
+
+    def test_facets_follow_query_and_filters(self):
+        response = self.client.get(self.facets_url, {"q": "phone", "category": "electronics"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 1)
+        self.assertEqual(response.data["brands"], [{"value": self.p1.brand, "count": 1}])
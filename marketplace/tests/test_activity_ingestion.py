@@ -0,0 +1,231 @@
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DataError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from activity.models import ProductActivityRollup, UserClick
+from marketplace.async_tracking import AsyncTracker
+from marketplace.catalog.api.views.category_views import CategoryViewSet
+from marketplace.catalog.domain.services.activity_ingestion import ActivityIngestion, SpoolEventStore
+from marketplace.catalog.domain.services.counters import get_product_counters
+from marketplace.models import Category, Product, ProductMetrics
+
+
+User = get_user_model()
+
+INGESTION = "marketplace.catalog.domain.services.activity_ingestion"
+
+
+class ActivityIngestionTest(TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+        self.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="pw")
+        seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        category = Category.objects.create(name="Furniture", slug="furniture")
+        self.products = [
+            Product.objects.create(
+                name=f"Chair {i}", description="Chair", seller=seller, category=category, price=Decimal("10.00")
+            )
+            for i in range(3)
+        ]
+        self.ingestion = self._ingestion()
+
+    def _ingestion(self, **store_options):
+        return ActivityIngestion(store=SpoolEventStore(self.spool_dir, **store_options))
+
+    @override_settings(PRODUCT_COUNTER_FLUSH_INTERVAL=3600)
+    def test_events_are_written_in_one_batch(self):
+        ids = [p.pk for p in self.products]
+        self.ingestion.record("listing_view", ids, session_key="s1", request_meta={"ip_address": "10.0.0.1"})
+        self.ingestion.record("click", ids[:1], user_id=self.user.pk)
+        self.ingestion.record("cart_add", ids[:1], user_id=self.user.pk)
+        self.assertEqual(UserClick.objects.count(), 0)
+
+        # product ids + user ids + savepoint/insert/release; metrics are buffered by the counters,
+        # then one visitor sketch merge per sketch table (insert + savepoint/select/update/release)
+        with self.assertNumQueries(15):
+            self.assertEqual(self.ingestion.drain(), 5)
+
+        self.assertEqual(UserClick.objects.filter(action="listing_view", session_key="s1").count(), 3)
+        self.assertEqual(UserClick.objects.get(action="click").user, self.user)
+
+        get_product_counters().flush()
+        metrics = ProductMetrics.objects.get(product=self.products[0])
+        self.assertEqual((metrics.total_views, metrics.total_clicks, metrics.total_cart_additions), (1, 2, 1))
+
+    def test_event_time_is_kept(self):
+        self.ingestion.record("click", [self.products[0].pk], user_id=self.user.pk)
+        before = time.time()
+        time.sleep(0.01)
+        self.ingestion.drain()
+
+        click = UserClick.objects.get()
+        self.assertLess(click.created_at.timestamp(), before)
+        self.assertEqual(self.ingestion.status()["queue_size"], 0)
+
+    def test_invalid_and_duplicate_events_are_skipped(self):
+        inactive = self.products[2]
+        Product.objects.filter(pk=inactive.pk).update(is_active=False)
+        product = self.products[0]
+
+        with mock.patch(f"{INGESTION}.time.time", side_effect=[1000.2, 1000.4]):
+            self.ingestion.record("detail_view", [product.pk, inactive.pk], session_key="s1")
+            self.ingestion.record("detail_view", [product.pk], session_key="s1")  # double render
+        self.ingestion.record("favorite", [product.pk])  # anonymous
+        self.ingestion.record(
+            "click", [product.pk], user_id="00000000-0000-0000-0000-000000000000"
+        )  # deleted user -> anonymous click
+        self.ingestion.drain()
+
+        self.assertEqual(UserClick.objects.filter(action="detail_view").count(), 1)
+        self.assertFalse(UserClick.objects.filter(action="favorite").exists())
+        self.assertIsNone(UserClick.objects.get(action="click").user_id)
+        status = self.ingestion.status()
+        self.assertEqual(
+            (status["skipped_unknown_product"], status["skipped_duplicate"], status["skipped_anonymous"]),
+            (1, 1, 1),
+        )
+
+    def test_repeat_views_are_deduplicated_across_batches(self):
+        product = self.products[1]
+        with mock.patch(f"{INGESTION}.time.time", return_value=1000.2):
+            self.ingestion.record("detail_view", [product.pk], user_id=self.user.pk)
+        self.ingestion.drain()
+        # A second drainer (another process) sees the repeat in its own batch
+        other = self._ingestion()
+        with mock.patch(f"{INGESTION}.time.time", return_value=1000.6):
+            other.record("detail_view", [product.pk], user_id=self.user.pk)
+        other.drain()
+
+        self.assertEqual(UserClick.objects.filter(action="detail_view").count(), 1)
+        self.assertEqual(other.status()["skipped_duplicate"], 1)
+
+    def test_separate_views_in_one_batch_are_kept(self):
+        product = self.products[1]
+        with mock.patch(f"{INGESTION}.time.time", side_effect=[1000.2, 1004.7]):
+            self.ingestion.record("detail_view", [product.pk], user_id=self.user.pk)
+            self.ingestion.record("detail_view", [product.pk], user_id=self.user.pk)
+        self.ingestion.drain()
+
+        self.assertEqual(UserClick.objects.filter(action="detail_view").count(), 2)
+        self.assertEqual(self.ingestion.status()["skipped_duplicate"], 0)
+
+    def test_late_events_refresh_their_rollups(self):
+        product = self.products[0]
+        with mock.patch(f"{INGESTION}.time.time", return_value=time.time() - 6 * 3600):
+            self.ingestion.record("click", [product.pk], user_id=self.user.pk)
+        self.ingestion.drain()
+
+        rollup = ProductActivityRollup.objects.get(product=product, granularity="hour")
+        self.assertEqual((rollup.action, rollup.count), ("click", 1))
+        self.assertTrue(ProductActivityRollup.objects.filter(product=product, granularity="day").exists())
+
+    @override_settings(ACTIVITY_INGESTION_MAX_PENDING=2)
+    def test_backpressure_drops_and_counts_events(self):
+        results = [self.ingestion.record("click", [self.products[0].pk]) for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        status = self.ingestion.status()
+        self.assertTrue(status["backpressure"])
+        self.assertEqual((status["accepted"], status["dropped_backpressure"]), (2, 1))
+
+        self.ingestion.drain()
+        self.assertTrue(self.ingestion.record("click", [self.products[0].pk]))
+
+    def test_buffered_events_survive_a_restart(self):
+        self.ingestion.record("click", [self.products[0].pk], user_id=self.user.pk)
+        self.ingestion.store._seal()
+        # A new process picks up the sealed segment
+        self.assertEqual(self._ingestion().drain(), 1)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_stale_segment_of_a_dead_writer_is_reclaimed(self):
+        path = os.path.join(self.spool_dir, "deadhost-4242.active")
+        with open(path, "w") as f:
+            f.write('{"action":"click","product_ids":["%s"],"ts":1}\n{"action":"cli' % self.products[0].pk)
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+
+        self.assertEqual(self.ingestion.drain(), 1)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_failed_batch_is_retried(self):
+        self.ingestion.record("click", [self.products[0].pk])
+        write = self.ingestion._write
+        self.ingestion._write = lambda events: (_ for _ in ()).throw(RuntimeError("db down"))
+
+        with self.assertRaises(RuntimeError):
+            self.ingestion.drain()
+
+        self.ingestion._write = write
+        self.assertEqual(self.ingestion.drain(), 1)
+        self.assertEqual(self.ingestion.status()["failed_batches"], 1)
+
+    def test_invalid_ip_address_is_not_buffered(self):
+        product = self.products[0]
+        self.ingestion.record("click", [product.pk], request_meta={"ip_address": "<script>, 10.0.0.1"})
+        self.ingestion.record("click", [product.pk], request_meta={"ip_address": " 2001:db8::1"})
+        self.ingestion.drain()
+
+        self.assertCountEqual(UserClick.objects.values_list("ip_address", flat=True), [None, "2001:db8::1"])
+
+    def test_rejected_event_is_dead_lettered_without_blocking_the_batch(self):
+        product = self.products[0]
+        self.ingestion.record("click", [product.pk], session_key="good-1")
+        self.ingestion.record("click", [product.pk], session_key="poison")
+        self.ingestion.record("click", [product.pk], session_key="good-2")
+        bulk_create = UserClick.objects.bulk_create
+
+        def reject_poison(objs, *args, **kwargs):
+            if any(click.session_key == "poison" for click in objs):
+                raise DataError("Data too long for column")
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(UserClick.objects, "bulk_create", side_effect=reject_poison):
+            self.assertEqual(self.ingestion.drain(), 2)
+
+        self.assertEqual(set(UserClick.objects.values_list("session_key", flat=True)), {"good-1", "good-2"})
+        status = self.ingestion.status()
+        self.assertEqual((status["dead_lettered"], status["failed_batches"], status["queue_size"]), (1, 0, 0))
+        dead = [name for name in os.listdir(self.spool_dir) if name.endswith(SpoolEventStore.DEAD)]
+        self.assertEqual(len(dead), 1)
+        with open(os.path.join(self.spool_dir, dead[0])) as f:
+            self.assertIn('"session_key":"poison"', f.read())
+        # Nothing is left for the next drain to retry
+        self.assertEqual(self.ingestion.drain(), 0)
+
+    @override_settings(ACTIVITY_INGESTION_DRAIN_THREAD=False)
+    def test_category_page_queues_one_impression_event(self):
+        request = APIRequestFactory().get("/categories/furniture/products/")
+        force_authenticate(request, user=self.user)
+        view = CategoryViewSet.as_view({"get": "products"})
+
+        with mock.patch("marketplace.async_tracking.get_activity_ingestion", return_value=self.ingestion):
+            response = view(request, slug="furniture")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertFalse(UserClick.objects.exists())
+        self.assertFalse(ProductMetrics.objects.exists())
+        self.assertEqual((self.ingestion.status()["accepted"], self.ingestion.status()["queue_size"]), (1, 1))
+
+        self.assertEqual(self.ingestion.drain(), 3)
+        self.assertEqual(UserClick.objects.filter(action="category_view", user=self.user).count(), 3)
+
+    @override_settings(ACTIVITY_INGESTION_DRAIN_THREAD=False)
+    def test_events_can_be_queued_without_a_request(self):
+        product = self.products[0]
+        with mock.patch("marketplace.async_tracking.get_activity_ingestion", return_value=self.ingestion):
+            self.assertTrue(AsyncTracker.queue_listing_view([product], None))
+            self.assertTrue(AsyncTracker.queue_product_click(product, None))
+
+        self.assertEqual(self.ingestion.drain(), 2)
+        self.assertFalse(UserClick.objects.exclude(session_key=None, user=None).exists())
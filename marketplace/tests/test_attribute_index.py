@@ -0,0 +1,90 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from marketplace.catalog.domain.services.attribute_index import normalize_values
+from marketplace.filters import ProductFilter
+from marketplace.models import Category, Product, ProductColor, ProductTag
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+class NormalizeValuesTest(SimpleTestCase):
+    def test_normalize_values(self):
+        self.assertEqual(normalize_values([" Red", "red", "Dark Blue", ""]), {"red", "dark blue"})
+        self.assertEqual(normalize_values("Oak, modern"), {"oak", "modern"})
+        self.assertEqual(normalize_values(None), set())
+        self.assertEqual(normalize_values({"not": "a list"}), set())
+
+
+class ProductAttributeIndexTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        category = Category.objects.create(name="Furniture", slug="furniture")
+
+        def product(name, tags, colors):
+            return Product.objects.create(
+                name=name,
+                description=name,
+                seller=self.seller,
+                category=category,
+                price=Decimal("10.00"),
+                tags=tags,
+                colors=colors,
+            )
+
+        self.chair = product("Chair", ["Oak", "modern"], ["Red", "White"])
+        self.sofa = product("Sofa", ["tired-look"], ["Tired Grey"])
+        self.table = product("Table", ["oak"], ["white"])
+
+    def _names(self, params):
+        return sorted(p.name for p in ProductFilter(params, queryset=Product.objects.all()).qs)
+
+    def test_saves_keep_lookup_tables_in_sync(self):
+        self.assertEqual(set(self.chair.tag_entries.values_list("value", flat=True)), {"oak", "modern"})
+
+        self.chair.tags = ["modern", "Scandinavian"]
+        self.chair.save(update_fields=["tags"])
+        self.assertEqual(set(self.chair.tag_entries.values_list("value", flat=True)), {"modern", "scandinavian"})
+        self.assertEqual(set(self.chair.color_entries.values_list("value", flat=True)), {"red", "white"})
+
+        self.chair.delete()
+        self.assertFalse(ProductTag.objects.filter(value="scandinavian").exists())
+
+    def test_filters_match_whole_values_only(self):
+        self.assertEqual(self._names({"colors": "red"}), ["Chair"])
+        self.assertEqual(self._names({"colors": "RED, tired grey"}), ["Chair", "Sofa"])
+        self.assertEqual(self._names({"tags": "oak"}), ["Chair", "Table"])
+
+    def test_search_service_filters_and_facets(self):
+        result = SearchService().filter_products({"tags": ["oak"], "colors": "white"})
+        self.assertEqual(sorted(p.name for p in result.value["results"]), ["Chair", "Table"])
+
+        facets = SearchService().get_facets(filters={"tags": "oak"}, use_cache=False).value
+        self.assertEqual(facets["tags"], [{"value": "oak", "count": 2}, {"value": "modern", "count": 1}])
+        self.assertEqual(facets["colors"], [{"value": "white", "count": 2}, {"value": "red", "count": 1}])
+
+    def test_rebuild_command_backfills_bulk_imports(self):
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name="Imported",
+                    slug="imported",
+                    description="Imported",
+                    seller=self.seller,
+                    price=Decimal("10.00"),
+                    colors=["Green"],
+                )
+            ]
+        )
+        self.assertFalse(ProductColor.objects.filter(value="green").exists())
+
+        call_command("rebuild_attribute_index", stdout=StringIO())
+
+        self.assertEqual(self._names({"colors": "green"}), ["Imported"])
+        self.assertEqual(ProductTag.objects.count(), 4)
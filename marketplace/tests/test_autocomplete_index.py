@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from marketplace.catalog.domain.services.autocomplete_index import AutocompleteIndex, edge_ngrams, normalize_tokens
+from marketplace.models import (
+    Category,
+    Product,
+    ProductAutocompleteEntry,
+    ProductAutocompletePrefix,
+    ProductImage,
+)
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+class EdgeNgramTest(SimpleTestCase):
+    def test_normalize_tokens_lowercases_and_strips_accents(self):
+        self.assertEqual(normalize_tokens("Café-Table, OAK"), ["cafe", "table", "oak"])
+
+    def test_edge_ngrams_respect_length_bounds(self):
+        self.assertEqual(edge_ngrams(["sofa", "x"]), {"so", "sof", "sofa"})
+        self.assertEqual(max(len(p) for p in edge_ngrams(["a" * 40])), ProductAutocompletePrefix.MAX_PREFIX_LENGTH)
+
+
+@override_settings(USE_S3=False)
+class AutocompleteIndexTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        self.category = Category.objects.create(name="Living Room", slug="living-room")
+        self.sofa = self._product("Oak Sofa Bed", "Nordic", view_count=50)
+        self.table = self._product("Oak Coffee Table", "Woodland", view_count=10)
+        ProductImage.objects.create(product=self.sofa, s3_key="products/sofa.jpg", is_primary=True)
+        self.service = SearchService()
+
+    def _product(self, name, brand, **kwargs):
+        return Product.objects.create(
+            name=name,
+            description=name,
+            brand=brand,
+            seller=self.seller,
+            category=self.category,
+            price=Decimal("120.00"),
+            **kwargs,
+        )
+
+    def test_products_are_indexed_on_save(self):
+        entry = ProductAutocompleteEntry.objects.get(product=self.sofa)
+        self.assertEqual(entry.category_name, "Living Room")
+        self.assertEqual(entry.image_key, "products/sofa.jpg")
+        self.assertTrue(ProductAutocompletePrefix.objects.filter(entry=entry, prefix="nor").exists())
+
+    def test_keystroke_is_a_single_query_ordered_by_popularity(self):
+        with self.assertNumQueries(1):
+            result = self.service.autocomplete("oa")
+
+        self.assertTrue(result.ok)
+        self.assertEqual([s["name"] for s in result.value], ["Oak Sofa Bed", "Oak Coffee Table"])
+        self.assertEqual(result.value[0]["category"], "Living Room")
+        self.assertEqual(result.value[0]["price"], 120.0)
+        self.assertTrue(result.value[0]["image"].endswith("products/sofa.jpg"))
+        self.assertIsNone(result.value[1]["image"])
+
+    def test_matches_brand_category_and_multiple_words(self):
+        self.assertEqual([s["name"] for s in self.service.autocomplete("wood").value], ["Oak Coffee Table"])
+        self.assertEqual(len(self.service.autocomplete("living").value), 2)
+        self.assertEqual([s["name"] for s in self.service.autocomplete("oak tab").value], ["Oak Coffee Table"])
+
+    def test_every_word_is_matched_in_sql(self):
+        for i in range(6):
+            self._product(f"Oak Chair {i}", "Nordic", view_count=100)
+        index = AutocompleteIndex()
+
+        # The table is less popular than every chair matching "oak" alone
+        with self.assertNumQueries(1):
+            self.assertEqual([s["name"] for s in index.lookup("oak tab", limit=1)], ["Oak Coffee Table"])
+        self.assertEqual([s["name"] for s in index.lookup("oak t", limit=1)], ["Oak Coffee Table"])
+
+    def test_popularity_is_refreshed_from_flushed_counters(self):
+        # Counter flushes are plain UPDATEs that fire no signals
+        Product.objects.filter(pk=self.table.pk).update(view_count=500)
+        self.assertEqual(self.service.autocomplete("oak").value[0]["name"], "Oak Sofa Bed")
+
+        self.assertEqual(AutocompleteIndex().refresh_popularity(), 1)
+
+        self.assertEqual(self.service.autocomplete("oak").value[0]["name"], "Oak Coffee Table")
+        self.assertEqual(
+            set(ProductAutocompletePrefix.objects.filter(entry_id=self.table.pk).values_list("popularity", flat=True)),
+            {500},
+        )
+        self.assertEqual(AutocompleteIndex().refresh_popularity(), 0)
+
+    def test_updates_and_deactivation_are_reflected(self):
+        self.table.name = "Walnut Coffee Table"
+        self.table.save()
+        self.assertEqual([s["name"] for s in self.service.autocomplete("oak").value], ["Oak Sofa Bed"])
+
+        self.sofa.is_active = False
+        self.sofa.save(update_fields=["is_active"])
+        self.assertEqual(self.service.autocomplete("oak").value, [])
+
+    def test_counter_only_saves_do_not_reindex(self):
+        self.sofa.view_count = 999
+        with self.assertNumQueries(1):
+            self.sofa.save(update_fields=["view_count"])
+
+    def test_delete_and_category_rename(self):
+        self.category.name = "Lounge"
+        self.category.save()
+        self.assertEqual(len(self.service.autocomplete("lou").value), 2)
+
+        self.sofa.delete()
+        self.assertFalse(ProductAutocompleteEntry.objects.filter(product_id=self.sofa.pk).exists())
+
+    def test_rebuild(self):
+        ProductAutocompleteEntry.objects.all().delete()
+
+        self.assertEqual(AutocompleteIndex().rebuild(), 2)
+        self.assertEqual(len(self.service.autocomplete("oak").value), 2)
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from activity.models import UserClick
+from activity.services.analytics import ActivityAnalytics
+from marketplace.catalog.domain.services.funnel import ConversionFunnel
+from marketplace.models import Category, Order, OrderItem, Product
+
+
+User = get_user_model()
+
+
+class ConversionFunnelTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.seller = User.objects.create_user(
+            username="seller", email="seller@example.com", password="pw", role="seller"
+        )
+        self.buyer = User.objects.create_user(username="buyer", email="buyer@example.com", password="pw")
+        self.sofas = Category.objects.create(name="Sofas", slug="sofas")
+        self.lamps = Category.objects.create(name="Lamps", slug="lamps")
+
+        def product(name, category):
+            return Product.objects.create(
+                name=name, description=name, seller=self.seller, category=category, price=Decimal("10.00")
+            )
+
+        self.sofa = product("Sofa", self.sofas)
+        self.armchair = product("Armchair", self.sofas)
+        self.lamp = product("Lamp", self.lamps)
+
+        for product, action, n in [
+            (self.sofa, "detail_view", 10),
+            (self.sofa, "click", 5),
+            (self.sofa, "cart_add", 2),
+            (self.armchair, "detail_view", 4),
+            (self.lamp, "detail_view", 6),
+            (self.lamp, "click", 3),
+        ]:
+            for _ in range(n):
+                UserClick.objects.create(product=product, action=action, user=self.buyer, created_at=self.now)
+        ActivityAnalytics().rebuild_day(timezone.localdate(self.now))
+
+        self._order("payment_confirmed", self.sofa, quantity=2)
+        self._order("delivered", self.lamp)
+        # Unpaid orders are not purchases
+        self._order("pending_payment", self.sofa)
+
+        self.window = (self.now - timedelta(days=7), self.now + timedelta(hours=1))
+
+    def _order(self, status, product, quantity=1):
+        total = product.price * quantity
+        order = Order.objects.create(
+            buyer=self.buyer, status=status, subtotal=total, total_amount=total, shipping_address={}
+        )
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            seller=self.seller,
+            quantity=quantity,
+            unit_price=product.price,
+            total_price=total,
+            product_name=product.name,
+            product_description=product.description,
+        )
+
+    def test_funnel_per_product_category_and_seller_in_three_queries(self):
+        with self.assertNumQueries(3):
+            funnel = ConversionFunnel().compute(self.seller.pk, *self.window)
+
+        sofa = funnel["products"][0]
+        self.assertEqual(sofa["id"], self.sofa.pk)
+        # Cart additions also count as clicks (UserClick.METRIC_DELTAS)
+        self.assertEqual([sofa[stage] for stage in ConversionFunnel.STAGES], [10, 7, 2, 1])
+        self.assertEqual(sofa["units_sold"], 2)
+        self.assertEqual(sofa["revenue"], Decimal("20.00"))
+        self.assertEqual(sofa["view_to_click_rate"], 70.0)
+        self.assertEqual(sofa["cart_to_purchase_rate"], 50.0)
+
+        sofas = funnel["categories"][0]
+        self.assertEqual((sofas["category_id"], sofas["views"], sofas["purchases"]), (self.sofas.pk, 14, 1))
+        self.assertEqual(funnel["totals"]["views"], 20)
+        self.assertEqual(funnel["totals"]["clicks"], 10)
+        self.assertEqual(funnel["totals"]["purchases"], 2)
+        self.assertEqual(funnel["totals"]["view_to_purchase_rate"], 10.0)
+
+    def test_seller_funnel_is_cached_per_seller(self):
+        funnel = ConversionFunnel()
+        first = funnel.seller_funnel(self.seller.pk, *self.window)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(funnel.seller_funnel(self.seller.pk, *self.window), first)
+
+        other = User.objects.create_user(username="other", email="other@example.com", password="pw")
+        self.assertEqual(funnel.seller_funnel(other.pk, *self.window)["products"], [])
+
+    def test_funnel_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.seller)
+
+        response = client.get(reverse("marketplace:seller-analytics-funnel"), {"period": "week"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"]["cart_additions"], 2)
+        self.assertEqual(len(response.data["products"]), 3)
+        self.assertEqual(response.data["categories"][1]["name"], "Lamps")
+
+        response = client.get(reverse("marketplace:seller-analytics-funnel"), {"period": "all"})
+        self.assertEqual(response.status_code, 400)
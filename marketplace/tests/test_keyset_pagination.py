@@ -0,0 +1,114 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from marketplace.catalog.domain.services.pagination import InvalidCursor, get_keyset, paginate
+from marketplace.models import Category, Product
+from marketplace.services import CatalogService, ErrorCodes, SearchService
+
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        category = Category.objects.create(name="Furniture", slug="furniture")
+        now = timezone.now()
+        # Prices repeat so ties have to be broken by the primary key
+        for i in range(7):
+            product = Product.objects.create(
+                name=f"Chair {i}",
+                description="Chair",
+                seller=seller,
+                category=category,
+                price=Decimal("10.00") * (i % 3 + 1),
+                view_count=i,
+            )
+            Product.objects.filter(pk=product.pk).update(created_at=now - timedelta(minutes=i))
+
+    def _walk(self, queryset, page_size=3):
+        """Follow next_cursor from the first page and return every product id served."""
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            page = paginate(queryset, page_size=page_size, cursor=cursor)
+            seen.extend(p.pk for p in page["results"])
+            cursor = page["next_cursor"]
+        return seen
+
+    def test_keyset_ends_with_pk_in_the_last_key_direction(self):
+        self.assertEqual(get_keyset(Product.objects.order_by("-price")), [("price", True), ("pk", True)])
+        self.assertEqual(get_keyset(Product.objects.order_by("price")), [("price", False), ("pk", False)])
+        self.assertEqual(get_keyset(Product.objects.all()), [("created_at", True), ("pk", True)])
+        self.assertEqual(
+            get_keyset(Product.objects.order_by("price", "-created_at")),
+            [("price", False), ("created_at", True), ("pk", True)],
+        )
+
+    def test_cursor_walk_matches_offset_order_for_every_ordering(self):
+        for ordering in ["-created_at", "created_at", "price", "-price", "-view_count"]:
+            queryset = Product.objects.order_by(ordering)
+            # The pk tie-breaker follows the sort direction
+            tie_breaker = "-pk" if ordering.startswith("-") else "pk"
+            expected = [p.pk for p in queryset.order_by(ordering, tie_breaker)]
+            self.assertEqual(self._walk(queryset), expected, ordering)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        queryset = Product.objects.order_by("price")
+        first = paginate(queryset, page_size=3, cursor="")
+        second = paginate(queryset, page_size=3, cursor=first["next_cursor"])
+        back = paginate(queryset, page_size=3, cursor=second["previous_cursor"])
+
+        self.assertEqual([p.pk for p in back["results"]], [p.pk for p in first["results"]])
+        self.assertFalse(back["has_previous"])
+        self.assertTrue(back["has_next"])
+
+    def test_cursor_pages_skip_count_unless_requested(self):
+        queryset = Product.objects.order_by("-created_at")
+
+        with self.assertNumQueries(1):
+            page = paginate(queryset, page_size=3, cursor="")
+        self.assertIsNone(page["count"])
+
+        self.assertEqual(paginate(queryset, page_size=3, cursor="", include_count=True)["count"], 7)
+
+    def test_cursor_for_another_ordering_is_rejected(self):
+        cursor = paginate(Product.objects.order_by("price"), page_size=3, cursor="")["next_cursor"]
+
+        with self.assertRaises(InvalidCursor):
+            paginate(Product.objects.order_by("-price"), page_size=3, cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            paginate(Product.objects.order_by("price"), page_size=3, cursor="not-a-cursor")
+
+    def test_page_number_contract_is_kept_and_hands_over_to_cursors(self):
+        result = CatalogService().list_products(page=2, page_size=3, ordering="price")
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.value["count"], 7)
+        self.assertEqual(result.value["page"], 2)
+        self.assertEqual(result.value["num_pages"], 3)
+
+        following = CatalogService().list_products(page_size=3, ordering="price", cursor=result.value["next_cursor"])
+        page_three = CatalogService().list_products(page=3, page_size=3, ordering="price")
+        self.assertEqual(
+            [p.pk for p in following.value["results"]],
+            [p.pk for p in page_three.value["results"]],
+        )
+
+    def test_services_report_invalid_cursor_as_invalid_input(self):
+        result = SearchService().filter_products({}, cursor="bogus")
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, ErrorCodes.INVALID_INPUT)
+
+    def test_search_cursor_mode(self):
+        result = SearchService().search("chair", sort="price_asc", page_size=4, cursor="")
+
+        self.assertIsNone(result.value["count"])
+        self.assertIsNone(result.value["page"])
+        self.assertEqual(len(result.value["results"]), 4)
+        self.assertTrue(result.value["has_next"])
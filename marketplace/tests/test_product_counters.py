@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from marketplace.catalog.domain.services.counters import MemoryCounterStore, ProductCounters
+from marketplace.models import Category, Product, ProductMetrics
+from marketplace.services import CatalogService
+
+
+User = get_user_model()
+
+
+@override_settings(PRODUCT_COUNTER_BACKEND="memory", PRODUCT_COUNTER_FLUSH_INTERVAL=3600)
+class ProductCountersTest(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        category = Category.objects.create(name="Furniture", slug="furniture")
+        self.products = [
+            Product.objects.create(
+                name=f"Chair {i}", description="Chair", seller=seller, category=category, price=Decimal("10.00")
+            )
+            for i in range(4)
+        ]
+        self.counters = ProductCounters(store=MemoryCounterStore())
+
+    def test_increments_are_buffered_until_flush(self):
+        first = self.products[0]
+
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.counters.increment_product(first.pk, "view_count")
+
+        first.refresh_from_db()
+        self.assertEqual(first.view_count, 0)
+
+        self.assertEqual(self.counters.flush(), 1)
+        first.refresh_from_db()
+        self.assertEqual(first.view_count, 3)
+        self.assertEqual(self.counters.flush(), 0)
+
+    def test_products_with_equal_deltas_share_one_update(self):
+        for product in self.products:
+            self.counters.increment_product(product.pk, "view_count")
+        self.counters.increment_product(self.products[0].pk, "click_count")
+
+        # savepoint + one UPDATE per distinct delta set + release
+        with self.assertNumQueries(4):
+            self.counters.flush()
+
+        counts = dict(Product.objects.values_list("name", "view_count"))
+        self.assertEqual(set(counts.values()), {1})
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].click_count, 1)
+
+    def test_flush_is_relative_to_the_stored_value(self):
+        product = self.products[0]
+        self.counters.increment_product(product.pk, "view_count", 2)
+        # A concurrent writer changes the row after the increment was buffered
+        Product.objects.filter(pk=product.pk).update(view_count=10)
+
+        self.counters.flush()
+
+        product.refresh_from_db()
+        self.assertEqual(product.view_count, 12)
+
+    def test_metrics_rows_are_created_and_never_go_negative(self):
+        product = self.products[1]
+        self.counters.increment_metrics(product.pk, "total_views", 5)
+        self.counters.increment_metrics(product.pk, "total_favorites", -1)
+        self.counters.flush()
+
+        metrics = ProductMetrics.objects.get(product=product)
+        self.assertEqual((metrics.total_views, metrics.total_favorites), (5, 0))
+
+    def test_decrement_of_a_zero_counter_never_subtracts_below_zero(self):
+        product = self.products[2]
+        self.counters.increment_product(product.pk, "favorite_count", -1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.counters.flush()
+
+        product.refresh_from_db()
+        self.assertEqual(product.favorite_count, 0)
+        # Unsigned columns reject "0 - 1" outright (MySQL error 1690), so the
+        # subtraction must only run on rows that can absorb it
+        update = next(q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+        self.assertIn("CASE WHEN", update)
+        self.assertNotIn("MAX(", update)
+
+    def test_failed_flush_keeps_increments(self):
+        product = self.products[0]
+        self.counters.increment_product(product.pk, "view_count")
+        apply = self.counters._apply
+        self.counters._apply = lambda counts: (_ for _ in ()).throw(RuntimeError("db down"))
+
+        with self.assertRaises(RuntimeError):
+            self.counters.flush()
+
+        self.counters._apply = apply
+        self.counters.flush()
+        product.refresh_from_db()
+        self.assertEqual(product.view_count, 1)
+
+    def test_unknown_counter_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.counters.increment_product(self.products[0].pk, "price")
+
+    def test_get_product_does_not_save_the_product(self):
+        service = CatalogService()
+        service.counters = self.counters
+        product = self.products[2]
+
+        result = service.get_product(str(product.pk))
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.value.view_count, 1)
+        product.refresh_from_db()
+        self.assertEqual(product.view_count, 0)
+        self.counters.flush()
+        product.refresh_from_db()
+        self.assertEqual(product.view_count, 1)
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from marketplace.models import Category, Product, ProductFavorite, ProductImage
+from marketplace.serializers import ProductListSerializer
+
+
+User = get_user_model()
+
+
+class ProductListSerializerBatchTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        self.buyer = User.objects.create_user(username="buyer", email="buyer@example.com", password="pw")
+        category = Category.objects.create(name="Furniture", slug="furniture")
+        self.products = [
+            Product.objects.create(
+                name=f"Lamp {i}",
+                description="Lamp",
+                seller=self.seller,
+                category=category,
+                price=Decimal("80.00"),
+                original_price=Decimal("100.00") if i % 2 else None,
+                stock_quantity=i % 3,
+            )
+            for i in range(12)
+        ]
+        for product in self.products:
+            ProductImage.objects.create(product=product, image=f"products/{product.pk}-a.jpg")
+            ProductImage.objects.create(product=product, image=f"products/{product.pk}-b.jpg", is_primary=True)
+        ProductFavorite.objects.create(user=self.buyer, product=self.products[3])
+
+        request = APIRequestFactory().get("/")
+        request.user = self.buyer
+        self.context = {"request": request}
+
+    def test_page_is_serialized_in_constant_queries(self):
+        queryset = Product.objects.filter(pk__in=[p.pk for p in self.products]).prefetch_related("images")
+
+        # products + prefetched images + favorites
+        with self.assertNumQueries(3):
+            data = ProductListSerializer(queryset, many=True, context=self.context).data
+
+        self.assertEqual(len(data), 12)
+
+    def test_batch_values_match_single_object_serialization(self):
+        products = list(Product.objects.filter(pk__in=[p.pk for p in self.products]))
+
+        batched = ProductListSerializer(products, many=True, context=self.context).data
+        single = [ProductListSerializer(product, context=self.context).data for product in products]
+
+        self.assertEqual(batched, single)
+        favorited = {row["id"] for row in batched if row["is_favorited"]}
+        self.assertEqual(favorited, {str(self.products[3].pk)})
+        self.assertTrue(all(row["primary_image"].endswith("-b.jpg") for row in batched))
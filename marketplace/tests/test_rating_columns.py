@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from marketplace.filters import ProductFilter
+from marketplace.models import Category, Product, ProductReview
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+class ProductRatingColumnsTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        self.reviewers = [
+            User.objects.create_user(username=f"reviewer{i}", email=f"r{i}@example.com", password="pw")
+            for i in range(3)
+        ]
+        category = Category.objects.create(name="Furniture", slug="furniture")
+        self.sofa, self.table, self.lamp = [
+            Product.objects.create(
+                name=name, description=name, seller=self.seller, category=category, price=Decimal("50.00")
+            )
+            for name in ["Sofa", "Table", "Lamp"]
+        ]
+
+    def _review(self, product, reviewer, rating):
+        return ProductReview.objects.create(product=product, reviewer=reviewer, rating=rating)
+
+    def test_review_writes_keep_columns_exact(self):
+        first = self._review(self.sofa, self.reviewers[0], 4)
+        self._review(self.sofa, self.reviewers[1], 5)
+        self._review(self.sofa, self.reviewers[2], 5)
+        self.sofa.refresh_from_db()
+        self.assertEqual(self.sofa.average_rating, Decimal("4.67"))
+        self.assertEqual(self.sofa.review_count, 3)
+
+        first.rating = 1
+        first.save()
+        self.sofa.refresh_from_db()
+        self.assertEqual(self.sofa.average_rating, Decimal("3.67"))
+
+        first.is_active = False
+        first.save()
+        self.sofa.refresh_from_db()
+        self.assertEqual((self.sofa.average_rating, self.sofa.review_count), (Decimal("5.00"), 2))
+
+        for review in ProductReview.objects.filter(product=self.sofa):
+            review.delete()
+        self.sofa.refresh_from_db()
+        self.assertEqual((self.sofa.average_rating, self.sofa.review_count), (Decimal("0.00"), 0))
+
+    def test_moving_a_review_refreshes_both_products(self):
+        review = self._review(self.sofa, self.reviewers[0], 4)
+        self._review(self.table, self.reviewers[1], 2)
+
+        review.product = self.table
+        review.save()
+
+        self.sofa.refresh_from_db()
+        self.table.refresh_from_db()
+        self.assertEqual((self.sofa.average_rating, self.sofa.review_count), (Decimal("0.00"), 0))
+        self.assertEqual((self.table.average_rating, self.table.review_count), (Decimal("3.00"), 2))
+
+    def test_helpful_count_updates_skip_the_refresh(self):
+        review = self._review(self.sofa, self.reviewers[0], 4)
+        review.helpful_count = 3
+
+        with self.assertNumQueries(1):
+            review.save(update_fields=["helpful_count"])
+
+    def test_min_rating_filter_is_a_single_query(self):
+        self._review(self.sofa, self.reviewers[0], 5)
+        self._review(self.table, self.reviewers[0], 3)
+
+        with self.assertNumQueries(1):
+            names = [p.name for p in ProductFilter({"min_rating": 4}, queryset=Product.objects.all()).qs]
+
+        self.assertEqual(names, ["Sofa"])
+
+    def test_search_rating_filter_and_sort_use_columns(self):
+        self._review(self.sofa, self.reviewers[0], 4)
+        self._review(self.table, self.reviewers[0], 5)
+
+        result = SearchService().search("", filters={"min_rating": 1}, sort="rating")
+
+        self.assertEqual([p.name for p in result.value["results"]], ["Table", "Sofa"])
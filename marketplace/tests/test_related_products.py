@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from activity.models import UserClick
+from marketplace.catalog.domain.services.related_products import RelatedProductsIndex
+from marketplace.models import Category, Product, RelatedProduct
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+@override_settings(RELATED_PRODUCTS_TOP_K=3)
+class RelatedProductsIndexTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        self.shopper = User.objects.create_user(username="shopper", email="shopper@example.com", password="pw")
+        self.sofas = Category.objects.create(name="Sofas", slug="sofas")
+        self.lamps = Category.objects.create(name="Lamps", slug="lamps")
+
+        self.sofa = self._product("Oak Sofa", self.sofas, "100.00", brand="Nordic", tags=["oak", "modern"])
+        self.twin = self._product("Oak Loveseat", self.sofas, "110.00", brand="Nordic", tags=["oak", "modern"])
+        self.cheap = self._product("Budget Sofa", self.sofas, "20.00")
+        self.pricey = self._product("Leather Sofa", self.sofas, "900.00")
+        self.lamp = self._product("Floor Lamp", self.lamps, "40.00")
+        self.unrelated = self._product("Desk Lamp", self.lamps, "300.00")
+
+    def _product(self, name, category, price, **extra):
+        return Product.objects.create(
+            name=name, description=name, seller=self.seller, category=category, price=Decimal(price), **extra
+        )
+
+    def test_price_band_groups_prices_within_thirty_percent(self):
+        index = RelatedProductsIndex()
+
+        self.assertEqual(index.price_band(100), index.price_band(110))
+        self.assertLessEqual(abs(index.price_band(100) - index.price_band(125)), 1)
+        self.assertGreater(index.price_band(900) - index.price_band(100), 1)
+
+    def test_attribute_similarity_ranks_close_products_first(self):
+        results = RelatedProductsIndex().compute()
+
+        related = [pk for pk, _ in results[self.sofa.pk]]
+        self.assertEqual(related[0], self.twin.pk)
+        # Other-category products with no shared attributes are never candidates
+        self.assertNotIn(self.unrelated.pk, related)
+
+    def test_co_interest_surfaces_cross_category_products(self):
+        for _ in range(2):
+            UserClick.objects.create(product=self.sofa, action="detail_view", user=self.shopper)
+        UserClick.objects.create(product=self.lamp, action="cart_add", user=self.shopper)
+        UserClick.objects.create(product=self.lamp, action="view", session_key="anon-1")
+        UserClick.objects.create(product=self.sofa, action="view", session_key="anon-1")
+
+        co_interest = RelatedProductsIndex().compute_co_interest()
+        self.assertGreater(co_interest[self.sofa.pk][self.lamp.pk], 0)
+        self.assertEqual(co_interest[self.sofa.pk][self.lamp.pk], co_interest[self.lamp.pk][self.sofa.pk])
+
+        related = [pk for pk, _ in RelatedProductsIndex().compute()[self.sofa.pk]]
+        self.assertIn(self.lamp.pk, related)
+
+    def test_rebuild_stores_top_k_and_drops_inactive_products(self):
+        index = RelatedProductsIndex()
+        index.rebuild()
+
+        self.assertEqual(RelatedProduct.objects.filter(product=self.sofa).count(), 3)
+        self.assertEqual(index.related(self.sofa.pk, limit=1), [self.twin])
+
+        Product.objects.filter(pk=self.twin.pk).update(is_active=False)
+        self.assertNotIn(self.twin, index.related(self.sofa.pk))
+
+        index.rebuild()
+        self.assertFalse(RelatedProduct.objects.filter(product=self.twin).exists())
+        self.assertFalse(RelatedProduct.objects.filter(related=self.twin).exists())
+
+    def test_service_reads_precomputed_list_in_constant_queries(self):
+        RelatedProductsIndex().rebuild()
+
+        # related join + prefetched images
+        with self.assertNumQueries(2):
+            result = SearchService().get_related_products(str(self.sofa.pk), limit=2)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.value[0], self.twin)
+
+    def test_service_falls_back_to_live_query_before_first_build(self):
+        result = SearchService().get_related_products(str(self.sofa.pk))
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.value, [self.twin])
+
+    def test_related_endpoint(self):
+        RelatedProductsIndex().rebuild()
+        client = APIClient()
+
+        response = client.get(reverse("marketplace:product-related", kwargs={"slug": self.sofa.slug}), {"limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.data], ["Oak Loveseat"])
+
+        response = client.get(reverse("marketplace:product-related", kwargs={"slug": "missing"}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from marketplace.catalog.domain.services.search_backends import (
+    BasicSearchBackend,
+    MySQLFullTextBackend,
+    PostgresSearchBackend,
+    get_search_backend,
+)
+from marketplace.models import Category, Product
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+class MySQLBooleanQueryTest(SimpleTestCase):
+    def setUp(self):
+        self.backend = MySQLFullTextBackend()
+
+    def test_plain_words_become_required_prefix_terms(self):
+        self.assertEqual(self.backend.build_boolean_query("sofa bed"), "+sofa* +bed*")
+
+    def test_exclusions_and_phrases(self):
+        self.assertEqual(
+            self.backend.build_boolean_query('"oak table" -glass chair'),
+            '+"oak table" +chair* -glass',
+        )
+
+    def test_operator_characters_split_words(self):
+        self.assertEqual(self.backend.build_boolean_query("lamp@(desk)~>"), "+lamp* +desk*")
+
+    def test_punctuated_words_match_their_indexed_parts(self):
+        self.assertEqual(self.backend.build_boolean_query("mid-century t-shirt"), "+mid* +century* +shirt*")
+        self.assertEqual(self.backend.build_boolean_query("sofa -mid-century"), '+sofa* -"mid century"')
+
+    def test_short_or_exclusion_only_queries_fall_back(self):
+        self.assertEqual(self.backend.build_boolean_query("tv"), "")
+        self.assertEqual(self.backend.build_boolean_query("-glass"), "")
+
+    def test_backend_selection(self):
+        self.assertIsInstance(get_search_backend("mysql"), MySQLFullTextBackend)
+        self.assertIsInstance(get_search_backend("postgresql"), PostgresSearchBackend)
+        self.assertIs(type(get_search_backend("sqlite")), BasicSearchBackend)
+
+
+class SearchServiceBackendTest(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        self.category = Category.objects.create(name="Furniture", slug="furniture")
+        for name, brand in [("Oak Sofa Bed", "Nordic"), ("Glass Table", "Clear"), ("Desk Lamp", "Nordic")]:
+            Product.objects.create(
+                name=name,
+                description=f"{name} description",
+                brand=brand,
+                seller=self.seller,
+                category=self.category,
+                price=Decimal("100.00"),
+            )
+
+    def test_search_uses_fallback_backend_on_sqlite(self):
+        service = SearchService()
+
+        result = service.search("nordic", sort="relevance")
+
+        self.assertIs(type(service.backend), BasicSearchBackend)
+        self.assertTrue(result.ok)
+        self.assertEqual({p.name for p in result.value["results"]}, {"Oak Sofa Bed", "Desk Lamp"})
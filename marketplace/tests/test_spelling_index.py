@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from marketplace.catalog.domain.services.spelling_index import SpellingIndex, edit_distance, trigrams
+from marketplace.filters import ProductFilter
+from marketplace.models import Category, Product, SearchTerm
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+class TrigramHelpersTest(SimpleTestCase):
+    def test_trigrams_are_padded(self):
+        self.assertEqual(trigrams("bed"), {"  b", " be", "bed", "ed "})
+
+    def test_edit_distance_counts_transpositions_once(self):
+        self.assertEqual(edit_distance("ikae", "ikea"), 1)
+        self.assertEqual(edit_distance("bedd", "bed"), 1)
+        self.assertEqual(edit_distance("lamp", "lamps"), 1)
+
+
+class SpellingIndexTest(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        category = Category.objects.create(name="Furniture", slug="furniture")
+        for name, brand in [("Oak Sofa Bed", "IKEA"), ("Glass Coffee Table", "Nordic"), ("Sofa Cushion", "IKEA")]:
+            Product.objects.create(
+                name=name,
+                description=name,
+                brand=brand,
+                seller=seller,
+                category=category,
+                price=Decimal("100.00"),
+            )
+        self.index = SpellingIndex()
+
+    def test_vocabulary_is_built_from_product_saves(self):
+        self.assertTrue(SearchTerm.objects.filter(term="ikea").exists())
+        self.assertFalse(SearchTerm.objects.filter(term="oa").exists())
+
+    def test_correct(self):
+        self.assertEqual(self.index.correct("sofa bedd"), "sofa bed")
+        self.assertEqual(self.index.correct("ikae"), "ikea")
+        self.assertEqual(self.index.correct("Glas tabel"), "glass table")
+        self.assertIsNone(self.index.correct("sofa"))
+        self.assertIsNone(self.index.correct("xylophone"))
+
+    def test_correct_keeps_search_operators(self):
+        self.assertEqual(self.index.correct("sofa -glas"), "sofa -glass")
+        self.assertEqual(self.index.correct('"coffe table" -ikae'), '"coffee table" -ikea')
+
+    def test_rebuild_counts_frequencies(self):
+        self.assertEqual(self.index.rebuild(), 9)
+        self.assertEqual(SearchTerm.objects.get(term="sofa").frequency, 2)
+
+    def test_search_falls_back_to_corrected_query(self):
+        result = SearchService().search("sofa bedd")
+
+        self.assertTrue(result.ok)
+        self.assertTrue(result.value["fuzzy"])
+        self.assertEqual(result.value["did_you_mean"], "sofa bed")
+        self.assertEqual([p.name for p in result.value["results"]], ["Oak Sofa Bed"])
+
+    def test_search_with_exact_results_is_unchanged(self):
+        result = SearchService().search("cushion")
+
+        self.assertFalse(result.value["fuzzy"])
+        self.assertIsNone(result.value["did_you_mean"])
+        self.assertEqual(result.value["count"], 1)
+
+    def test_product_filter_search_uses_correction(self):
+        queryset = ProductFilter({"search": "ikae"}, queryset=Product.objects.all()).qs
+
+        self.assertEqual(queryset.count(), 2)
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from activity.models import UserClick
+from marketplace.catalog.domain.services.trending import TrendingRanker
+from marketplace.models import Category, Product, TrendingProduct
+from marketplace.services import SearchService
+
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE_HOURS=24, TRENDING_WINDOW_DAYS=7, TRENDING_TOP_N=2)
+class TrendingRankerTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        seller = User.objects.create_user(username="seller", email="seller@example.com", password="pw")
+        self.sofas = Category.objects.create(name="Sofas", slug="sofas")
+        self.lamps = Category.objects.create(name="Lamps", slug="lamps")
+
+        def product(name, category, view_count=0):
+            return Product.objects.create(
+                name=name,
+                description=name,
+                seller=seller,
+                category=category,
+                price=Decimal("10.00"),
+                view_count=view_count,
+            )
+
+        # The old favourite has far more lifetime views but nothing recent
+        self.old_favourite = product("Old Sofa", self.sofas, view_count=10_000)
+        self.new_sofa = product("New Sofa", self.sofas)
+        self.lamp = product("Desk Lamp", self.lamps)
+        self.inactive = product("Hidden Lamp", self.lamps)
+        Product.objects.filter(pk=self.inactive.pk).update(is_active=False)
+
+    def _clicks(self, product, action, count, hours_ago):
+        for _ in range(count):
+            click = UserClick.objects.create(product=product, action=action)
+            UserClick.objects.filter(pk=click.pk).update(created_at=self.now - timedelta(hours=hours_ago))
+
+    def test_recent_activity_outranks_old_activity(self):
+        self._clicks(self.old_favourite, "view", 20, hours_ago=24 * 6)
+        self._clicks(self.new_sofa, "view", 3, hours_ago=1)
+        self._clicks(self.lamp, "cart_add", 1, hours_ago=30)
+        # Outside the window, from an inactive product, or an impression: ignored
+        self._clicks(self.lamp, "view", 50, hours_ago=24 * 8)
+        self._clicks(self.inactive, "cart_add", 50, hours_ago=1)
+        self._clicks(self.old_favourite, "listing_view", 50, hours_ago=1)
+
+        scores = TrendingRanker().compute_scores(self.now)
+
+        self.assertEqual(
+            set(scores),
+            {(self.old_favourite.pk, self.sofas.pk), (self.new_sofa.pk, self.sofas.pk), (self.lamp.pk, self.lamps.pk)},
+        )
+        # 20 views six days ago decay to roughly 20 / 2**6 (events are bucketed by hour)
+        old_score = scores[(self.old_favourite.pk, self.sofas.pk)]
+        self.assertTrue(20 * 0.5 ** (145 / 24) <= old_score <= 20 * 0.5 ** (143 / 24), old_score)
+        self.assertGreater(scores[(self.new_sofa.pk, self.sofas.pk)], scores[(self.lamp.pk, self.lamps.pk)])
+
+    def test_rebuild_writes_global_and_per_category_top_n(self):
+        self._clicks(self.old_favourite, "view", 20, hours_ago=24 * 6)
+        self._clicks(self.new_sofa, "view", 3, hours_ago=1)
+        self._clicks(self.lamp, "cart_add", 1, hours_ago=30)
+
+        rows = TrendingRanker().rebuild(self.now)
+
+        # Two global rows (top N = 2), two sofas and one lamp
+        self.assertEqual(rows, 5)
+        ranker = TrendingRanker()
+        self.assertEqual(ranker.top(10), [self.new_sofa, self.lamp])
+        self.assertEqual(ranker.top(10, category_slug="sofas"), [self.new_sofa, self.old_favourite])
+        self.assertEqual(ranker.top(1, category_slug="lamps"), [self.lamp])
+
+        # A rebuild replaces the previous ranking
+        TrendingRanker().rebuild(self.now + timedelta(days=30))
+        self.assertFalse(TrendingProduct.objects.exists())
+
+    def test_top_is_a_constant_number_of_queries(self):
+        self._clicks(self.new_sofa, "view", 1, hours_ago=1)
+        self._clicks(self.lamp, "view", 2, hours_ago=1)
+        TrendingRanker().rebuild(self.now)
+
+        # ranking join + prefetched images
+        with self.assertNumQueries(2):
+            TrendingRanker().top(10)
+
+    def test_service_falls_back_to_lifetime_counts_before_first_run(self):
+        result = SearchService().get_trending_products(limit=2)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.value[0], self.old_favourite)
+
+    def test_trending_endpoint(self):
+        self._clicks(self.lamp, "favorite", 1, hours_ago=1)
+        TrendingRanker().rebuild(self.now)
+
+        response = APIClient().get(reverse("marketplace:product-trending"), {"category": "lamps"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.data], ["Desk Lamp"])
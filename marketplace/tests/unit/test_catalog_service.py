@@ -42,23 +42,33 @@ def mock_product_qs():
 @pytest.mark.unit
 class TestCatalogService:
     @patch("marketplace.catalog.domain.services.catalog_service.Product.objects")
-    @patch("marketplace.catalog.domain.services.catalog_service.Paginator")
-    def test_list_products_success(self, mock_paginator, mock_product_objects, catalog_service, mock_product_qs):
+    @patch("marketplace.catalog.domain.services.catalog_service.paginate")
+    def test_list_products_success(self, mock_paginate, mock_product_objects, catalog_service, mock_product_qs):
         mock_product_objects.select_related.return_value = mock_product_qs
-
-        mock_page = MagicMock()
-        mock_page.object_list = [MagicMock(spec=Product)]
-        paginator_instance = MagicMock()
-        paginator_instance.count = 100
-        paginator_instance.num_pages = 5
-        paginator_instance.get_page.return_value = mock_page
-        mock_paginator.return_value = paginator_instance
+        mock_paginate.return_value = {
+            "results": [MagicMock(spec=Product)],
+            "count": 100,
+            "page": 1,
+            "num_pages": 5,
+        }
 
         result = catalog_service.list_products(filters={"category": "electronics"}, page=1)
 
         assert result.ok is True
         assert result.value["count"] == 100
         mock_product_qs.filter.assert_called()
+        mock_paginate.assert_called_once_with(mock_product_qs, 1, 20, cursor=None, include_count=None)
+
+    @patch("marketplace.catalog.domain.services.catalog_service.Product.objects")
+    @patch("marketplace.catalog.domain.services.catalog_service.paginate")
+    def test_list_products_with_cursor(self, mock_paginate, mock_product_objects, catalog_service, mock_product_qs):
+        mock_product_objects.select_related.return_value = mock_product_qs
+        mock_paginate.return_value = {"results": [], "count": None, "page": None, "num_pages": None}
+
+        result = catalog_service.list_products(cursor="", page_size=10)
+
+        assert result.ok is True
+        mock_paginate.assert_called_once_with(mock_product_qs, 1, 10, cursor="", include_count=None)
 
     @patch("marketplace.catalog.domain.services.catalog_service.Product.objects")
     def test_get_product_success(self, mock_product_objects, catalog_service, mock_product_qs):
@@ -66,11 +76,13 @@ class TestCatalogService:
         mock_product_qs.get.return_value = mock_product
         mock_product_objects.select_related.return_value = mock_product_qs
 
-        result = catalog_service.get_product(str(mock_product.id))
+        with patch.object(catalog_service, "counters") as counters:
+            result = catalog_service.get_product(str(mock_product.id))
 
         assert result.ok is True
         assert result.value == mock_product
-        mock_product.save.assert_called()  # View count updated
+        counters.increment_product.assert_called_once_with(mock_product.pk, "view_count")  # View count buffered
+        mock_product.save.assert_not_called()
 
     @patch("marketplace.catalog.domain.services.catalog_service.Product.objects")
     def test_get_product_not_found(self, mock_product_objects, catalog_service, mock_product_qs):
@@ -182,14 +182,6 @@ class TestSearchService:
         assert result.ok is False
         assert result.error == ErrorCodes.PRODUCT_NOT_FOUND
 
-    @patch("django.db.connection")
-    def test_check_postgres_support(self, mock_connection, search_service):
-        mock_connection.vendor = "postgresql"
-        assert search_service._check_postgres_support() is True
-
-        mock_connection.vendor = "sqlite"
-        assert search_service._check_postgres_support() is False
-
     @patch("marketplace.services.search_service.Product.objects")
     def test_apply_filters_all(self, mock_product_objects, search_service, mock_product_qs):
         filters = {
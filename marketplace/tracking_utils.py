@@ -242,50 +242,28 @@ class ProductTracker:
     ) -> int:
         """
         Track views for multiple products in a listing/search result.
-        Automatically ensures ProductMetrics exist for all products.
 
-        This is used when a user views a product listing page, registering
-        views for all products shown in the listing.
+        The listing is queued through AsyncTracker.queue_listing_view as one
+        impression event holding every product id; the activity drain
+        expands it into per-product UserClick rows and ProductMetrics
+        increments, so nothing is written here. The visitor is taken from
+        the request.
 
         Args:
             products: List of Product instances
-            user: User instance (None for anonymous users)
-            session_key: Session key for anonymous tracking
-            request: HTTP request for metadata extraction
+            user: Unused, the request's user is tracked
+            session_key: Unused, the request's session is tracked
+            request: HTTP request for visitor and metadata extraction
 
         Returns:
-            int: Number of products successfully tracked
+            int: Number of products queued for tracking
         """
-        tracked_count = 0
-
-        try:
-            # Ensure ProductMetrics exist for all products (bulk operation)
-            logger.info(f"Ensuring ProductMetrics exist for {len(products)} products")
-            MetricsHelper.bulk_ensure_metrics(products)
-
-            # Get or ensure session key for anonymous users
-            if not user and not session_key and request:
-                if not request.session.session_key:
-                    request.session.save()
-                session_key = request.session.session_key
-
-            # Track listing view for each product in the listing
-            for product in products:
-                try:
-                    UserClick.track_activity(
-                        product=product, action="listing_view", user=user, session_key=session_key, request=request
-                    )
-                    tracked_count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to track view for product {product.id}: {str(e)}")
-                    continue
-
-            logger.info(f"Listing views tracked: {tracked_count}/{len(products)} products")
-            return tracked_count
+        from marketplace.async_tracking import AsyncTracker
 
-        except Exception as e:
-            logger.error(f"Error tracking listing views: {str(e)}")
-            return tracked_count
+        if not products:
+            return 0
+        queued = AsyncTracker.queue_listing_view(products, request)
+        return len(products) if queued else 0
 
 
 class MetricsHelper:
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from marketplace.api.views import internal_views
 from marketplace.cart.api.views.cart_views import CartViewSet
-from marketplace.catalog.api.views.analytics_views import SellerAnalyticsView
+from marketplace.catalog.api.views.analytics_views import SellerAnalyticsView, SellerFunnelView
 from marketplace.catalog.api.views.category_views import CategoryViewSet
 from marketplace.catalog.api.views.image_views import ProductImageViewSet
 from marketplace.catalog.api.views.metric_views import ProductMetricsViewSet
@@ -36,6 +36,8 @@ urlpatterns = [
     path("products/search/", SearchViewSet.as_view({"get": "search"}), name="product-search"),
     path("products/autocomplete/", SearchViewSet.as_view({"get": "autocomplete"}), name="product-autocomplete"),
     path("products/filters/", SearchViewSet.as_view({"get": "filters"}), name="product-filters"),
+    path("products/facets/", SearchViewSet.as_view({"get": "facets"}), name="product-facets"),
+    path("products/trending/", SearchViewSet.as_view({"get": "trending"}), name="product-trending"),
     # Product Images (nested under specific product)
     path(
         "products/<slug:product_slug>/images/",
@@ -84,6 +86,7 @@ urlpatterns = [
     ),
     # Seller Analytics (authenticated seller only)
     path("seller/analytics/", SellerAnalyticsView.as_view(), name="seller-analytics"),
+    path("seller/analytics/funnel/", SellerFunnelView.as_view(), name="seller-analytics-funnel"),
     # ==================== USER PROFILES ====================
     # Handled by router: /profiles/
     # ==================== METRICS (Prometheus) ====================